@@ -0,0 +1,120 @@
+"""
+Single entry point for the Q1 workflow.
+
+Commands (options after the command are passed to the underlying script):
+    python apmcm.py ingest [--workers N] [--force]     process_external_data.py (WITS panel + model input)
+    python apmcm.py wash [--targets T ...]             wash/datawash.py (official attachments)
+    python apmcm.py model                              model_q1.py (calibration + scenarios)
+    python apmcm.py psd [--store] [--workers N]        process_psd_soy.py (+ process_psd_tables.py store)
+    python apmcm.py plot [--preview] [--only NAME ...] visualization.py (figures)
+    python apmcm.py run [--targets STAGE ...]          pipeline.py (all of the above that are out of date)
+
+Only argparse is imported at start-up; each command imports its own module when it runs,
+so pandas is loaded only for data commands and matplotlib/seaborn only for `plot`
+(and for the wash quality-check chart). `python apmcm.py <command> -h` shows that
+command's options.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+BASE_DIR = Path(__file__).resolve().parent
+WASH_DIR = BASE_DIR / "wash"
+
+
+def run_ingest(argv: List[str]) -> None:
+    import process_external_data
+
+    process_external_data.main(argv)
+
+
+def run_wash(argv: List[str]) -> None:
+    # wash/ modules import each other as top-level modules (python wash/datawash.py)
+    if str(WASH_DIR) not in sys.path:
+        sys.path.insert(0, str(WASH_DIR))
+    import datawash
+
+    datawash.main(argv)
+
+
+def run_model(argv: List[str]) -> None:
+    argparse.ArgumentParser(prog="apmcm model", description="Calibrate the Armington model and run scenarios").parse_args(argv)
+    import model_q1
+
+    model_q1.main()
+
+
+def run_psd(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(prog="apmcm psd", description="Clean PSD tables and compare industry impact")
+    parser.add_argument("--store", action="store_true", help="Also parse every PSD table into psd_store")
+    parser.add_argument("--workers", type=int, default=None, help="Process-pool size for --store")
+    args = parser.parse_args(argv)
+    if args.store:
+        import process_psd_tables
+
+        process_psd_tables.main(args.workers)
+    import process_psd_soy
+
+    process_psd_soy.main()
+
+
+def run_plot(argv: List[str]) -> None:
+    import visualization
+
+    visualization.main(argv)
+
+
+def run_pipeline(argv: List[str]) -> None:
+    import pipeline
+
+    pipeline.main(argv)
+
+
+COMMANDS: Dict[str, Callable[[List[str]], None]] = {
+    "ingest": run_ingest,
+    "wash": run_wash,
+    "model": run_model,
+    "psd": run_psd,
+    "plot": run_plot,
+    "run": run_pipeline,
+}
+
+HELP = {
+    "ingest": "WITS workbooks -> wits_panel + china_soy_imports.csv",
+    "wash": "Clean the official tariff / DataWeb attachments",
+    "model": "Calibrate the Armington model, run scenarios and sensitivities",
+    "psd": "Clean PSD tables, compare scenario impact with PSD exports",
+    "plot": "Render figures (cached, parallel)",
+    "run": "Run every out-of-date stage (ingest, model, psd, plot) as a dependency graph",
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="apmcm",
+        description="APMCM 2025 Problem C, Q1 workflow",
+        epilog="Run 'apmcm COMMAND -h' for the options of a command.",
+    )
+    sub = parser.add_subparsers(dest="command", required=True, metavar="COMMAND")
+    for name, text in HELP.items():
+        sub.add_parser(name, help=text)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # Everything after the command (including -h) belongs to the command's own parser
+    if not argv or argv[0] not in COMMANDS:
+        build_parser().parse_args(argv[:1])
+        return
+    command, rest = argv[0], argv[1:]
+    start = time.perf_counter()
+    COMMANDS[command](rest)
+    print(f"[apmcm] {command} finished in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
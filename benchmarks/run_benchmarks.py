@@ -0,0 +1,343 @@
+"""
+Benchmark the Q1 hot paths on synthetic workloads of several sizes and compare with a saved baseline.
+
+Cases (inputs come from benchmarks/synthetic.py, built before timing starts):
+    calibration     model_q1.calibrate_ces_for_china on an N-exporter import panel (sigma sweep)
+    scenarios       model_q1.simulate_scenario_for_china over a batch of tariff scenarios
+    annualization   wash/datawash.annualize_tariff_by_middate on all tariff vintages
+    aggregation     wash/datawash.build_tariff_level_panels (HS2/HS4/HS6 rollup)
+    dataweb_melt    DataWeb wide table -> long table (wash/dataweb_reader kernel + ISO3 + compaction)
+    merge           the pipeline's tariff join: PanelJoinIndex on the HS2 tariff panel +
+                    wash/datawash.build_trade_panel for exports and duties
+
+Each case/size runs --repeat times; the best time is compared with the baseline. A case is a
+REGRESSION when it is more than --threshold slower (and at least MIN_DELTA_S in absolute
+terms), IMPROVED when more than --threshold faster. Scaling exponents between consecutive
+sizes (time ~ items^k) show whether a stage stays linear as the workload grows.
+
+Baselines are machine-specific: save one on the machine you compare on.
+
+Outputs:
+    benchmarks/baselines/<name>.json     with --save-baseline
+    benchmarks/results/latest.json       every run (or --report PATH)
+
+Usage:
+    python benchmarks/run_benchmarks.py [--sizes small medium large] [--cases CASE ...]
+                                        [--repeat N] [--save-baseline [NAME]]
+                                        [--baseline NAME] [--threshold 0.25]
+Exits with status 1 when any case regressed.
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Instrumented functions must not write telemetry records while being timed
+os.environ.setdefault("APMCM_TELEMETRY", "off")
+
+BENCH_DIR = Path(__file__).resolve().parent
+BASE_DIR = BENCH_DIR.parent
+for path in (BASE_DIR, BASE_DIR / "wash"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+import numpy as np
+import pandas as pd
+
+import datawash
+import model_q1
+from join_index import PanelJoinIndex
+from benchmarks.synthetic import (
+    dataweb_long,
+    make_dataweb_wide,
+    make_import_panel,
+    make_tariff_vintages,
+    make_transport_costs,
+)
+
+BASELINE_DIR = BENCH_DIR / "baselines"
+DEFAULT_REPORT_PATH = BENCH_DIR / "results" / "latest.json"
+
+DEFAULT_THRESHOLD = 0.25
+# Differences below this many seconds are timer noise, never a regression
+MIN_DELTA_S = 0.005
+
+SIZES: Dict[str, Dict[str, int]] = {
+    "small": {"exporters": 10, "hts8": 2_000, "intervals": 2, "codes": 200, "partners": 20, "scenarios": 100},
+    "medium": {"exporters": 200, "hts8": 20_000, "intervals": 2, "codes": 1_000, "partners": 40, "scenarios": 500},
+    "large": {"exporters": 2_000, "hts8": 100_000, "intervals": 3, "codes": 4_000, "partners": 100, "scenarios": 2_000},
+}
+
+TARIFF_YEARS = range(2015, 2025)
+IMPORT_YEARS = range(2010, 2025)
+SIGMA_SWEEP = np.linspace(1.5, 5.0, 20)
+
+
+# ---------------------------------------------------------------------------
+# Cases: setup(size params) -> (timed callable, items processed per call)
+# ---------------------------------------------------------------------------
+
+def setup_calibration(p: Dict[str, int]) -> Tuple[Callable[[], object], int]:
+    panel = make_import_panel(p["exporters"], IMPORT_YEARS)
+    costs = make_transport_costs(panel["exporter"].unique())
+
+    def run() -> object:
+        return [model_q1.calibrate_ces_for_china(panel, model_q1.BASE_YEAR, s, 0.5, costs) for s in SIGMA_SWEEP]
+
+    return run, len(panel) * len(SIGMA_SWEEP)
+
+
+def setup_scenarios(p: Dict[str, int]) -> Tuple[Callable[[], object], int]:
+    # simulate_scenario_for_china solves for model_q1.EXPORTERS only, so the batch size scales here
+    panel = make_import_panel(len(model_q1.EXPORTERS), IMPORT_YEARS)
+    params = model_q1.calibrate_ces_for_china(panel, model_q1.BASE_YEAR, 3.0, 0.5, make_transport_costs(model_q1.EXPORTERS))
+    rng = np.random.default_rng(0)
+    scenarios = [
+        {
+            "demand_shock": float(shock),
+            "supply_caps": {"Brazil": {"q_cap": 95_000_000, "markup": 0.10}},
+            "US": {"delta_tariff": float(delta)},
+        }
+        for delta, shock in zip(rng.uniform(0.0, 0.5, p["scenarios"]), rng.uniform(-0.05, 0.0, p["scenarios"]))
+    ]
+
+    def run() -> object:
+        return [model_q1.simulate_scenario_for_china(params, s) for s in scenarios]
+
+    return run, len(scenarios)
+
+
+def setup_annualization(p: Dict[str, int]) -> Tuple[Callable[[], object], int]:
+    raw = make_tariff_vintages(p["hts8"], TARIFF_YEARS, p["intervals"])
+    return (lambda: datawash.annualize_tariff_by_middate(raw)), len(raw)
+
+
+def setup_aggregation(p: Dict[str, int]) -> Tuple[Callable[[], object], int]:
+    yearly = datawash.annualize_tariff_by_middate(make_tariff_vintages(p["hts8"], TARIFF_YEARS, p["intervals"]))
+    return (lambda: datawash.build_tariff_level_panels(yearly)), len(yearly)
+
+
+def setup_dataweb_melt(p: Dict[str, int]) -> Tuple[Callable[[], object], int]:
+    wide = make_dataweb_wide(p["codes"], p["partners"])
+    n_years = sum(str(c).isdigit() for c in wide.columns)
+    return (lambda: dataweb_long(wide, "export_fas")), len(wide) * n_years
+
+
+def setup_merge(p: Dict[str, int]) -> Tuple[Callable[[], object], int]:
+    yearly = datawash.annualize_tariff_by_middate(make_tariff_vintages(p["hts8"], TARIFF_YEARS, 1))
+    hs2_panel = datawash.build_tariff_level_panels(yearly, levels=("hs2",))["hs2"]
+    exports = dataweb_long(make_dataweb_wide(p["codes"], p["partners"], seed=1), "export_fas")
+    duties = dataweb_long(make_dataweb_wide(p["codes"], p["partners"], data_type="General Import Charges", seed=2),
+                          "import_duty")
+
+    def run() -> object:
+        join_index = PanelJoinIndex(hs2_panel, level="hs2")
+        return (datawash.build_trade_panel(join_index, exports, "export_fas", "trade_export_panel"),
+                datawash.build_trade_panel(join_index, duties, "import_duty", "trade_duty_panel"))
+
+    return run, len(exports) + len(duties)
+
+
+CASES: Dict[str, Callable[[Dict[str, int]], Tuple[Callable[[], object], int]]] = {
+    "calibration": setup_calibration,
+    "scenarios": setup_scenarios,
+    "annualization": setup_annualization,
+    "aggregation": setup_aggregation,
+    "dataweb_melt": setup_dataweb_melt,
+    "merge": setup_merge,
+}
+
+
+# ---------------------------------------------------------------------------
+# Timing
+# ---------------------------------------------------------------------------
+
+def time_case(case: str, size: str, repeat: int) -> Dict[str, object]:
+    """Best / median wall time of `repeat` runs; the pipeline's own progress prints are muted."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        run, items = CASES[case](SIZES[size])
+        times = []
+        for _ in range(repeat):
+            gc.collect()
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+    best = min(times)
+    return {
+        "case": case,
+        "size": size,
+        "items": items,
+        "best_s": round(best, 6),
+        "median_s": round(statistics.median(times), 6),
+        "items_per_s": round(items / best, 1) if best > 0 else None,
+    }
+
+
+def run_benchmarks(cases: List[str], sizes: List[str], repeat: int) -> List[Dict[str, object]]:
+    results = []
+    for case in cases:
+        for size in sizes:
+            result = time_case(case, size, repeat)
+            print(f"[Bench] {case}/{size}: {result['best_s']:.4f}s best of {repeat} ({result['items']} items)")
+            results.append(result)
+    return results
+
+
+def environment_info() -> Dict[str, object]:
+    return {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Baselines and comparison
+# ---------------------------------------------------------------------------
+
+def baseline_path(name: str) -> Path:
+    return BASELINE_DIR / f"{name}.json"
+
+
+def save_baseline(results: List[Dict[str, object]], name: str) -> Path:
+    path = baseline_path(name)
+    payload = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment_info(),
+        "results": {f"{r['case']}/{r['size']}": r for r in results},
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, indent=2, sort_keys=True), encoding="utf-8")
+    return path
+
+
+def load_baseline(name: str) -> Optional[dict]:
+    path = baseline_path(name)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def compare(results: List[Dict[str, object]], baseline: Optional[dict], threshold: float) -> pd.DataFrame:
+    """One row per case/size: timings, baseline time, relative change and status."""
+    saved = (baseline or {}).get("results", {})
+    rows = []
+    for r in results:
+        base = saved.get(f"{r['case']}/{r['size']}")
+        row = dict(r, baseline_s=None, change=None, status="NEW")
+        if base is not None and base.get("items") == r["items"]:
+            base_s = float(base["best_s"])
+            delta = float(r["best_s"]) - base_s
+            row["baseline_s"] = base_s
+            row["change"] = delta / base_s if base_s > 0 else None
+            if abs(delta) < MIN_DELTA_S or row["change"] is None or abs(row["change"]) <= threshold:
+                row["status"] = "OK"
+            else:
+                row["status"] = "REGRESSION" if delta > 0 else "IMPROVED"
+        elif base is not None:
+            # The workload definition changed; the old number is not comparable
+            row["status"] = "RESIZED"
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def scaling_exponents(results: List[Dict[str, object]]) -> pd.DataFrame:
+    """k in time ~ items^k between consecutive sizes of each case (1.0 = linear)."""
+    rows = []
+    frame = pd.DataFrame(results)
+    for case, group in frame.groupby("case", sort=False):
+        group = group.reset_index(drop=True)
+        for i in range(1, len(group)):
+            small, large = group.iloc[i - 1], group.iloc[i]
+            if small["items"] == large["items"] or min(small["best_s"], large["best_s"]) <= 0:
+                continue
+            k = math.log(large["best_s"] / small["best_s"]) / math.log(large["items"] / small["items"])
+            rows.append({"case": case, "from": small["size"], "to": large["size"], "exponent": round(k, 2)})
+    return pd.DataFrame(rows)
+
+
+def print_report(table: pd.DataFrame, scaling: pd.DataFrame, baseline: Optional[dict]) -> None:
+    view = table[["case", "size", "items", "best_s", "median_s", "items_per_s", "baseline_s", "change", "status"]].copy()
+    view["change"] = view["change"].map(lambda c: "" if c is None or pd.isna(c) else f"{c:+.1%}")
+    print("\n" + view.to_string(index=False))
+    if not scaling.empty:
+        print("\nScaling (time ~ items^k):")
+        print(scaling.to_string(index=False))
+    if baseline is not None:
+        env, saved_env = environment_info(), baseline.get("environment", {})
+        differs = [k for k in ("python", "pandas", "numpy", "machine", "cpu_count") if saved_env.get(k) != env[k]]
+        if differs:
+            print(f"\n[Bench] Warning: baseline was recorded with a different {', '.join(differs)}; "
+                  "timings may not be comparable.")
+
+
+def write_report(path: Path, table: pd.DataFrame, scaling: pd.DataFrame, baseline_name: str, threshold: float) -> None:
+    payload = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment_info(),
+        "baseline": baseline_name,
+        "threshold": threshold,
+        "results": json.loads(table.to_json(orient="records")),
+        "scaling": json.loads(scaling.to_json(orient="records")) if not scaling.empty else [],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the Q1 hot paths on synthetic workloads")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES), metavar="CASE",
+                        help=f"Cases to run ({', '.join(CASES)})")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["small", "medium"],
+                        help="Workload sizes (default: small medium)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case/size; the best is reported")
+    parser.add_argument("--baseline", default="default", help="Baseline name to compare with")
+    parser.add_argument("--save-baseline", nargs="?", const="default", default=None, metavar="NAME",
+                        help="Save this run as baseline NAME (default: default)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative slowdown that counts as a regression (default: 0.25)")
+    parser.add_argument("--report", type=Path, default=DEFAULT_REPORT_PATH, help="JSON report path")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    sizes = [s for s in SIZES if s in args.sizes]
+    results = run_benchmarks(args.cases, sizes, max(1, args.repeat))
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"[Bench] No baseline '{args.baseline}' in {BASELINE_DIR}; all cases reported as NEW.")
+    table = compare(results, baseline, args.threshold)
+    scaling = scaling_exponents(results)
+    print_report(table, scaling, baseline)
+    write_report(args.report, table, scaling, args.baseline, args.threshold)
+    print(f"\n[Bench] Report written to {args.report}")
+
+    if args.save_baseline:
+        print(f"[Bench] Baseline saved to {save_baseline(results, args.save_baseline)}")
+
+    regressions = table[table["status"] == "REGRESSION"]
+    if not regressions.empty:
+        print(f"[Bench] {len(regressions)} regression(s) over {args.threshold:.0%}: "
+              + ", ".join(regressions["case"] + "/" + regressions["size"]))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""
+Scalable synthetic workloads shaped like the project's real inputs.
+
+    make_import_panel     WITS-like China import panel (N exporters x years), the model input
+                          layout of output/external_cleaned/china_soy_imports.csv
+    make_tariff_vintages  USITC-like raw tariff records for all vintages (configurable HTS8
+                          count and number of effective-date intervals per year), in the
+                          layout read_single_tariff_file returns (compact dtypes)
+    make_dataweb_wide     DataWeb-like wide export (Data Type, HTS Number, Description,
+                          Country, one column per year)
+    dataweb_long          wide table -> long table as read_dataweb_metric returns it
+
+All generators are deterministic for a given seed.
+"""
+
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+# wash/ modules import each other as top-level modules; use the same module objects
+WASH_DIR = Path(__file__).resolve().parents[1] / "wash"
+if str(WASH_DIR) not in sys.path:
+    sys.path.insert(0, str(WASH_DIR))
+from country_names import normalize_country_series
+from dataweb_reader import DATAWEB_ID_COLUMNS, find_period_columns, melt_dataweb_rows
+from panel_schema import TARIFF_CORE_COLUMNS, compact_panel
+
+# The model's own exporters come first so calibrate/simulate find them
+MODEL_EXPORTERS = ["US", "Brazil", "Argentina"]
+MODEL_TRANSPORT_COSTS = {"US": 55.0, "Brazil": 103.0, "Argentina": 79.0}
+
+PARTNER_NAMES = [
+    "China", "Canada", "Mexico", "Japan", "Germany", "United Kingdom", "France", "Brazil", "India",
+    "Korea, South", "Italy", "Netherlands", "Vietnam", "Taiwan", "Switzerland", "Ireland", "Belgium",
+    "Singapore", "Thailand", "Malaysia", "Australia", "Spain", "Israel", "Indonesia", "Philippines",
+    "Sweden", "Austria", "Poland", "Colombia", "Chile", "Argentina", "Turkey", "Denmark", "Norway",
+    "Saudi Arabia", "South Africa", "Peru", "Egypt", "Nigeria", "New Zealand",
+]
+
+
+def exporter_names(n_exporters: int) -> List[str]:
+    extra = [f"X{i:04d}" for i in range(len(MODEL_EXPORTERS) + 1, n_exporters + 1)]
+    return (MODEL_EXPORTERS + extra)[:n_exporters]
+
+
+def make_transport_costs(exporters: Sequence[str], seed: int = 0) -> Dict[str, float]:
+    rng = np.random.default_rng(seed)
+    costs = dict(zip(exporters, rng.uniform(40.0, 120.0, len(exporters)).round(1)))
+    costs.update({e: c for e, c in MODEL_TRANSPORT_COSTS.items() if e in costs})
+    return costs
+
+
+def make_import_panel(
+    n_exporters: int = 3,
+    years: Iterable[int] = range(2015, 2025),
+    seed: int = 0,
+) -> pd.DataFrame:
+    """year, exporter, quantity_tons, value_usd, p_fob, tariff_china for every exporter x year."""
+    rng = np.random.default_rng(seed)
+    years = np.asarray(list(years))
+    exporters = exporter_names(n_exporters)
+
+    # Exporter size follows a Zipf-like profile; total volume ~100 Mt growing 2%/year
+    weight = 1.0 / np.arange(1, n_exporters + 1) ** 1.2
+    weight /= weight.sum()
+    total = 100_000_000 * (1 + 0.02 * (years - years.min())) * rng.uniform(0.95, 1.05, len(years))
+    base_price = rng.uniform(400, 600, len(years))
+
+    quantity = np.outer(total, weight) * rng.uniform(0.8, 1.2, (len(years), n_exporters))
+    price = base_price[:, None] * rng.uniform(0.95, 1.05, (len(years), n_exporters))
+    tariff = np.where(np.array(exporters) == "US", 0.13, 0.03)
+
+    panel = pd.DataFrame({
+        "year": np.repeat(years, n_exporters),
+        "exporter": np.tile(exporters, len(years)),
+        "quantity_tons": quantity.ravel().astype(np.int64),
+        "p_fob": price.ravel(),
+        "tariff_china": np.tile(tariff, len(years)),
+    })
+    panel["value_usd"] = panel["quantity_tons"] * panel["p_fob"]
+    return panel[["year", "exporter", "quantity_tons", "value_usd", "p_fob", "tariff_china"]]
+
+
+def hts8_codes(n_hts8: int) -> np.ndarray:
+    """n distinct 8-digit codes spread over all HS chapters (01-97)."""
+    codes = np.linspace(1_010_000, 97_999_999, n_hts8).astype(np.int64)
+    if len(np.unique(codes)) != n_hts8:
+        raise ValueError(f"Too many HTS8 codes requested: {n_hts8}")
+    return codes
+
+
+def make_tariff_vintages(
+    n_hts8: int = 10_000,
+    years: Iterable[int] = range(2015, 2025),
+    intervals_per_year: int = 2,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """
+    Raw tariff records of all vintages: every HTS8 line appears once per effective-date
+    interval in each year's file (intervals split the year evenly; the last one is open-ended).
+    """
+    rng = np.random.default_rng(seed)
+    years = np.asarray(list(years))
+    codes = hts8_codes(n_hts8)
+    n_years, k = len(years), intervals_per_year
+    n_rows = n_years * n_hts8 * k
+
+    year = np.repeat(years, n_hts8 * k)
+    interval = np.tile(np.repeat(np.arange(k), n_hts8), n_years)
+    code = np.tile(codes, n_years * k)
+
+    year_start = pd.to_datetime(pd.Series(year).astype(str) + "-01-01")
+    begin = year_start + pd.to_timedelta(interval * (365 // k), unit="D")
+    end = (begin + pd.to_timedelta(365 // k - 1, unit="D")).where(interval < k - 1)
+
+    hts8 = pd.Series(code).astype(str).str.zfill(8)
+    ad_val = rng.choice([0.0, 0.025, 0.05, 0.1, 0.25], n_rows, p=[0.35, 0.2, 0.2, 0.15, 0.1])
+    specific = np.where(rng.random(n_rows) < 0.1, rng.uniform(0.01, 2.0, n_rows).round(3), 0.0)
+    additional = np.where(rng.random(n_rows) < 0.05, "Yes", "No")
+
+    df = pd.DataFrame({
+        "hts8": hts8,
+        "brief_description": "Synthetic item " + hts8,
+        "quantity_1_code": "kg",
+        "wto_binding_code": "B",
+        "mfn_text_rate": pd.Series(ad_val * 100).round(1).astype(str) + "%",
+        "mfn_rate_type_code": np.where(specific > 0, 4, 7),
+        "mfn_ave": ad_val,
+        "mfn_ad_val_rate": ad_val,
+        "mfn_specific_rate": specific,
+        "mfn_other_rate": 0.0,
+        "col2_text_rate": "35%",
+        "col2_rate_type_code": 7,
+        "col2_ad_val_rate": 0.35,
+        "col2_specific_rate": 0.0,
+        "col2_other_rate": 0.0,
+        "begin_effect_date": begin,
+        "end_effective_date": end.fillna(pd.Timestamp("2050-12-31")),
+        "additional_duty": additional,
+    })
+    df = df[list(TARIFF_CORE_COLUMNS)]
+    df["hs2"] = hts8.str[:2]
+    df["hs4"] = hts8.str[:4]
+    df["hs6"] = hts8.str[:6]
+    df["year"] = year
+    df["has_additional_duty"] = (additional == "Yes").astype(int)
+    df = df[sorted(df.columns)]
+    return compact_panel(df, name="synthetic tariff", categorize=False)
+
+
+def make_dataweb_wide(
+    n_codes: int = 1_000,
+    n_partners: int = 40,
+    years: Iterable[int] = range(2020, 2026),
+    data_type: str = "FAS Value",
+    seed: int = 0,
+) -> pd.DataFrame:
+    """DataWeb-like wide table: one row per HTS code x partner, one value column per year."""
+    rng = np.random.default_rng(seed)
+    years = [str(y) for y in years]
+    partners = (PARTNER_NAMES * (n_partners // len(PARTNER_NAMES) + 1))[:n_partners]
+    partners = [p if i < len(PARTNER_NAMES) else f"{p} {i // len(PARTNER_NAMES)}" for i, p in enumerate(partners)]
+    codes = pd.Series(hts8_codes(n_codes) // 100 * 10_000).astype(str).str.zfill(10)
+
+    n_rows = n_codes * n_partners
+    wide = pd.DataFrame({
+        "Data Type": data_type,
+        "HTS Number": np.repeat(codes.to_numpy(), n_partners),
+        "Description": np.repeat(("Synthetic product " + codes).to_numpy(), n_partners),
+        "Country": np.tile(partners, n_codes),
+    })
+    values = rng.lognormal(mean=12, sigma=2, size=(n_rows, len(years))).round(0)
+    values[rng.random(values.shape) < 0.3] = 0.0
+    return pd.concat([wide, pd.DataFrame(values, columns=years)], axis=1)
+
+
+def dataweb_long(wide: pd.DataFrame, metric_name: str) -> pd.DataFrame:
+    """Long table with the columns and dtypes read_dataweb_metric returns."""
+    header = list(wide.columns)
+    id_pos = [header.index(col) for col in DATAWEB_ID_COLUMNS]
+    period_pos, years, months = find_period_columns(header)
+
+    rows = list(wide.itertuples(index=False, name=None))
+    long = melt_dataweb_rows(rows, id_pos, period_pos, years, months, metric_name)
+    # No cache file: synthetic partner names must not leak into wash/output/country_iso3_map.csv
+    long["partner_iso3"] = normalize_country_series(long["partner_name"], cache_path=None)
+    cols = ["year", "hs2", "hts_code", "description", "partner_name", "partner_iso3", "metric", "value"]
+    return compact_panel(long[cols], name=f"synthetic dataweb {metric_name}")
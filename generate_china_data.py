@@ -1,11 +1,29 @@
+"""
+Generate a synthetic China soybean import panel in the model input layout
+(year, exporter, quantity_tons, value_usd, p_fob, tariff_china).
+
+By default writes the original 15-row sample (US/Brazil/Argentina, 2020-2024).
+With --exporters/--start-year/--end-year it writes a panel of any size via
+benchmarks/synthetic.py (the first three exporters are the model's own).
+
+Output:
+    output/synthetic/china_soy_imports.csv (never the cleaned WITS input in output/external_cleaned)
+
+Usage:
+    python generate_china_data.py [--exporters N] [--start-year Y] [--end-year Y] [--seed S] [--output-dir DIR]
+"""
+
+import argparse
+from pathlib import Path
+from typing import List, Optional
+
 import pandas as pd
 import numpy as np
-from pathlib import Path
 
-OUTPUT_DIR = Path(r"c:\competition\亚太杯\q1\output")
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+BASE_DIR = Path(__file__).resolve().parent
+OUTPUT_DIR = BASE_DIR / "output" / "synthetic"
 
-def generate_data():
+def generate_data(output_dir=OUTPUT_DIR):
     # Generate data for 2020-2024 (Historical/Current)
     # 2025 is the "Shock" year, but we might want baseline data up to 2024.
     years = range(2020, 2025) 
@@ -77,9 +95,38 @@ def generate_data():
             })
             
     df = pd.DataFrame(records)
-    output_path = OUTPUT_DIR / "china_soy_imports.csv"
+    write_panel(df, output_dir)
+
+def generate_scaled_data(n_exporters, years, seed, output_dir=OUTPUT_DIR):
+    from benchmarks.synthetic import make_import_panel
+
+    write_panel(make_import_panel(n_exporters, years, seed=seed), output_dir)
+
+def write_panel(df, output_dir):
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_path = output_dir / "china_soy_imports.csv"
     df.to_csv(output_path, index=False)
-    print(f"Generated {output_path}")
+    print(f"Generated {output_path} ({len(df)} rows)")
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate a synthetic China soybean import panel")
+    parser.add_argument("--exporters", type=int, default=None,
+                        help="Number of exporters; omit for the original 3-exporter sample")
+    parser.add_argument("--start-year", type=int, default=None, help="First year (default 2020)")
+    parser.add_argument("--end-year", type=int, default=None, help="Last year (default 2024)")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed (default 42)")
+    parser.add_argument("--output-dir", type=Path, default=OUTPUT_DIR)
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    scaled = (args.exporters, args.start_year, args.end_year, args.seed)
+    if all(v is None for v in scaled):
+        generate_data(args.output_dir)
+        return
+    years = range(args.start_year or 2020, (args.end_year or 2024) + 1)
+    generate_scaled_data(args.exporters or 3, years, 42 if args.seed is None else args.seed, args.output_dir)
 
 if __name__ == "__main__":
-    generate_data()
+    main()
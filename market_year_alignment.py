@@ -0,0 +1,209 @@
+"""
+Convert PSD marketing-year series to calendar years (and back) for many countries at once.
+
+PSD balances are reported per local marketing year, while WITS imports and the model's
+scenario deltas are calendar years. For most countries "2024/25" starts in the country's
+start month of 2024; southern-hemisphere crops are labelled by the season they are planted
+in, so their year starts in the second label year (Argentina's "2022/23" runs Apr 2023 -
+Mar 2024). label_year_offset (0 or 1) gives the calendar year of the start month relative
+to the first label year. A marketing year is spread over its 12 months with per-country
+month weights (uniform by default), so with MY[Y] the marketing year starting in Y,
+calendar year Y collects
+
+    calendar[Y] = w_same * MY[Y] + (1 - w_same) * MY[Y-1]
+
+where w_same is the weight of the marketing-year months that fall in its first calendar
+year. The reverse direction uses the same monthly profile:
+
+    MY[Y] = w_same * calendar[Y] + (1 - w_same) * calendar[Y+1]
+
+Both are applied to a wide (series x year) matrix in one NumPy operation, so every
+country, metric, commodity and year is converted together. A year whose result needs a
+missing neighbour year with non-zero weight is dropped (not partially filled).
+
+Configuration (MARKETING_YEARS, keyed by ISO3; unlisted countries use DEFAULT_START_MONTH
+with uniform weights and no label offset):
+    {"USA": {"start_month": 9, "month_weights": [12 shares, first = start month]},
+     "ARG": {"start_month": 4, "label_year_offset": 1}, ...}
+"""
+
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# USDA trade year (Oct/Sep) for countries without a local marketing year below
+DEFAULT_START_MONTH = 10
+
+# Local marketing years for soybeans (USDA PSD); month_weights default to uniform.
+# label_year_offset 1: "2023/24" starts in 2024 (southern-hemisphere crop years)
+MARKETING_YEARS: Dict[str, Dict[str, object]] = {
+    "USA": {"start_month": 9},   # Sep/Aug
+    "BRA": {"start_month": 2, "label_year_offset": 1},   # Feb/Jan
+    "ARG": {"start_month": 4, "label_year_offset": 1},   # Apr/Mar
+    "PRY": {"start_month": 3, "label_year_offset": 1},   # Mar/Feb
+    "CAN": {"start_month": 9},   # Sep/Aug
+    "CHN": {"start_month": 10},  # Oct/Sep
+}
+
+
+def parse_market_year(values: pd.Series) -> pd.Series:
+    """Marketing-year label ("2024/25", "Sep 2025/26") or first label year -> first label year (Int64)."""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype("Int64")
+    start = values.astype(str).str.extract(r"(\d{4})/\d{2}", expand=False)
+    start = start.fillna(values.astype(str).str.extract(r"^(\d{4})$", expand=False))
+    return pd.to_numeric(start, errors="coerce").astype("Int64")
+
+
+def format_market_year(start_years: pd.Series) -> pd.Series:
+    """First label year -> "2024/25" label."""
+    start = start_years.astype(int)
+    return start.astype(str) + "/" + ((start + 1) % 100).astype(str).str.zfill(2)
+
+
+def month_weights(
+    countries: Sequence[object],
+    config: Optional[Mapping[str, Mapping[str, object]]] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per-row marketing-year start month (n,) and normalized month weights (n, 12),
+    weights ordered from the start month. Each distinct country is resolved once.
+    """
+    config = MARKETING_YEARS if config is None else config
+    codes, uniques = pd.factorize(pd.Series(list(countries), dtype=object), use_na_sentinel=False)
+
+    starts = np.empty(len(uniques), dtype=int)
+    weights = np.empty((len(uniques), 12), dtype=float)
+    for i, country in enumerate(uniques):
+        spec = config.get(country, {}) if isinstance(country, str) else {}
+        start = int(spec.get("start_month", DEFAULT_START_MONTH))
+        w = np.asarray(spec.get("month_weights", np.ones(12)), dtype=float)
+        if not 1 <= start <= 12:
+            raise ValueError(f"Marketing year for {country}: start_month must be 1-12, got {start}")
+        if w.shape != (12,) or (w < 0).any() or w.sum() <= 0:
+            raise ValueError(f"Marketing year for {country}: month_weights must be 12 non-negative shares")
+        starts[i] = start
+        weights[i] = w / w.sum()
+    return starts[codes], weights[codes]
+
+
+def label_year_offsets(
+    countries: Sequence[object],
+    config: Optional[Mapping[str, Mapping[str, object]]] = None,
+) -> np.ndarray:
+    """
+    Per-row calendar year of the marketing-year start minus the first label year (0 or 1).
+    """
+    config = MARKETING_YEARS if config is None else config
+    codes, uniques = pd.factorize(pd.Series(list(countries), dtype=object), use_na_sentinel=False)
+
+    offsets = np.zeros(len(uniques), dtype=int)
+    for i, country in enumerate(uniques):
+        spec = config.get(country, {}) if isinstance(country, str) else {}
+        offset = int(spec.get("label_year_offset", 0))
+        if offset not in (0, 1):
+            raise ValueError(f"Marketing year for {country}: label_year_offset must be 0 or 1, got {offset}")
+        offsets[i] = offset
+    return offsets[codes]
+
+
+def same_year_share(starts: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Weight of the marketing-year months that fall in the calendar year it starts in."""
+    in_first_year = np.arange(12)[None, :] < (13 - starts)[:, None]
+    return (weights * in_first_year).sum(axis=1)
+
+
+def _blend(values: np.ndarray, own: np.ndarray, offset: int) -> np.ndarray:
+    """out[:, t] = own * values[:, t] + (1 - own) * values[:, t + offset]."""
+    neighbour = np.full_like(values, np.nan)
+    if offset < 0:
+        neighbour[:, 1:] = values[:, :-1]
+    else:
+        neighbour[:, :-1] = values[:, 1:]
+    own = own[:, None]
+    other = 1.0 - own
+    # A zero weight must not pull in NaN from a missing year
+    return np.where(own > 0, own * values, 0.0) + np.where(other > 0, other * neighbour, 0.0)
+
+
+def _shift(values: np.ndarray, shifts: np.ndarray) -> np.ndarray:
+    """out[i, t] = values[i, t - shifts[i]] (NaN outside the year span)."""
+    source = np.arange(values.shape[1])[None, :] - shifts[:, None]
+    inside = (source >= 0) & (source < values.shape[1])
+    rows = np.arange(values.shape[0])[:, None]
+    return np.where(inside, values[rows, np.clip(source, 0, values.shape[1] - 1)], np.nan)
+
+
+def _align(
+    frame: pd.DataFrame,
+    keys: List[str],
+    years: pd.Series,
+    value_col: str,
+    country_col: str,
+    config: Optional[Mapping[str, Mapping[str, object]]],
+    offset: int,
+    out_year: str,
+) -> pd.DataFrame:
+    if country_col not in keys:
+        raise ValueError(f"keys must include the country column '{country_col}'")
+    data = frame[keys].copy()
+    data["_year"] = years
+    data[value_col] = pd.to_numeric(frame[value_col], errors="coerce")
+    data = data.dropna(subset=["_year"])
+    if data.duplicated([*keys, "_year"]).any():
+        raise ValueError(f"Duplicate ({', '.join(keys)}) rows within a year; keep one release per year first")
+
+    wide = data.set_index([*keys, "_year"])[value_col].unstack("_year")
+    countries = wide.index.get_level_values(country_col) if len(keys) > 1 else wide.index
+    starts, weights = month_weights(countries, config)
+    label_offsets = label_year_offsets(countries, config)
+
+    # Label years and start years differ by up to one year: pad the span on that side
+    pad = int(label_offsets.max()) if label_offsets.size else 0
+    low, high = int(wide.columns.min()), int(wide.columns.max())
+    span = np.arange(low - pad if offset > 0 else low, high + pad + 1 if offset < 0 else high + 1)
+    values = wide.reindex(columns=span).to_numpy(dtype=float)
+
+    if offset < 0:
+        # Label years -> start years, then spread over calendar years
+        aligned = _blend(_shift(values, label_offsets), same_year_share(starts, weights), offset)
+    else:
+        # Calendar years -> marketing years by start year, then back to label years
+        aligned = _shift(_blend(values, same_year_share(starts, weights), offset), -label_offsets)
+
+    out = pd.DataFrame(aligned, index=wide.index, columns=pd.Index(span, name=out_year))
+    return out.stack().dropna().rename(value_col).reset_index()
+
+
+def to_calendar_year(
+    frame: pd.DataFrame,
+    keys: List[str],
+    value_col: str = "value",
+    country_col: str = "country_iso3",
+    config: Optional[Mapping[str, Mapping[str, object]]] = None,
+) -> pd.DataFrame:
+    """
+    Marketing-year series (column "market_year": "2024/25" labels or start years) ->
+    calendar-year series. keys identify one series (must include country_col); returns
+    keys + calendar_year + value_col.
+    """
+    years = parse_market_year(frame["market_year"])
+    return _align(frame, keys, years, value_col, country_col, config, offset=-1, out_year="calendar_year")
+
+
+def to_market_year(
+    frame: pd.DataFrame,
+    keys: List[str],
+    value_col: str = "value",
+    country_col: str = "country_iso3",
+    config: Optional[Mapping[str, Mapping[str, object]]] = None,
+) -> pd.DataFrame:
+    """
+    Calendar-year series (column "calendar_year") -> marketing-year series; returns
+    keys + market_year ("2024/25" labels) + value_col.
+    """
+    years = frame["calendar_year"].astype("Int64")
+    out = _align(frame, keys, years, value_col, country_col, config, offset=1, out_year="market_year")
+    out["market_year"] = format_market_year(out["market_year"])
+    return out
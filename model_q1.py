@@ -1,7 +1,14 @@
+import sys
 import pandas as pd
 import numpy as np
 from pathlib import Path
 
+# wash/ modules import telemetry as a top-level module; use the same module object
+WASH_DIR = Path(__file__).resolve().parent / "wash"
+if str(WASH_DIR) not in sys.path:
+    sys.path.insert(0, str(WASH_DIR))
+from telemetry import instrument
+
 # Configuration
 BASE_DIR = Path(__file__).resolve().parent
 OUTPUT_DIR = BASE_DIR / "output" / "prediction_results"
@@ -16,6 +23,7 @@ def load_china_soy_imports(path):
     df = df[df["exporter"].isin(EXPORTERS)].copy()
     return df
 
+@instrument()
 def calibrate_ces_for_china(china_df, base_year, sigma, eta, transport_cost=None):
     if transport_cost is None:
         transport_cost = {e: 0.0 for e in EXPORTERS}
@@ -78,6 +86,7 @@ def calibrate_ces_for_china(china_df, base_year, sigma, eta, transport_cost=None
     }
     return params
 
+@instrument()
 def simulate_scenario_for_china(params, scenario):
     sigma = params["sigma"]
     eta = params["eta"]
@@ -342,5 +351,25 @@ def main():
     print(f"Sensitivity analysis saved to {OUTPUT_DIR / 'sensitivity_analysis_eta.csv'}")
     print(df_eta.to_string(float_format="%.4f"))
 
+    # 6. Joint Sensitivity Grid (Sigma x Eta), drawn as a heatmap
+    print("\nRunning joint sensitivity grid over Sigma x Eta...")
+    grid_sigmas = np.linspace(2.0, 8.0, 13)
+    grid_etas = np.linspace(0.15, 1.0, 18)
+    grid_records = []
+    for s in grid_sigmas:
+        for e in grid_etas:
+            p = calibrate_ces_for_china(china_imports, BASE_YEAR, s, e, transport_costs)
+            res = simulate_scenario_for_china(p, base_scenario)
+            us = res[res["exporter"] == "US"].iloc[0]
+            grid_records.append({
+                "sigma": s,
+                "eta": e,
+                "us_pct_change_q": us["pct_change_q"],
+                "us_share_new": us["share_new"]
+            })
+    df_grid = pd.DataFrame(grid_records)
+    df_grid.to_csv(OUTPUT_DIR / "sensitivity_analysis_grid.csv", index=False)
+    print(f"Sensitivity grid ({len(df_grid)} runs) saved to {OUTPUT_DIR / 'sensitivity_analysis_grid.csv'}")
+
 if __name__ == "__main__":
     main()
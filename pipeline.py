@@ -0,0 +1,204 @@
+"""
+Run the Q1 workflow as a dependency graph, re-executing only stages whose inputs changed.
+
+Stages (STAGES) replace the manual README sequence
+process_external_data.py -> model_q1.py -> process_psd_soy.py -> visualization.py:
+
+    ingest       external_data/wits/*.xlsx, tariff_schedule.csv -> china_soy_imports.csv
+    model        china_soy_imports.csv                           -> scenario / sensitivity results
+    psd_balance  external_data/psd/Table_07_Soybea.csv           -> psd_soy_balance.csv
+    psd_impact   PSD table + scenario results                    -> industry_impact_*.csv
+    plot         cleaned imports + model results                 -> output/images/*.png
+
+Each stage declares its code files, input files (globs) and output files. Just before a
+stage would run, its fingerprint is taken: SHA-256 over the code and input file contents.
+If the fingerprint matches the one recorded in output/_pipeline_manifest.json and all
+outputs exist, the stage is skipped. Because fingerprints are taken after upstream stages
+finish, a stage re-runs only when an upstream stage actually changed its output files.
+Independent stages (psd_balance alongside ingest/model) run in parallel through
+wash/stage_graph.py.
+
+Usage:
+    python pipeline.py [--targets STAGE ...] [--force] [--executor process|thread|serial] [--workers N]
+"""
+
+import argparse
+import glob
+import hashlib
+import importlib
+import json
+import sys
+import time
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# wash/ modules import stage_graph as a top-level module; use the same module object
+WASH_DIR = Path(__file__).resolve().parent / "wash"
+if str(WASH_DIR) not in sys.path:
+    sys.path.insert(0, str(WASH_DIR))
+from stage_graph import STAGE_EXECUTORS, Stage, print_stage_timings, run_stage_graph, select_stages
+
+BASE_DIR = Path(__file__).resolve().parent
+MANIFEST_PATH = BASE_DIR / "output" / "_pipeline_manifest.json"
+
+CLEANED = "output/external_cleaned"
+RESULTS = "output/prediction_results"
+
+# call = (module, function, positional args); paths relative to BASE_DIR, inputs may be globs
+STAGES: Dict[str, dict] = {
+    "ingest": {
+        "call": ("process_external_data", "main", ([],)),
+        "code": ["process_external_data.py", "wash/country_names.py"],
+        "inputs": ["external_data/wits/*.xlsx", "external_data/wits/tariff_schedule.csv"],
+        "outputs": [f"{CLEANED}/china_soy_imports.csv"],
+        "deps": (),
+    },
+    "model": {
+        "call": ("model_q1", "main", ()),
+        "code": ["model_q1.py", "wash/telemetry.py"],
+        "inputs": [f"{CLEANED}/china_soy_imports.csv"],
+        "outputs": [
+            f"{RESULTS}/prediction_results_scenario1.csv",
+            f"{RESULTS}/prediction_results_scenario2.csv",
+            f"{RESULTS}/sensitivity_analysis_sigma.csv",
+            f"{RESULTS}/sensitivity_analysis_eta.csv",
+            f"{RESULTS}/sensitivity_analysis_grid.csv",
+            f"{RESULTS}/vulnerability_report.txt",
+        ],
+        "deps": ("ingest",),
+    },
+    "psd_balance": {
+        "call": ("process_psd_soy", "write_psd_balance", ()),
+        "code": ["process_psd_soy.py", "process_psd_tables.py", "wash/country_names.py"],
+        "inputs": ["external_data/psd/Table_07_Soybea.csv"],
+        "outputs": [f"{CLEANED}/psd_soy_balance.csv"],
+        "deps": (),
+    },
+    "psd_impact": {
+        "call": ("process_psd_soy", "write_impact_tables", ()),
+        "code": ["process_psd_soy.py", "process_psd_tables.py", "market_year_alignment.py", "wash/country_names.py"],
+        "inputs": ["external_data/psd/Table_07_Soybea.csv", f"{RESULTS}/prediction_results_scenario*.csv"],
+        "outputs": [
+            f"{RESULTS}/industry_impact_psd_by_year.csv",
+            f"{RESULTS}/industry_impact_psd_export_basis.csv",
+        ],
+        "deps": ("model",),
+    },
+    "plot": {
+        "call": ("visualization", "main", ([],)),
+        "code": ["visualization.py", "wash/telemetry.py"],
+        "inputs": [f"{CLEANED}/china_soy_imports.csv", f"{RESULTS}/prediction_results_scenario*.csv",
+                   f"{RESULTS}/sensitivity_analysis_*.csv"],
+        "outputs": [
+            "output/images/1_historical_quantity_trend.png",
+            "output/images/2_historical_share_trend.png",
+            "output/images/3a_volume_impact.png",
+            "output/images/3b_volume_impact.png",
+            "output/images/4_share_comparison_pie.png",
+            "output/images/5_sensitivity_sigma.png",
+            "output/images/6_sensitivity_eta.png",
+            "output/images/7_sensitivity_grid_heatmap.png",
+        ],
+        "deps": ("ingest", "model"),
+    },
+}
+
+
+def _expand(patterns: List[str]) -> List[Path]:
+    paths = set()
+    for pattern in patterns:
+        matches = glob.glob(str(BASE_DIR / pattern))
+        # A pattern that matches nothing still counts, as a missing file
+        paths.update(Path(m) for m in matches or [BASE_DIR / pattern])
+    return sorted(paths)
+
+
+def stage_fingerprint(name: str) -> str:
+    """SHA-256 over the stage's code and input files (name + content; missing files marked)."""
+    spec = STAGES[name]
+    h = hashlib.sha256(name.encode("utf-8"))
+    for path in _expand(spec["code"]) + _expand(spec["inputs"]):
+        h.update(str(path.relative_to(BASE_DIR)).encode("utf-8"))
+        if path.exists():
+            with open(path, "rb") as fh:
+                for block in iter(lambda: fh.read(1 << 20), b""):
+                    h.update(block)
+        else:
+            h.update(b"<missing>")
+    return h.hexdigest()
+
+
+def run_stage(name: str, previous: Optional[str], force: bool, *upstream: object) -> Tuple[str, str, float]:
+    """
+    Stage worker: fingerprint the inputs now (upstream stages have finished), then skip or run.
+    Returns (status, fingerprint, seconds).
+    """
+    spec = STAGES[name]
+    fingerprint = stage_fingerprint(name)
+    outputs = [BASE_DIR / p for p in spec["outputs"]]
+    if not force and fingerprint == previous and all(p.exists() for p in outputs):
+        return "skipped", fingerprint, 0.0
+
+    module_name, func_name, args = spec["call"]
+    start = time.perf_counter()
+    getattr(importlib.import_module(module_name), func_name)(*args)
+    elapsed = time.perf_counter() - start
+
+    missing = [str(p.relative_to(BASE_DIR)) for p in outputs if not p.exists()]
+    if missing:
+        raise RuntimeError(f"Stage '{name}' finished without writing {missing}")
+    return "ran", fingerprint, elapsed
+
+
+def load_manifest() -> Dict[str, str]:
+    if MANIFEST_PATH.exists():
+        return json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    return {}
+
+
+def run_pipeline(
+    targets: Optional[List[str]] = None,
+    force: bool = False,
+    executor: str = "process",
+    workers: Optional[int] = None,
+) -> Dict[str, Tuple[str, str, float]]:
+    """Run the targets (default: every stage) and their upstream stages; returns name -> result."""
+    manifest = load_manifest()
+    stages = [
+        Stage(name, partial(run_stage, name, manifest.get(name), force), deps=spec["deps"])
+        for name, spec in STAGES.items()
+    ]
+    if targets:
+        stages = select_stages(stages, targets)
+
+    # A failing stage raises RuntimeError and nothing is recorded, so the next run retries it
+    results, timings = run_stage_graph(stages, max_workers=workers, executor=executor)
+    for name, (_, fingerprint, _) in results.items():
+        manifest[name] = fingerprint
+    MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+
+    print_stage_timings(timings)
+    for name, (status, _, seconds) in results.items():
+        print(f"[Pipeline] {name}: {status}" + (f" ({seconds:.2f}s)" if status == "ran" else ""))
+    return results
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the Q1 stages, skipping those whose inputs are unchanged")
+    parser.add_argument("--targets", nargs="+", choices=list(STAGES), metavar="STAGE",
+                        help=f"Only run these stages and their upstream stages ({', '.join(STAGES)})")
+    parser.add_argument("--force", action="store_true", help="Run every selected stage regardless of fingerprints")
+    parser.add_argument("--executor", choices=STAGE_EXECUTORS, default="process", help="How stages run in parallel")
+    parser.add_argument("--workers", type=int, default=None, help="Pool size for parallel stages")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    run_pipeline(args.targets, force=args.force, executor=args.executor, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,76 +1,395 @@
-import pandas as pd
+"""
+Ingest the WITS "By-HS6Product" workbooks into an all-partner, all-product panel.
+
+Inputs:
+    external_data/wits/*.xlsx                 (WITS downloads, sheet "By-HS6Product")
+    external_data/wits/tariff_schedule.csv    (China's applied tariff by year / partner / HS6)
+
+Outputs:
+    output/external_cleaned/wits_panel.parquet/year=YYYY/part-0.parquet
+        every reporter x partner x HS6 row, one partition per year
+        (part-0.csv partitions instead when pyarrow is not installed)
+    output/external_cleaned/wits_panel.parquet/_manifest.json
+        source file -> SHA-256, tariff schedule hash and the years it owns
+    output/external_cleaned/wits_ingest_report.json
+        per-file status (cached / parsed / retariffed / failed / removed), rows, timing and errors
+    output/external_cleaned/china_soy_imports.csv
+        model_q1 input: year, exporter, quantity_tons, value_usd, p_fob, tariff_china
+        for US / Brazil / Argentina soybeans
+
+Workbooks whose SHA-256 matches the manifest are not re-parsed; only new or changed
+files are read (in a process pool) and only their year partitions are rewritten, so a
+new year's download is appended without touching existing partitions. A changed tariff
+schedule re-prices the cached partitions without re-reading any Excel file.
+Failures are recorded per file in the report instead of stopping the run.
+
+Tariff schedule rows may leave year, partner_iso3 or hs6 blank to mean "any".
+Each panel row takes the rate of the most specific matching rule
+(more filled keys first; on ties hs6 beats partner_iso3 beats year).
+
+Usage:
+    python process_external_data.py [--workers N] [--force]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# wash/ modules import country_names as a top-level module; use the same module object
+WASH_DIR = Path(__file__).resolve().parent / "wash"
+if str(WASH_DIR) not in sys.path:
+    sys.path.insert(0, str(WASH_DIR))
+from country_names import map_iso3_to_labels, normalize_country_series
+
+# Optional dependency: partitioned Parquet output
+try:
+    import pyarrow  # type: ignore  # noqa: F401
+except ImportError:  # pragma: no cover - safe fallback
+    pyarrow = None  # type: ignore
 
 # Paths (relative to repo root)
 BASE_DIR = Path(__file__).resolve().parent
 # WITS data stored under external_data/wits
 DATA_DIR = BASE_DIR / "external_data" / "wits"
+TARIFF_SCHEDULE_FILE = DATA_DIR / "tariff_schedule.csv"
 OUTPUT_DIR = BASE_DIR / "output" / "external_cleaned"
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 OUTPUT_FILE = OUTPUT_DIR / "china_soy_imports.csv"
+PANEL_DIR = OUTPUT_DIR / "wits_panel.parquet"
+MANIFEST_FILE = PANEL_DIR / "_manifest.json"
+REPORT_FILE = OUTPUT_DIR / "wits_ingest_report.json"
+
+WITS_SHEET = "By-HS6Product"
+# WITS aggregate rows that are not trading partners
+WITS_AGGREGATE_PARTNERS = {"World"}
 
+SOYBEAN_HS6 = "120100"
+
+# Partner ISO3 -> standard exporter names (WITS spellings resolved via wash/country_names.py)
 TARGET_PARTNERS = {
-    "United States": "US",
-    "Brazil": "Brazil",
-    "Argentina": "Argentina"
+    "USA": "US",
+    "BRA": "Brazil",
+    "ARG": "Argentina"
 }
 
-def process_data():
-    files = list(DATA_DIR.glob("*.xlsx"))
-    all_data = []
+TARIFF_KEYS = ("year", "partner_iso3", "hs6")
+
+PANEL_COLUMNS = [
+    "year", "reporter", "flow", "hs6", "product", "partner", "partner_iso3",
+    "value_usd", "quantity", "quantity_unit", "quantity_tons", "p_fob", "tariff_china",
+]
+
+
+def read_wits_workbook(path: Path) -> pd.DataFrame:
+    """
+    Read one WITS workbook into the tidy panel layout (all partners and products).
+    partner_iso3 and tariffs are added afterwards in the main process.
+    """
+    df = pd.read_excel(path, sheet_name=WITS_SHEET)
+    df = df[~df["Partner"].astype(str).str.strip().isin(WITS_AGGREGATE_PARTNERS)]
+
+    out = pd.DataFrame({
+        "year": df["Year"].astype(int),
+        "reporter": df["Reporter"].astype(str).str.strip(),
+        "flow": df["TradeFlow"].astype(str).str.strip(),
+        "hs6": df["ProductCode"].astype(str).str.replace(r"\.0$", "", regex=True).str.strip().str.zfill(6),
+        "product": df["Product Description"],
+        "partner": df["Partner"].astype(str).str.strip(),
+        # Trade Value 1000USD -> value_usd
+        "value_usd": df["Trade Value 1000USD"] * 1000,
+        "quantity": df["Quantity"],
+        "quantity_unit": df["Quantity Unit"],
+    })
+    # Quantity (Kg) -> tons; other units have no tonnage
+    out["quantity_tons"] = np.where(out["quantity_unit"] == "Kg", out["quantity"] / 1000, np.nan)
+    # FOB price (USD/ton)
+    out["p_fob"] = out["value_usd"] / out["quantity_tons"]
+    return out.reset_index(drop=True)
+
 
+def load_tariff_schedule(path: Path = TARIFF_SCHEDULE_FILE) -> pd.DataFrame:
+    """Load the (year, partner_iso3, hs6) tariff schedule; blank keys mean "any"."""
+    schedule = pd.read_csv(path, dtype={"partner_iso3": str, "hs6": str})
+    schedule["year"] = pd.to_numeric(schedule["year"], errors="coerce").astype("Int64")
+    schedule["hs6"] = schedule["hs6"].str.strip().str.zfill(6)
+    schedule["partner_iso3"] = schedule["partner_iso3"].str.strip()
+    duplicated = schedule.duplicated(subset=list(TARIFF_KEYS), keep=False)
+    if duplicated.any():
+        raise ValueError(f"Duplicate tariff schedule rules:\n{schedule[duplicated]}")
+    return schedule
+
+
+def _rule_patterns(schedule: pd.DataFrame) -> List[Tuple[str, ...]]:
+    """Key combinations used by the schedule, most specific first."""
+    filled = schedule[list(TARIFF_KEYS)].notna()
+    patterns = {tuple(k for k, f in zip(TARIFF_KEYS, row) if f) for row in filled.itertuples(index=False)}
+    return sorted(patterns, key=lambda keys: (-len(keys), [-TARIFF_KEYS.index(k) for k in keys]))
+
+
+def attach_tariffs(panel: pd.DataFrame, schedule: pd.DataFrame) -> pd.Series:
+    """
+    Look up each panel row's tariff with one vectorized join per rule pattern
+    (most specific pattern first, later patterns only fill what is still missing).
+    """
+    tariff = np.full(len(panel), np.nan)
+    filled = schedule[list(TARIFF_KEYS)].notna()
+    for keys in _rule_patterns(schedule):
+        rules = schedule[(filled[list(keys)].all(axis=1)) & (filled.sum(axis=1) == len(keys))]
+        if not keys:
+            rates = np.full(len(panel), float(rules["tariff_china"].iloc[0]))
+        else:
+            joined = panel[list(keys)].merge(rules[[*keys, "tariff_china"]], on=list(keys), how="left")
+            rates = joined["tariff_china"].to_numpy(dtype=float)
+        missing = np.isnan(tariff)
+        tariff[missing] = rates[missing]
+
+    if np.isnan(tariff).any():
+        print(f"Warning: {int(np.isnan(tariff).sum())} rows match no tariff schedule rule.")
+    return pd.Series(tariff, index=panel.index, name="tariff_china")
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def partition_path(year: int) -> Path:
+    suffix = "parquet" if pyarrow is not None else "csv"
+    return PANEL_DIR / f"year={int(year)}" / f"part-0.{suffix}"
+
+
+def write_year_partition(df: pd.DataFrame, year: int) -> Path:
+    """Replace one year's partition (the year itself is encoded in the directory name)."""
+    path = partition_path(year)
+    if path.parent.exists():
+        shutil.rmtree(path.parent)
+    path.parent.mkdir(parents=True)
+    part = df.drop(columns=["year"])
+    if pyarrow is not None:
+        part.to_parquet(path, index=False)
+    else:
+        part.to_csv(path, index=False)
+    return path
+
+
+def drop_year_partition(year: int) -> None:
+    year_dir = PANEL_DIR / f"year={int(year)}"
+    if year_dir.exists():
+        shutil.rmtree(year_dir)
+
+
+def read_year_partition(year: int) -> pd.DataFrame:
+    path = partition_path(year)
+    if path.suffix == ".parquet":
+        part = pd.read_parquet(path)
+    else:
+        part = pd.read_csv(path, dtype={"hs6": str, "partner_iso3": str})
+    part.insert(0, "year", int(year))
+    return part[PANEL_COLUMNS]
+
+
+def read_wits_panel(years: Optional[List[int]] = None) -> pd.DataFrame:
+    """Read the partitioned WITS panel (optionally only some years)."""
+    available = sorted(
+        int(p.name.split("=", 1)[1]) for p in PANEL_DIR.glob("year=*") if partition_path(int(p.name.split("=", 1)[1])).exists()
+    )
+    wanted = [y for y in available if years is None or y in years]
+    if not wanted:
+        return pd.DataFrame(columns=PANEL_COLUMNS)
+    return pd.concat([read_year_partition(y) for y in wanted], ignore_index=True)
+
+
+def load_manifest() -> Dict[str, object]:
+    if MANIFEST_FILE.exists():
+        return json.loads(MANIFEST_FILE.read_text(encoding="utf-8"))
+    return {"schedule_sha256": None, "files": {}}
+
+
+def save_manifest(manifest: Dict[str, object]) -> None:
+    PANEL_DIR.mkdir(parents=True, exist_ok=True)
+    MANIFEST_FILE.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+
+
+def _timed_read(path: Path) -> Tuple[pd.DataFrame, float]:
+    # Process-pool worker: parse one workbook
+    start = time.time()
+    df = read_wits_workbook(path)
+    return df, time.time() - start
+
+
+def _error(stage: str, exc: BaseException) -> Dict[str, str]:
+    return {"stage": stage, "type": type(exc).__name__, "message": str(exc)}
+
+
+def _price(df: pd.DataFrame, schedule: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    df["tariff_china"] = attach_tariffs(df, schedule)
+    return df[PANEL_COLUMNS]
+
+
+def build_china_soy_imports(panel: pd.DataFrame) -> pd.DataFrame:
+    """China's soybean imports from the model exporters, in the model_q1 input layout."""
+    soy = panel[
+        (panel["reporter"] == "China")
+        & (panel["flow"] == "Import")
+        & (panel["hs6"] == SOYBEAN_HS6)
+        & panel["partner_iso3"].isin(list(TARGET_PARTNERS))
+    ].copy()
+    soy["exporter"] = map_iso3_to_labels(soy["partner_iso3"], TARGET_PARTNERS)
+    soy = soy[["year", "exporter", "quantity_tons", "value_usd", "p_fob", "tariff_china"]]
+    return soy.sort_values(by=["year", "exporter"])
+
+
+def process_data(workers: Optional[int] = None, force: bool = False) -> Dict[str, object]:
+    """
+    Incrementally rebuild the WITS panel and the soybean model input; returns the ingest report.
+    """
+    files = sorted(DATA_DIR.glob("*.xlsx"))
+    schedule = load_tariff_schedule()
+    schedule_sha = file_sha256(TARIFF_SCHEDULE_FILE)
+    manifest = load_manifest()
+    cached_files: Dict[str, Dict[str, object]] = manifest["files"]  # type: ignore[assignment]
+    schedule_changed = manifest.get("schedule_sha256") != schedule_sha
+    entries: Dict[str, Dict[str, object]] = {}
+
+    # 1. Classify every workbook by content hash
+    to_parse: Dict[str, Tuple[Path, str]] = {}
     for f in files:
-        print(f"Processing {f.name}...")
+        entry: Dict[str, object] = {"file": f.name, "status": None, "years": [], "rows": 0, "seconds": 0.0, "error": None}
+        entries[f.name] = entry
         try:
-            # Read the specific sheet
-            df = pd.read_excel(f, sheet_name="By-HS6Product")
-            
-            # Filter for target partners
-            df = df[df["Partner"].isin(TARGET_PARTNERS.keys())].copy()
-            
-            # Rename partner to standard exporter names
-            df["exporter"] = df["Partner"].map(TARGET_PARTNERS)
-            
-            # Rename and transform columns
-            # Trade Value 1000USD -> value_usd (multiply by 1000)
-            df["value_usd"] = df["Trade Value 1000USD"] * 1000
-            
-            # Quantity (Kg) -> quantity_tons (divide by 1000)
-            df["quantity_tons"] = df["Quantity"] / 1000
-            
-            # Calculate FOB Price (USD/Ton)
-            df["p_fob"] = df["value_usd"] / df["quantity_tons"]
-            
-            # Assign Tariff
-            # US: 28% (approximate effective rate including retaliatory)
-            # Brazil/Argentina: 3% (MFN)
-            def get_tariff(exporter):
-                if exporter == "US":
-                    # Use MFN 3% + recent 10% surcharge (per official notices), pre-scenario
-                    return 0.13
-                else:
-                    return 0.03
-            
-            df["tariff_china"] = df["exporter"].apply(get_tariff)
-            
-            # Select final columns
-            final_df = df[["Year", "exporter", "quantity_tons", "value_usd", "p_fob", "tariff_china"]].rename(columns={"Year": "year"})
-            
-            all_data.append(final_df)
-            
+            sha = file_sha256(f)
+        except OSError as e:
+            entry.update(status="failed", error=_error("hash", e))
+            continue
+        entry["sha256"] = sha
+        known = cached_files.get(f.name)
+        intact = known is not None and all(partition_path(y).exists() for y in known["years"])
+        if not force and intact and known["sha256"] == sha:
+            entry.update(status="cached", years=known["years"], rows=known["rows"])
+        else:
+            to_parse[f.name] = (f, sha)
+
+    # 2. Parse new / changed workbooks in parallel
+    parsed: Dict[str, pd.DataFrame] = {}
+    if to_parse:
+        n_workers = workers or min(len(to_parse), os.cpu_count() or 1)
+        print(f"Parsing {len(to_parse)} WITS workbook(s) with {n_workers} worker(s)...")
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            futures = {name: pool.submit(_timed_read, path) for name, (path, _) in to_parse.items()}
+            for name, future in futures.items():
+                try:
+                    parsed[name], entries[name]["seconds"] = future.result()
+                except Exception as e:
+                    entries[name].update(status="failed", error=_error("read", e))
+
+    # 3. Resolve partner ISO3 once for all new rows (keeps the shared country cache single-writer)
+    if parsed:
+        names = list(parsed)
+        stacked = pd.concat([parsed[n] for n in names], keys=names, names=["file", None])
+        stacked["partner_iso3"] = normalize_country_series(stacked["partner"]).astype(object)
+        parsed = {n: stacked.loc[n].reset_index(drop=True) for n in names}
+
+    # 4. Drop partitions of workbooks that are gone, before any ownership check, so a
+    #    renamed workbook takes over its years in the same run
+    for name in sorted(set(cached_files) - set(entries)):
+        meta = cached_files.pop(name)
+        for year in meta["years"]:
+            drop_year_partition(year)
+        entries[name] = {"file": name, "status": "removed", "years": meta["years"], "rows": 0, "seconds": 0.0, "error": None}
+
+    # 5. Write the year partitions owned by each parsed workbook
+    owner = {int(y): name for name, meta in cached_files.items() for y in meta["years"]}
+    for name, df in parsed.items():
+        entry = entries[name]
+        years = sorted(int(y) for y in df["year"].unique())
+        clash = {y: owner[y] for y in years if owner.get(y) not in (None, name)}
+        if clash:
+            entry.update(status="failed", error={
+                "stage": "partition", "type": "YearConflict",
+                "message": f"years already provided by other files: {clash}",
+            })
+            continue
+        try:
+            priced = _price(df, schedule)
+            for year, part in priced.groupby("year", sort=True):
+                write_year_partition(part, int(year))
         except Exception as e:
-            print(f"Error processing {f.name}: {e}")
-
-    if all_data:
-        combined_df = pd.concat(all_data, ignore_index=True)
-        combined_df = combined_df.sort_values(by=["year", "exporter"])
-        
-        # Save to CSV
-        combined_df.to_csv(OUTPUT_FILE, index=False)
-        print(f"\nSuccessfully saved processed data to {OUTPUT_FILE}")
-        print(combined_df)
-    else:
+            entry.update(status="failed", error=_error("write", e))
+            continue
+        for stale in set(cached_files.get(name, {}).get("years", [])) - set(years):
+            drop_year_partition(stale)
+            owner.pop(int(stale), None)
+        owner.update({y: name for y in years})
+        cached_files[name] = {"sha256": to_parse[name][1], "years": years, "rows": len(priced)}
+        entry.update(status="parsed", years=years, rows=len(priced))
+
+    # 6. A new tariff schedule only re-prices cached partitions
+    if schedule_changed:
+        for entry in entries.values():
+            if entry["status"] != "cached":
+                continue
+            try:
+                for year in entry["years"]:
+                    write_year_partition(_price(read_year_partition(year), schedule), year)
+                entry["status"] = "retariffed"
+            except Exception as e:
+                entry.update(status="failed", error=_error("tariff", e))
+
+    manifest = {"schedule_sha256": schedule_sha, "files": cached_files}
+    save_manifest(manifest)
+
+    report: Dict[str, object] = {
+        "finished": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "panel": str(PANEL_DIR),
+        "files": list(entries.values()),
+        "failed": sum(1 for e in entries.values() if e["status"] == "failed"),
+    }
+    REPORT_FILE.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    for e in entries.values():
+        detail = f"{e['error']['stage']}: {e['error']['type']}: {e['error']['message']}" if e["error"] else f"{e['rows']} rows"
+        print(f"  {e['file']:<36} {e['status']:<10} years={e['years']} {detail}")
+    print(f"Ingest report written to {REPORT_FILE} ({report['failed']} failed)")
+
+    panel = read_wits_panel()
+    if panel.empty:
         print("No data processed.")
+        return report
+    print(f"WITS panel: {len(panel)} rows, {panel['partner'].nunique()} partners, "
+          f"{panel['hs6'].nunique()} HS6 products in {PANEL_DIR}")
+
+    combined_df = build_china_soy_imports(panel)
+    combined_df.to_csv(OUTPUT_FILE, index=False)
+    print(f"\nSuccessfully saved processed data to {OUTPUT_FILE}")
+    print(combined_df)
+    return report
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Incremental WITS By-HS6Product ingest")
+    parser.add_argument("--workers", type=int, default=None, help="Process-pool size for parsing workbooks")
+    parser.add_argument("--force", action="store_true", help="Re-parse every workbook, ignoring the cache")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, object]:
+    args = parse_args(argv)
+    return process_data(workers=args.workers, force=args.force)
+
 
 if __name__ == "__main__":
-    process_data()
+    main()
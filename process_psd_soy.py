@@ -1,116 +1,172 @@
 """
-Clean USDA PSD soybeans world balance table and build a simple industry-impact
+Clean USDA PSD soybeans world balance table and build an industry-impact
 summary by comparing model scenario results with PSD exports.
 
 Inputs:
     external_data/psd/Table_07_Soybea.csv  (PSD table, as downloaded)
-    output/prediction_results/prediction_results_scenario1.csv  (model output)
+    output/prediction_results/prediction_results_scenario*.csv  (model output)
 
 Outputs:
     output/external_cleaned/psd_soy_balance.csv  (long tidy table: metric, country, year, value)
+    output/prediction_results/industry_impact_psd_by_year.csv
+        scenario, exporter, basis ("market_year" / "calendar_year"), year, psd_export,
+        delta_q, delta_q_thousand_tons, delta_q_pct_of_psd_export
+        (every scenario x every PSD year; calendar years via market_year_alignment.py)
     output/prediction_results/industry_impact_psd_export_basis.csv
-        country, psd_export_2024_25, delta_q (scenario1), delta_q_pct_of_psd_export
+        exporter, psd_export_2024_25, delta_q (scenario1), delta_q_pct_of_psd_export
 """
 
-import io
+import sys
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 import pandas as pd
 
+from market_year_alignment import parse_market_year, to_calendar_year
+from process_psd_tables import keep_latest_release, parse_psd_csv
+# wash/ modules import country_names as a top-level module; use the same module object
+WASH_DIR = Path(__file__).resolve().parent / "wash"
+if str(WASH_DIR) not in sys.path:
+    sys.path.insert(0, str(WASH_DIR))
+from country_names import map_iso3_to_labels, normalize_country_series
+
 BASE_DIR = Path(__file__).resolve().parent
 PSD_PATH = BASE_DIR / "external_data" / "psd" / "Table_07_Soybea.csv"
+RESULTS_DIR = BASE_DIR / "output" / "prediction_results"
 OUTPUT_CLEAN = BASE_DIR / "output" / "external_cleaned" / "psd_soy_balance.csv"
-OUTPUT_IMPACT = BASE_DIR / "output" / "prediction_results" / "industry_impact_psd_export_basis.csv"
+OUTPUT_IMPACT_BY_YEAR = RESULTS_DIR / "industry_impact_psd_by_year.csv"
+OUTPUT_IMPACT = RESULTS_DIR / "industry_impact_psd_export_basis.csv"
 
-# Mapping PSD country names to model exporter codes
+# Mapping PSD countries (by ISO3, resolved via wash/country_names.py) to model exporter codes
 COUNTRY_MAP = {
-    "United States": "US",
-    "Brazil": "Brazil",
-    "Argentina": "Argentina",
-    "China": "China",
+    "USA": "US",
+    "BRA": "Brazil",
+    "ARG": "Argentina",
+    "CHN": "China",
 }
 
 
 def parse_psd_table(path: Path) -> pd.DataFrame:
-    """Parse the PSD CSV (Table 07) into a tidy long table."""
-    raw_lines = path.read_text(encoding="utf-8").splitlines()
-    # Skip possible header lines until we see a line starting with comma-separated years
-    # In this file, the year header is at line index 2.
-    content = "\n".join(raw_lines[2:])
-    df = pd.read_csv(io.StringIO(content), skip_blank_lines=True)
-    if df.empty:
-        raise ValueError("PSD file appears empty after parsing.")
-
-    # First column holds labels
-    first_col = df.columns[0]
-    df = df.rename(columns={first_col: "label"})
-
-    metrics = {"Production", "Imports", "Exports", "Crush", "Ending Stocks"}
-    current_metric: List[str] = []
-    m = None
-    for lbl in df["label"]:
-        if isinstance(lbl, str) and lbl.strip() in metrics:
-            m = lbl.strip()
-            current_metric.append(m)
-        else:
-            current_metric.append(m)
-    df["metric"] = current_metric
-
-    # Drop rows that are metric headers, unit rows ("nr"), totals (we can keep totals if needed)
-    drop_labels = list(metrics) + ["nr", None, float("nan")]
-    df = df[~df["label"].isin(drop_labels)].copy()
-    df = df.dropna(subset=["metric"])
-
-    # Melt years to long format
-    id_vars = ["metric", "label"]
-    value_vars = [c for c in df.columns if c not in id_vars]
-    long_df = df.melt(id_vars=id_vars, value_vars=value_vars, var_name="year", value_name="value")
-    long_df = long_df.dropna(subset=["value"])
-    long_df["value"] = pd.to_numeric(long_df["value"], errors="coerce")
-    long_df = long_df.dropna(subset=["value"])
-    long_df = long_df.rename(columns={"label": "country"})
-    long_df["country"] = long_df["country"].astype(str).str.strip()
-    long_df["year"] = long_df["year"].astype(str).str.strip()
-    return long_df
-
-
-def build_impact_vs_psd_exports(psd_long: pd.DataFrame, scenario_csv: Path, psd_year: str = "2024/25") -> pd.DataFrame:
-    """Compare model scenario delta_q with PSD exports (specified year).
+    """Parse one PSD table into a tidy long table: metric, country, year, value.
 
-    Note: PSD exports are in thousand tons; model delta_q is in tons.
-    We convert delta_q to thousand tons before computing the ratio.
+    Layout detection is shared with process_psd_tables.parse_psd_csv; projection
+    columns keep their release label in year (e.g. "Sep 2025/26").
     """
-    exports = (
-        psd_long[(psd_long["metric"] == "Exports") & (psd_long["year"] == psd_year)].copy()
-    )
-    exports["exporter"] = exports["country"].map(COUNTRY_MAP)
+    return tidy_psd_table(parse_psd_csv(path))
+
+
+def tidy_psd_table(cells: pd.DataFrame) -> pd.DataFrame:
+    """parse_psd_csv output -> metric, country, year, value in file order."""
+    cells = cells.sort_values(["column", "row"], kind="stable")
+    release = cells["release"].fillna("")
+    year = (release + " " + cells["market_year"]).str.strip()
+    return pd.DataFrame({
+        "metric": cells["metric"].to_numpy(),
+        "country": cells["country"].to_numpy(),
+        "year": year.to_numpy(),
+        "value": cells["value"].to_numpy(dtype=float),
+    })
+
+
+def psd_exports_by_year(cells: pd.DataFrame) -> pd.DataFrame:
+    """Model exporters' PSD exports on both year bases.
+
+    Returns exporter, basis, year, psd_export (thousand tons). basis "market_year" keeps
+    the marketing-year start year (latest release per year); "calendar_year" spreads
+    each marketing year over its months (see market_year_alignment.py).
+    """
+    exports = keep_latest_release(cells[cells["metric"] == "Exports"], ["country", "market_year"])
+    exports = exports.sort_values("row", kind="stable")
+    exports["country_iso3"] = normalize_country_series(exports["country"]).astype(object)
+    exports["exporter"] = map_iso3_to_labels(exports["country_iso3"], COUNTRY_MAP)
     exports = exports.dropna(subset=["exporter"])
-    exports = exports[["exporter", "value"]].rename(columns={"value": "psd_export_2024_25"})
 
-    scen = pd.read_csv(scenario_csv)
-    scen = scen[["exporter", "delta_q"]].copy()
+    market = exports.assign(basis="market_year", year=parse_market_year(exports["market_year"]))
+    calendar = to_calendar_year(exports, keys=["exporter", "country_iso3"]).rename(columns={"calendar_year": "year"})
+    calendar["basis"] = "calendar_year"
+    columns = ["exporter", "basis", "year", "value"]
+    by_year = pd.concat([market[columns], calendar[columns]], ignore_index=True)
+    # Keep the PSD table's exporter order within each year
+    rank = {name: i for i, name in enumerate(exports["exporter"].unique())}
+    by_year = by_year.sort_values(
+        ["basis", "year", "exporter"], key=lambda col: col.map(rank) if col.name == "exporter" else col,
+        kind="stable", ignore_index=True,
+    )
+    return by_year.rename(columns={"value": "psd_export"})
+
+
+def load_scenario_deltas(paths: List[Path]) -> pd.DataFrame:
+    """scenario, exporter, delta_q for every scenario result file (scenario = file suffix)."""
+    frames = [
+        pd.read_csv(path, usecols=["exporter", "delta_q"]).assign(
+            scenario=path.stem.replace("prediction_results_", "")
+        )
+        for path in paths
+    ]
+    return pd.concat(frames, ignore_index=True)[["scenario", "exporter", "delta_q"]]
+
+
+def build_impact_vs_psd_exports(cells: pd.DataFrame, scenario_csvs: List[Path]) -> pd.DataFrame:
+    """Compare model delta_q with PSD exports for every scenario, year basis and year.
+
+    One merge pairs each scenario delta with every PSD year of the same exporter.
+    Note: PSD exports are in thousand tons; model delta_q is in tons.
+    We convert delta_q to thousand tons before computing the ratio.
+    """
+    scen = load_scenario_deltas(scenario_csvs)
     scen["delta_q_thousand_tons"] = scen["delta_q"] / 1_000.0
 
-    merged = exports.merge(scen, on="exporter", how="left")
-    merged["delta_q_pct_of_psd_export"] = merged["delta_q_thousand_tons"] / merged["psd_export_2024_25"]
-    return merged
+    merged = psd_exports_by_year(cells).merge(scen, on="exporter", how="inner", sort=False)
+    merged["delta_q_pct_of_psd_export"] = merged["delta_q_thousand_tons"] / merged["psd_export"]
+    order = ["scenario", "exporter", "basis", "year", "psd_export", "delta_q", "delta_q_thousand_tons",
+             "delta_q_pct_of_psd_export"]
+    return merged[order].sort_values("scenario", kind="stable").reset_index(drop=True)
+
+
+def export_basis_table(impact: pd.DataFrame, scenario: str = "scenario1", psd_year: str = "2024/25") -> pd.DataFrame:
+    """One scenario against one marketing year, in the industry_impact_psd_export_basis.csv layout."""
+    start = int(psd_year[:4])
+    rows = impact[
+        (impact["scenario"] == scenario) & (impact["basis"] == "market_year") & (impact["year"] == start)
+    ]
+    label = "psd_export_" + psd_year.replace("/", "_")
+    return rows[["exporter", "psd_export", "delta_q", "delta_q_thousand_tons", "delta_q_pct_of_psd_export"]].rename(
+        columns={"psd_export": label}
+    )
 
 
-def main() -> None:
-    psd_long = parse_psd_table(PSD_PATH)
+def write_psd_balance(cells: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """Clean the PSD table into psd_soy_balance.csv (needs no model output)."""
+    cells = parse_psd_csv(PSD_PATH) if cells is None else cells
+    psd_long = tidy_psd_table(cells)
     OUTPUT_CLEAN.parent.mkdir(parents=True, exist_ok=True)
     psd_long.to_csv(OUTPUT_CLEAN, index=False)
     print(f"Saved cleaned PSD long table to {OUTPUT_CLEAN}")
+    return psd_long
+
+
+def write_impact_tables(cells: Optional[pd.DataFrame] = None) -> Optional[pd.DataFrame]:
+    """Join the model's scenario results with PSD exports (runs after model_q1.py)."""
+    scenario_paths = sorted(RESULTS_DIR.glob("prediction_results_scenario*.csv"))
+    if not scenario_paths:
+        print("Scenario results not found; skipping impact comparison.")
+        return None
+    cells = parse_psd_csv(PSD_PATH) if cells is None else cells
+    impact = build_impact_vs_psd_exports(cells, scenario_paths)
+    impact.to_csv(OUTPUT_IMPACT_BY_YEAR, index=False)
+    print(f"Saved PSD export comparison for {len(scenario_paths)} scenario(s) to {OUTPUT_IMPACT_BY_YEAR}")
+    basis = export_basis_table(impact)
+    if not basis.empty:
+        basis.to_csv(OUTPUT_IMPACT, index=False)
+        print(f"Saved scenario1 vs PSD 2024/25 exports to {OUTPUT_IMPACT}")
+    print(impact)
+    return impact
 
-    scenario1_path = BASE_DIR / "output" / "prediction_results" / "prediction_results_scenario1.csv"
-    if scenario1_path.exists():
-        impact = build_impact_vs_psd_exports(psd_long, scenario1_path, psd_year="2024/25")
-        impact.to_csv(OUTPUT_IMPACT, index=False)
-        print(f"Saved PSD export comparison to {OUTPUT_IMPACT}")
-        print(impact)
-    else:
-        print("Scenario 1 results not found; skipping impact comparison.")
+
+def main() -> None:
+    cells = parse_psd_csv(PSD_PATH)
+    write_psd_balance(cells)
+    write_impact_tables(cells)
 
 
 if __name__ == "__main__":
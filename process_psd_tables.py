@@ -0,0 +1,173 @@
+"""
+Parse every USDA PSD "World Supply and Distribution" table into one tidy store.
+
+Inputs:
+    external_data/psd/*.csv   (PSD tables as downloaded: soybeans, meal, oil, corn, wheat, ...)
+
+Outputs:
+    output/external_cleaned/psd_store.parquet   (psd_store.csv when pyarrow is not installed)
+        commodity, metric, country, market_year, release, country_iso3, value
+        one row per (commodity, metric, country, market_year); load it with
+        load_psd_store(), which returns it indexed by those four keys
+
+Table layout is detected from the cells, not from fixed line numbers:
+    - the year header is the first row whose value cells look like market years
+      ("2023/24", or "Sep 2025/26" for a monthly projection release)
+    - the commodity comes from the title line above it ("Table 07: Soybeans: ...")
+    - metric blocks start at rows with a label and no values ("Production,") and are
+      forward-filled down to the next block; unit rows ("nr,nr,...") are dropped
+When a market year appears in several releases (e.g. Sep and Nov projections) the store
+keeps the rightmost (latest) one.
+
+Usage:
+    python process_psd_tables.py [--workers N]
+"""
+
+import argparse
+import csv
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+# wash/ modules import country_names as a top-level module; use the same module object
+WASH_DIR = Path(__file__).resolve().parent / "wash"
+if str(WASH_DIR) not in sys.path:
+    sys.path.insert(0, str(WASH_DIR))
+from country_names import normalize_country_series
+
+# Optional dependency: Parquet store
+try:
+    import pyarrow  # type: ignore  # noqa: F401
+except ImportError:  # pragma: no cover - safe fallback
+    pyarrow = None  # type: ignore
+
+BASE_DIR = Path(__file__).resolve().parent
+PSD_DIR = BASE_DIR / "external_data" / "psd"
+OUTPUT_DIR = BASE_DIR / "output" / "external_cleaned"
+STORE_PARQUET = OUTPUT_DIR / "psd_store.parquet"
+STORE_CSV = OUTPUT_DIR / "psd_store.csv"
+
+STORE_INDEX = ["commodity", "metric", "country", "market_year"]
+STORE_COLUMNS = [*STORE_INDEX, "release", "country_iso3", "value"]
+
+# "2023/24" or "Sep 2025/26" (projection release month + market year)
+MARKET_YEAR_PATTERN = r"^(?:(?P<release>[A-Za-z]{3}) )?(?P<market_year>\d{4}/\d{2})$"
+
+
+def _read_cells(path: Path) -> pd.DataFrame:
+    """Read a ragged PSD CSV into a string cell grid (one row per non-blank line)."""
+    with open(path, newline="", encoding="utf-8") as fh:
+        width = max((len(row) for row in csv.reader(fh, skipinitialspace=True)), default=0)
+    if width == 0:
+        raise ValueError(f"PSD file is empty: {path}")
+    # Country labels are indented, so quoted names (" \"Korea, South\"") need skipinitialspace
+    cells = pd.read_csv(
+        path, header=None, names=range(width), dtype=str,
+        skip_blank_lines=True, skipinitialspace=True, encoding="utf-8",
+    )
+    return cells.apply(lambda col: col.str.strip()).replace("", np.nan)
+
+
+def parse_psd_csv(path: Path) -> pd.DataFrame:
+    """
+    Parse one PSD table into a long frame:
+        commodity, metric, country, market_year, release, value, column, row
+    (column / row are the cell's position in the file, kept for stable ordering).
+    All releases are returned; build_psd_store keeps the latest per market year.
+    """
+    cells = _read_cells(path)
+    labels = cells[0]
+    values = cells.drop(columns=0)
+
+    # Year header: first row whose value cells are all market-year labels
+    year_like = values.apply(lambda col: col.str.match(MARKET_YEAR_PATTERN, na=False))
+    is_header = year_like.any(axis=1) & (year_like | values.isna()).all(axis=1)
+    if not is_header.any():
+        raise ValueError(f"No market-year header row found in {path}")
+    header_pos = int(np.flatnonzero(is_header.to_numpy())[0])
+    header = values.iloc[header_pos].str.extract(MARKET_YEAR_PATTERN)
+    year_cols = header.index[header["market_year"].notna()]
+
+    # Commodity from the title line ("Table 07: Soybeans: World Supply and Distribution")
+    titles = labels.iloc[:header_pos].dropna()
+    title_parts = titles.iloc[0].split(":") if not titles.empty else []
+    commodity = title_parts[1].strip() if len(title_parts) >= 2 else path.stem
+
+    body = cells.iloc[header_pos + 1:]
+    body_values = body[year_cols]
+    numeric = body_values.apply(pd.to_numeric, errors="coerce")
+    has_number = numeric.notna().any(axis=1)
+    is_metric = body[0].notna() & body_values.isna().all(axis=1)
+    metric = body[0].where(is_metric).ffill()
+
+    data = numeric[has_number & metric.notna()]
+    long_df = data.stack().rename("value").reset_index()
+    long_df.columns = ["row", "column", "value"]
+    long_df["commodity"] = commodity
+    long_df["metric"] = metric.loc[long_df["row"]].to_numpy()
+    long_df["country"] = body[0].loc[long_df["row"]].to_numpy()
+    long_df["market_year"] = header["market_year"].loc[long_df["column"]].to_numpy()
+    long_df["release"] = header["release"].loc[long_df["column"]].to_numpy()
+    return long_df[["commodity", "metric", "country", "market_year", "release", "value", "column", "row"]]
+
+
+def keep_latest_release(cells: pd.DataFrame, keys: List[str] = STORE_INDEX) -> pd.DataFrame:
+    """Keep the rightmost (latest release) column when a market year appears more than once."""
+    return cells.sort_values(["column"], kind="stable").drop_duplicates(keys, keep="last")
+
+
+def build_psd_store(paths: List[Path], workers: Optional[int] = None) -> pd.DataFrame:
+    """Parse all PSD tables in parallel and stack them into the tidy store."""
+    if not paths:
+        return pd.DataFrame(columns=STORE_COLUMNS)
+    n_workers = workers or min(len(paths), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        tables = list(pool.map(parse_psd_csv, paths))
+
+    store = pd.concat(tables, ignore_index=True)
+    store = keep_latest_release(store)
+    store["country_iso3"] = normalize_country_series(store["country"]).astype(object)
+    store = store.sort_values(STORE_INDEX, kind="stable").reset_index(drop=True)
+    return store[STORE_COLUMNS]
+
+
+def write_psd_store(store: pd.DataFrame) -> Path:
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    if pyarrow is not None:
+        store.set_index(STORE_INDEX).to_parquet(STORE_PARQUET)
+        return STORE_PARQUET
+    store.to_csv(STORE_CSV, index=False)
+    return STORE_CSV
+
+
+def load_psd_store() -> pd.DataFrame:
+    """Load the store indexed by (commodity, metric, country, market_year)."""
+    if STORE_PARQUET.exists():
+        return pd.read_parquet(STORE_PARQUET)
+    return pd.read_csv(STORE_CSV).set_index(STORE_INDEX)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Parse all PSD tables into one tidy store")
+    parser.add_argument("--workers", type=int, default=None, help="Process-pool size for parsing tables")
+    return parser.parse_args(argv)
+
+
+def main(workers: Optional[int] = None) -> None:
+    paths = sorted(PSD_DIR.glob("*.csv"))
+    store = build_psd_store(paths, workers=workers)
+    path = write_psd_store(store)
+    summary = store.groupby("commodity").agg(
+        metrics=("metric", "nunique"), countries=("country", "nunique"), rows=("value", "size")
+    )
+    print(f"Parsed {len(paths)} PSD table(s) into {path}")
+    print(summary)
+
+
+if __name__ == "__main__":
+    main(parse_args().workers)
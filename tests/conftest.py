@@ -0,0 +1,25 @@
+"""Put the repository root and wash/ on sys.path, as the scripts do at runtime."""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+for path in (ROOT, ROOT / "wash"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+# Tests must not append records to the repo's output/telemetry/telemetry.jsonl;
+# test_telemetry.py points the variable at a temporary file itself.
+os.environ.setdefault("APMCM_TELEMETRY", "off")
+
+
+@pytest.fixture(autouse=True)
+def no_country_cache(monkeypatch):
+    """Resolve country names in memory only instead of writing wash/output/country_iso3_map.csv."""
+    import country_names
+
+    for func in (country_names.resolve_country_names, country_names.normalize_country_series):
+        monkeypatch.setattr(func, "__defaults__", (None,))
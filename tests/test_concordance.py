@@ -0,0 +1,42 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from concordance import load_concordance
+
+
+def test_shipped_hs2017_hs2022_map_converts_listed_codes_only():
+    concordance = load_concordance()
+    codes = pd.Series(["854140", "851770", "120190", None, "851762"])
+
+    converted = concordance.convert_vintage(codes, "hs2017_hs2022")
+
+    assert converted.tolist() == [854149, 851779, 120190, -1, 851762]
+    assert concordance.vintages["hs2017_hs2022"].target.size == 10 ** 6
+
+
+def test_inline_codes_merge_several_sources_into_one_target(tmp_path):
+    path = tmp_path / "concordance.json"
+    path.write_text(
+        json.dumps({"sector_schemes": {}, "vintages": {"merge": {"level": "hs4", "codes": {"1201": "1299", "1202": "1299"}}}}),
+        encoding="utf-8",
+    )
+
+    vintage = load_concordance(path).vintages["merge"]
+
+    np.testing.assert_array_equal(vintage.convert(np.array([1201, 1202, 1203, 99999])), [1299, 1299, 1203, 99999])
+
+
+def test_splitting_a_source_code_is_rejected(tmp_path):
+    table = tmp_path / "split.csv"
+    table.write_text("old,new\n851770,851771\n851770,851779\n", encoding="utf-8")
+    path = tmp_path / "concordance.json"
+    path.write_text(
+        json.dumps({"vintages": {"split": {"level": "hs6", "csv": "split.csv", "source_col": "old", "target_col": "new"}}}),
+        encoding="utf-8",
+    )
+
+    with pytest.raises(ValueError, match="851770"):
+        load_concordance(path)
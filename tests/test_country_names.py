@@ -0,0 +1,30 @@
+import pandas as pd
+
+import country_names
+from country_names import normalize_country_series
+
+
+def test_all_missing_names_give_all_missing_iso3():
+    iso3 = normalize_country_series(pd.Series([None, None], dtype=object), cache_path=None)
+
+    assert isinstance(iso3.dtype, pd.CategoricalDtype)
+    assert iso3.isna().all()
+    assert len(iso3) == 2
+
+
+def test_missing_names_stay_missing_next_to_known_ones():
+    names = pd.Series([None, "China", "Brazil", None], dtype=object, index=[10, 11, 12, 13])
+
+    iso3 = normalize_country_series(names, cache_path=None)
+
+    assert iso3.index.tolist() == [10, 11, 12, 13]
+    assert iso3.astype(object).where(iso3.notna(), None).tolist() == [None, "CHN", "BRA", None]
+
+
+def test_root_scripts_share_the_wash_module():
+    import process_external_data
+    import process_psd_soy
+    import process_psd_tables
+
+    for module in (process_external_data, process_psd_soy, process_psd_tables):
+        assert module.normalize_country_series is country_names.normalize_country_series
@@ -0,0 +1,109 @@
+import datetime as dt
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from dataweb_reader import iter_dataweb_long_chunks, parse_period_label
+from datawash import build_trade_panel, read_dataweb_metric
+from join_index import PanelJoinIndex
+
+
+def write_dataweb(path, periods, rows):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "FAS Value"
+    ws.append(["Total Exports|Monthly Data"])
+    ws.append(["Data Row Count", len(rows)])
+    ws.append(["Data Type", "HTS Number", "Description", "Country", *periods])
+    for row in rows:
+        ws.append(row)
+    ws.append([None, None, "Total:"])
+    wb.save(path)
+
+
+@pytest.mark.parametrize(
+    "label, expected",
+    [
+        ("2024", (2024, 0)),
+        (2024, (2024, 0)),
+        ("2024-01", (2024, 1)),
+        ("2024/12", (2024, 12)),
+        ("Jan 2024", (2024, 1)),
+        ("September 2024", (2024, 9)),
+        (dt.datetime(2024, 3, 1), (2024, 3)),
+        ("2019", None),
+        ("2024-13", None),
+        ("Country", None),
+    ],
+)
+def test_parse_period_label(label, expected):
+    assert parse_period_label(label) == expected
+
+
+def test_monthly_sheet_keeps_full_codes(tmp_path):
+    path = tmp_path / "exports.xlsx"
+    write_dataweb(
+        path,
+        ["2024-01", "Feb 2024", dt.datetime(2024, 3, 1)],
+        [
+            ["FAS Value", "1201900000", "Soybeans", "China", 1, 2, 3],
+            ["FAS Value", "120110", "Soybeans, seed", "Brazil", 4, None, 6],
+        ],
+    )
+
+    long = next(iter_dataweb_long_chunks(path, "FAS Value", "export_fas", chunk_rows=10))
+
+    assert long["month"].tolist() == [1, 2, 3, 1, 2, 3]
+    assert long["year"].unique().tolist() == [2024]
+    assert long["hts_code"].unique().tolist() == ["1201900000", "120110"]
+    assert long["hs2"].unique().tolist() == ["12"]
+    assert long["value"].tolist() == [1, 2, 3, 4, 0, 6]
+
+
+def test_mixed_annual_and_monthly_columns_are_rejected(tmp_path):
+    path = tmp_path / "exports.xlsx"
+    write_dataweb(path, ["2024", "2024-01"], [["FAS Value", "12", "Oil seeds", "China", 1, 2]])
+
+    with pytest.raises(ValueError, match="mixes annual and monthly"):
+        next(iter_dataweb_long_chunks(path, "FAS Value", "export_fas"))
+
+
+def test_read_dataweb_metric_sums_months_into_years(tmp_path):
+    path = tmp_path / "exports.xlsx"
+    write_dataweb(
+        path,
+        ["Dec 2023", "Jan 2024", "Feb 2024"],
+        [["FAS Value", "1201900000", "Soybeans", "China", 5, 1, 2]],
+    )
+
+    long = read_dataweb_metric(path, "FAS Value", "export_fas")
+
+    assert "month" not in long.columns
+    assert long["year"].tolist() == [2023, 2024]
+    assert long["value"].tolist() == [5, 3]
+    assert long["hts_code"].astype(str).tolist() == ["1201900000", "1201900000"]
+    assert long["partner_iso3"].astype(str).tolist() == ["CHN", "CHN"]
+
+
+def test_trade_panel_sums_finer_codes_to_one_row_per_hs2_partner(tmp_path):
+    path = tmp_path / "exports.xlsx"
+    write_dataweb(
+        path,
+        ["2023", "2024"],
+        [
+            ["FAS Value", "0101", "Horses", "Canada", 1, 2],
+            ["FAS Value", "0102", "Cattle", "Canada", 10, 20],
+            ["FAS Value", "0102", "Cattle", "Mexico", 100, 200],
+        ],
+    )
+    long = read_dataweb_metric(path, "FAS Value", "export_fas")
+    tariff = pd.DataFrame({"year": [2023, 2024], "hs2": ["01", "01"], "rate": [0.1, 0.2]})
+
+    panel = build_trade_panel(PanelJoinIndex(tariff, level="hs2"), long, "export_fas", "exports")
+
+    assert not panel.duplicated(["year", "hs2", "partner_name"]).any()
+    canada = panel.loc[panel["partner_name"] == "Canada"].sort_values("year")
+    assert canada["export_fas"].tolist() == [11, 22]
+    assert canada["rate"].tolist() == [0.1, 0.2]
+    assert len(panel) == 4
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+
+from duty_simulator import UNKNOWN_PARTNER, DutySimulator, Scenario, TariffShock, chapter_elasticities
+
+
+def make_panel() -> pd.DataFrame:
+    return pd.DataFrame({
+        "year": [2024, 2024, 2024, 2024],
+        "hs2": ["85", "85", "85", "10"],
+        "partner_name": ["China", "Mexico", "Atlantis", "Freedonia"],
+        "partner_iso3": ["CHN", "MEX", np.nan, None],
+        "import_duty": [100.0, 50.0, 30.0, 20.0],
+        "mfn_adval_hs2_median": [0.05, 0.05, 0.05, 0.10],
+    })
+
+
+def test_unresolved_partners_are_grouped_as_unknown():
+    sim = DutySimulator(make_panel(), elasticities=chapter_elasticities(2.0))
+    scenarios = [Scenario("base", []), Scenario("tariff", [TariffShock("add", 0.25)])]
+    out = sim.summarize(scenarios, by=("partner_iso3",))
+
+    assert sorted(out["partner_iso3"].unique()) == ["CHN", "MEX", UNKNOWN_PARTNER]
+    unknown = out[(out["scenario"] == "base") & (out["partner_iso3"] == UNKNOWN_PARTNER)]
+    assert unknown["duty_base"].item() == 50.0
+    # Every row lands in some group: totals match the panel
+    for name, frame in out.groupby("scenario", observed=True):
+        assert np.isclose(frame["duty_base"].sum(), 200.0)
+    base = out[out["scenario"] == "base"]
+    assert np.allclose(base["duty_cf"], base["duty_base"])
+
+
+def test_shock_can_target_unknown_partner():
+    sim = DutySimulator(make_panel(), elasticities=chapter_elasticities(0.0))
+    shock = TariffShock("set", 0.0, partners=[UNKNOWN_PARTNER])
+    panel = sim.simulate_panel(Scenario("unk_free", [shock]))
+
+    assert panel["partner_iso3"].tolist() == ["CHN", "MEX", UNKNOWN_PARTNER, UNKNOWN_PARTNER]
+    assert panel["rate_cf"].tolist() == [0.05, 0.05, 0.0, 0.0]
+
+
+def model_panel() -> pd.DataFrame:
+    return pd.DataFrame({
+        "year": [2024, 2024, 2025, 2025, 2025, 2025],
+        "hs2": ["85", "10", "85", "10", "87", "87"],
+        "partner_name": ["China", "China", "China", "Mexico", "Mexico", "China"],
+        "partner_iso3": ["CHN", "CHN", "CHN", "MEX", "MEX", "CHN"],
+        "import_duty": [120.0, 40.0, 150.0, 30.0, 90.0, 60.0],
+        "imports": [1000.0, 500.0, 1200.0, 300.0, 2000.0, 800.0],
+        "mfn_adval_hs2_median": [0.05, 0.10, 0.05, 0.02, 0.025, 0.025],
+    })
+
+
+def expected(sim: DutySimulator, t1: np.ndarray):
+    """V1 = V0 * ((1 + t1) / (1 + t0)) ^ -eps,  R1 = R0 * V1 / V0 + (t1 - t0) * V1."""
+    t0, v0, r0 = sim.rate0, sim.value0, sim.duty0
+    v1 = v0 * ((1 + t1) / (1 + t0)) ** -sim.eps
+    return r0 * v1 / v0 + (t1 - t0) * v1, v1
+
+
+def make_sim(eps=None) -> DutySimulator:
+    eps = eps if eps is not None else chapter_elasticities(1.5, {85: 3.0, "87": 0.8})
+    return DutySimulator(model_panel(), elasticities=eps, value_col="imports")
+
+
+def test_counterfactual_follows_the_elasticity_model():
+    sim = make_sim()
+    assert sim.eps.tolist() == [3.0, 1.5, 3.0, 1.5, 0.8, 0.8]
+
+    panel = sim.simulate_panel(Scenario("chn_plus_25pp", [TariffShock("add", 0.25, partners=["CHN"])]))
+
+    t1 = sim.rate0 + np.where(sim.panel["partner_iso3"] == "CHN", 0.25, 0.0)
+    duty1, value1 = expected(sim, t1)
+    np.testing.assert_allclose(panel["rate_cf"], t1)
+    np.testing.assert_allclose(panel["imports_cf"], value1)
+    np.testing.assert_allclose(panel["duty_cf"], duty1)
+    # Untouched rows keep their baseline; shocked rows import less and pay more duty here
+    mex = (panel["partner_iso3"] == "MEX").to_numpy()
+    np.testing.assert_allclose(panel.loc[mex, "duty_cf"], panel.loc[mex, "duty_base"])
+    assert (panel.loc[~mex, "imports_cf"] < panel.loc[~mex, "imports_base"]).all()
+
+
+def test_set_and_scale_modes_with_sector_and_year_masks():
+    sim = make_sim()
+    rate0 = sim.rate0
+
+    # hs2 10 is agriculture, 85/87 are electrical_equipment / transport_equipment
+    scale = sim.scenario_rates([Scenario("ag_halved", [TariffShock("scale", 0.5, sectors=["agriculture"])])])[0]
+    np.testing.assert_allclose(scale, np.where(sim.hs2 == 10, rate0 * 0.5, rate0))
+
+    set_2025 = sim.scenario_rates([Scenario("autos_2025", [TariffShock("set", 0.25, chapters=[87], years=[2025])])])[0]
+    np.testing.assert_allclose(set_2025, np.where(sim.hs2 == 87, 0.25, rate0))
+
+    set_2024 = sim.scenario_rates([Scenario("autos_2024", [TariffShock("set", 0.25, chapters=[87], years=[2024])])])[0]
+    np.testing.assert_allclose(set_2024, rate0)
+
+    duty1, value1 = sim.counterfactual(set_2025[np.newaxis, :])
+    exp_duty, exp_value = expected(sim, set_2025)
+    np.testing.assert_allclose(duty1[0], exp_duty)
+    np.testing.assert_allclose(value1[0], exp_value)
+
+
+def test_shocks_in_a_scenario_apply_in_order():
+    sim = make_sim()
+    add_then_scale = Scenario("add_then_scale", [TariffShock("add", 0.10), TariffShock("scale", 2.0, partners=["CHN"])])
+    scale_then_add = Scenario("scale_then_add", [TariffShock("scale", 2.0, partners=["CHN"]), TariffShock("add", 0.10)])
+    set_then_add = Scenario("set_then_add", [TariffShock("set", 0.0, chapters=[85]), TariffShock("add", 0.05, chapters=[85])])
+
+    rates = sim.scenario_rates([add_then_scale, scale_then_add, set_then_add])
+
+    chn = (sim.panel["partner_iso3"] == "CHN").to_numpy()
+    np.testing.assert_allclose(rates[0], np.where(chn, (sim.rate0 + 0.10) * 2.0, sim.rate0 + 0.10))
+    np.testing.assert_allclose(rates[1], np.where(chn, sim.rate0 * 2.0, sim.rate0) + 0.10)
+    np.testing.assert_allclose(rates[2], np.where(sim.hs2 == 85, 0.05, sim.rate0))
+
+
+def test_batched_summary_matches_a_per_scenario_loop():
+    sim = make_sim()
+    scenarios = [
+        Scenario("baseline", []),
+        Scenario("chn_plus_10pp", [TariffShock("add", 0.10, partners=["CHN"])]),
+        Scenario("ch85_set", [TariffShock("set", 0.30, chapters=[85])]),
+        Scenario("ag_halved", [TariffShock("scale", 0.5, sectors=["agriculture"])]),
+        Scenario("mex_2025", [TariffShock("add", 0.25, partners=["MEX"], years=[2025])]),
+    ]
+    by = ("year", "hs2")
+
+    batched = sim.summarize(scenarios, by=by, batch_size=2)
+
+    for scenario in scenarios:
+        rows = sim.simulate_panel(scenario).groupby(list(by), sort=True)[["duty_base", "duty_cf", "imports_cf"]].sum()
+        got = batched[batched["scenario"] == scenario.name]
+        np.testing.assert_allclose(got["duty_base"], rows["duty_base"])
+        np.testing.assert_allclose(got["duty_cf"], rows["duty_cf"])
+        np.testing.assert_allclose(got["imports_cf"], rows["imports_cf"])
+        np.testing.assert_allclose(got["duty_change"], rows["duty_cf"] - rows["duty_base"])
+    assert batched["scenario"].astype(str).tolist() == [sc.name for sc in scenarios for _ in range(len(got))]
+    base = batched[batched["scenario"] == "baseline"]
+    np.testing.assert_allclose(base["duty_cf"], base["duty_base"])
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("scipy")
+
+from gravity import estimate_hs2_trade_elasticities
+
+TRUE_BETA = {1: -2.0, 27: -0.5, 85: -4.0}
+
+
+def make_trade_panel(seed: int = 0) -> pd.DataFrame:
+    """Exports whose expected value follows the PPML model exactly, with partner-year and pair effects."""
+    rng = np.random.default_rng(seed)
+    partners = [f"P{i:02d}" for i in range(12)]
+    years = list(range(2015, 2023))
+    idx = pd.MultiIndex.from_product([partners, years, sorted(TRUE_BETA)], names=["partner_iso3", "year", "hs2"])
+    panel = idx.to_frame(index=False)
+
+    partner_year = dict(zip(pd.MultiIndex.from_product([partners, years]), rng.normal(0, 1, len(partners) * len(years))))
+    pair = dict(zip(pd.MultiIndex.from_product([partners, sorted(TRUE_BETA)]), rng.normal(10, 1, len(partners) * len(TRUE_BETA))))
+    panel["partner_tariff"] = rng.uniform(0.0, 0.4, len(panel))
+    eta = (
+        panel["hs2"].map(TRUE_BETA) * np.log1p(panel["partner_tariff"])
+        + [partner_year[k] for k in zip(panel["partner_iso3"], panel["year"])]
+        + [pair[k] for k in zip(panel["partner_iso3"], panel["hs2"])]
+    )
+    panel["export_fas"] = np.exp(eta)
+    panel["hs2"] = panel["hs2"].map("{:02d}".format)
+    return panel
+
+
+def test_recovers_known_chapter_coefficients():
+    out = estimate_hs2_trade_elasticities(make_trade_panel(), "partner_tariff")
+
+    beta = dict(zip(out["hs2"].astype(int), out["beta"]))
+    for chapter, expected in TRUE_BETA.items():
+        assert beta[chapter] == pytest.approx(expected, abs=1e-4)
+    assert np.allclose(out["sigma"], 1.0 - out["beta"])
+    assert (out["n_obs"] == 12 * 8).all()
+
+
+def test_tariff_column_is_required():
+    with pytest.raises(TypeError):
+        estimate_hs2_trade_elasticities(make_trade_panel())
+
+
+def test_n_obs_counts_only_rows_kept_after_dropping_separated_groups():
+    panel = make_trade_panel()
+    # A partner that never exports chapter 85: its pair FE group is all zero and gets dropped
+    zero_pair = (panel["partner_iso3"] == "P00") & (panel["hs2"] == "85")
+    panel.loc[zero_pair, "export_fas"] = 0.0
+
+    out = estimate_hs2_trade_elasticities(panel, "partner_tariff")
+
+    n_obs = dict(zip(out["hs2"].astype(int), out["n_obs"]))
+    assert n_obs == {1: 12 * 8, 27: 12 * 8, 85: 11 * 8}
+    assert dict(zip(out["hs2"].astype(int), out["beta"]))[85] == pytest.approx(TRUE_BETA[85], abs=1e-4)
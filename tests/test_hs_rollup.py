@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from hs_rollup import build_hs_rollup, build_trade_weights, finest_trade_level
+
+
+def tariff_panel():
+    return pd.DataFrame(
+        {
+            "year": [2024, 2024, 2024, 2024],
+            "hts8": ["01011000", "01019000", "01021000", "bad"],
+            "rate": [0.1, 0.3, 0.5, 9.0],
+        }
+    )
+
+
+def test_unparseable_codes_are_dropped():
+    cube = build_hs_rollup(tariff_panel(), value_cols={"rate": "rate"}, levels=("hs2", "hs4"))
+
+    hs2 = cube["hs2"]
+    # The unparseable row used to land in (2023, "99")
+    assert hs2[["year", "hs2"]].values.tolist() == [[2024, "01"]]
+    np.testing.assert_allclose(hs2["rate_hs2"], [0.3])
+    assert cube["hs4"]["hs4"].tolist() == ["0101", "0102"]
+
+
+def test_sub_hs2_weights_from_full_dataweb_codes():
+    trade_long = pd.DataFrame(
+        {
+            "year": [2024, 2024, 2024],
+            "hs2": ["01", "01", "01"],
+            "hts_code": ["0101100000", "0101900000", "0102100000"],
+            "value": [1.0, 3.0, 0.0],
+        }
+    )
+    level = finest_trade_level(trade_long)
+    weights = build_trade_weights(trade_long, code_col=level)
+    assert level == "hts8"
+    assert weights["hts8"].tolist() == ["01011000", "01019000", "01021000"]
+
+    cube = build_hs_rollup(
+        tariff_panel(), value_cols={"rate": "rate"}, levels=("hs2", "hs6"), stats=("mean", "weighted"), trade_weights=weights
+    )
+
+    np.testing.assert_allclose(cube["hs2"]["rate_hs2_tw"], [(0.1 * 1 + 0.3 * 3) / 4])
+    assert "rate_hs6_tw" in cube["hs6"].columns
+
+
+def test_hs2_only_exports_give_no_weighted_columns():
+    trade_long = pd.DataFrame({"year": [2024], "hs2": ["01"], "hts_code": ["01"], "value": [5.0]})
+    weights = build_trade_weights(trade_long, code_col=finest_trade_level(trade_long))
+
+    cube = build_hs_rollup(
+        tariff_panel(), value_cols={"rate": "rate"}, levels=("hs2",), stats=("mean", "weighted"), trade_weights=weights
+    )
+
+    assert not [c for c in cube["hs2"].columns if c.endswith("_tw")]
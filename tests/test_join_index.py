@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import join_index
+from join_index import PanelJoinIndex
+
+
+def tariff_panel():
+    return pd.DataFrame(
+        {
+            "year": [2021, 2021, 2022, 2022, 2022],
+            "hs2": ["01", "02", "01", "xx", "99"],
+            "rate": [0.1, 0.2, 0.3, 9.0, 0.9],
+        }
+    )
+
+
+def trade_panel():
+    return pd.DataFrame(
+        {
+            "year": [2022, 2021, 2021, 2023, 2022],
+            "hs4": ["0101", "0201", "0301", "0101", "9999"],
+            "value": [1.0, 2.0, 3.0, 4.0, 5.0],
+        }
+    )
+
+
+@pytest.mark.parametrize("dense", [True, False])
+def test_attach_matches_left_merge(monkeypatch, dense):
+    if not dense:
+        monkeypatch.setattr(join_index, "DENSE_MAX_SLOTS", 0)
+    tariff = tariff_panel().iloc[[0, 1, 2, 4]]
+    trade = trade_panel()
+
+    out = PanelJoinIndex(tariff, level="hs2").attach(trade)
+
+    expected = trade.assign(hs2=trade["hs4"].str[:2]).merge(tariff, on=["year", "hs2"], how="left", validate="m:1")
+    np.testing.assert_allclose(out["rate"], expected["rate"])
+    assert (PanelJoinIndex(tariff, level="hs2").dense is None) is not dense
+
+
+def test_unparseable_right_codes_are_not_indexed():
+    # "xx" parses to -1; (2022, -1) used to land in the slot of (2021, "99")
+    index = PanelJoinIndex(tariff_panel(), level="hs2")
+    left = pd.DataFrame({"year": [2021, 2022, 2022], "hs2": ["99", "01", "99"]})
+
+    out = index.attach(left)
+
+    np.testing.assert_allclose(out["rate"], [np.nan, 0.3, 0.9])
+
+
+def test_overlapping_columns_are_rejected():
+    index = PanelJoinIndex(tariff_panel(), level="hs2")
+    left = trade_panel().assign(rate=1.0)
+
+    with pytest.raises(ValueError, match="rate"):
+        index.attach(left)
@@ -0,0 +1,31 @@
+import pandas as pd
+import pytest
+
+from market_year_alignment import to_calendar_year, to_market_year
+
+
+def market_year_frame(country: str, values: dict) -> pd.DataFrame:
+    return pd.DataFrame({"country_iso3": country, "market_year": list(values), "value": list(values.values())})
+
+
+def calendar(frame: pd.DataFrame) -> dict:
+    out = to_calendar_year(frame, keys=["country_iso3"])
+    return dict(zip(out["calendar_year"], out["value"]))
+
+
+def test_northern_label_starts_in_first_year():
+    # USA: Sep/Aug, "2024/25" = Sep 2024 - Aug 2025; 4 of 12 months fall in the start year
+    result = calendar(market_year_frame("USA", {"2023/24": 120.0, "2024/25": 240.0}))
+    assert result == {2024: pytest.approx(4 / 12 * 240 + 8 / 12 * 120)}
+
+
+def test_southern_label_starts_in_second_year():
+    # ARG: Apr/Mar, "2022/23" = Apr 2023 - Mar 2024; 9 of 12 months fall in the start year
+    result = calendar(market_year_frame("ARG", {"2022/23": 120.0, "2023/24": 240.0}))
+    assert result == {2024: pytest.approx(9 / 12 * 240 + 3 / 12 * 120)}
+
+
+def test_southern_calendar_to_market_year_label():
+    frame = pd.DataFrame({"country_iso3": "ARG", "calendar_year": [2023, 2024], "value": [100.0, 200.0]})
+    out = to_market_year(frame, keys=["country_iso3"])
+    assert dict(zip(out["market_year"], out["value"])) == {"2022/23": pytest.approx(9 / 12 * 100 + 3 / 12 * 200)}
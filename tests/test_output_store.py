@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from output_store import read_output_schema, read_parquet_output, write_parquet_output
+
+pytest.importorskip("pyarrow")
+
+
+def panel():
+    return pd.DataFrame(
+        {
+            "year": np.array([2021, 2021, 2022, 2022], dtype=np.int16),
+            "hs2": np.array([1, 12, 1, 12], dtype=np.int8),
+            # Stacked vintages: the same code read as text in one year and as a number in another
+            "rate_type_code": pd.Series(["0", "K", 7.0, None], dtype=object),
+            "indicator": pd.Categorical(["A", 1.0, "A", None]),
+            "partner_iso3": pd.Categorical(["CHN", "BRA", "CHN", "BRA"]),
+            "mfn_ad_val_rate": [0.05, 0.0, 0.1, np.nan],
+        }
+    )
+
+
+@pytest.mark.parametrize("partition_by_hs2", [False, True])
+def test_round_trip_with_mixed_object_columns(tmp_path, partition_by_hs2):
+    write_parquet_output(panel(), tmp_path, "tariff_yearly", partition_by_hs2=partition_by_hs2)
+
+    df = read_parquet_output(tmp_path, "tariff_yearly").sort_values(["year", "hs2"], ignore_index=True)
+
+    assert read_output_schema(tmp_path, "tariff_yearly")["partition_cols"] == ["year", "hs2"][: 1 + partition_by_hs2]
+    assert list(df.columns) == list(panel().columns)
+    assert df["year"].dtype == np.int16 and df["hs2"].dtype == np.int8
+    assert df["rate_type_code"].tolist()[:3] == ["0", "K", "7.0"]
+    assert df["rate_type_code"].isna().tolist() == [False, False, False, True]
+    assert isinstance(df["indicator"].dtype, pd.CategoricalDtype)
+    assert df["indicator"].astype(object).tolist()[:3] == ["A", "1.0", "A"]
+    assert df["partner_iso3"].tolist() == ["CHN", "BRA", "CHN", "BRA"]
+    np.testing.assert_array_equal(df["mfn_ad_val_rate"], panel()["mfn_ad_val_rate"])
+
+
+def test_filters_select_partitions(tmp_path):
+    write_parquet_output(panel(), tmp_path, "tariff_yearly", partition_by_hs2=True)
+
+    df = read_parquet_output(
+        tmp_path, "tariff_yearly", columns=["year", "hs2", "rate_type_code"], filters=[("year", "==", 2022), ("hs2", "==", 1)]
+    )
+
+    assert df.values.tolist() == [[2022, 1, "7.0"]]
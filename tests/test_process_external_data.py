@@ -0,0 +1,81 @@
+import json
+
+import pandas as pd
+import pytest
+
+import process_external_data as ped
+
+
+def write_workbook(path, year, us_value=1000.0):
+    rows = pd.DataFrame({
+        "Reporter": "China",
+        "TradeFlow": "Import",
+        "ProductCode": 120100,
+        "Product Description": "Soya beans",
+        "Year": year,
+        "Partner": ["World", "Brazil", "United States"],
+        "Trade Value 1000USD": [3000.0, 2000.0, us_value],
+        "Quantity": [6e6, 4e6, 2e6],
+        "Quantity Unit": "Kg",
+    })
+    rows.to_excel(path, sheet_name=ped.WITS_SHEET, index=False)
+
+
+@pytest.fixture
+def wits_dirs(tmp_path, monkeypatch):
+    data_dir = tmp_path / "wits"
+    out_dir = tmp_path / "cleaned"
+    data_dir.mkdir()
+    out_dir.mkdir()
+    panel_dir = out_dir / "wits_panel.parquet"
+    monkeypatch.setattr(ped, "DATA_DIR", data_dir)
+    monkeypatch.setattr(ped, "PANEL_DIR", panel_dir)
+    monkeypatch.setattr(ped, "MANIFEST_FILE", panel_dir / "_manifest.json")
+    monkeypatch.setattr(ped, "REPORT_FILE", out_dir / "wits_ingest_report.json")
+    monkeypatch.setattr(ped, "OUTPUT_FILE", out_dir / "china_soy_imports.csv")
+    return data_dir
+
+
+def run():
+    report = ped.process_data(workers=1)
+    status = {e["file"]: e["status"] for e in report["files"]}
+    return report, status, pd.read_csv(ped.OUTPUT_FILE)
+
+
+def test_renamed_workbook_keeps_its_year(wits_dirs):
+    write_workbook(wits_dirs / "WITS (2023).xlsx", 2023)
+    write_workbook(wits_dirs / "WITS (2024).xlsx", 2024)
+    run()
+
+    (wits_dirs / "WITS (2024).xlsx").rename(wits_dirs / "wits_2024.xlsx")
+    report, status, soy = run()
+
+    assert report["failed"] == 0
+    assert status == {"WITS (2023).xlsx": "cached", "wits_2024.xlsx": "parsed", "WITS (2024).xlsx": "removed"}
+    assert sorted(soy["year"].unique()) == [2023, 2024]
+    manifest = json.loads(ped.MANIFEST_FILE.read_text(encoding="utf-8"))
+    assert manifest["files"]["wits_2024.xlsx"]["years"] == [2024]
+
+
+def test_changed_workbook_is_reparsed(wits_dirs):
+    write_workbook(wits_dirs / "WITS (2024).xlsx", 2024, us_value=1000.0)
+    run()
+
+    write_workbook(wits_dirs / "WITS (2024).xlsx", 2024, us_value=1500.0)
+    report, status, soy = run()
+
+    assert status == {"WITS (2024).xlsx": "parsed"}
+    us = soy[soy["exporter"] == "US"]
+    assert us["value_usd"].tolist() == [1_500_000.0]
+
+
+def test_new_year_is_appended(wits_dirs):
+    write_workbook(wits_dirs / "WITS (2023).xlsx", 2023)
+    run()
+
+    write_workbook(wits_dirs / "WITS (2024).xlsx", 2024)
+    report, status, soy = run()
+
+    assert status == {"WITS (2023).xlsx": "cached", "WITS (2024).xlsx": "parsed"}
+    assert sorted(soy["year"].unique()) == [2023, 2024]
+    assert set(soy["exporter"]) == {"US", "Brazil"}
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from sqlite_store import list_store_tables, query_panel, query_store, write_sqlite_store
+
+
+def outputs():
+    return {
+        "tariff_hs6_panel": pd.DataFrame(
+            {"year": [2023, 2024], "hs6": np.array([10121, 120190], dtype=np.int32), "mfn_adval_hs6": [0.1, 0.0]}
+        ),
+        "trade_export_panel": pd.DataFrame(
+            {
+                "year": [2024, 2024],
+                "hs2": np.array([1, 12], dtype=np.int8),
+                "partner_iso3": pd.Categorical(["CHN", "BRA"]),
+                "export_fas": [5.0, 7.0],
+            }
+        ),
+        "duty_total_year": pd.DataFrame({"year": [2024], "duty_total": [3.0]}),
+    }
+
+
+def test_every_output_is_stored_with_padded_codes(tmp_path):
+    db = tmp_path / "panels.sqlite"
+    write_sqlite_store(outputs(), db)
+
+    assert list_store_tables(db) == ["duty_total_year", "tariff_hs6_panel", "trade_export_panel"]
+    assert query_store(db, "SELECT hs6 FROM tariff_hs6_panel ORDER BY year")["hs6"].tolist() == ["010121", "120190"]
+    types = query_store(db, "SELECT name, type FROM pragma_table_info('trade_export_panel')")
+    assert dict(zip(types["name"], types["type"]))["hs2"] == "TEXT"
+
+
+def test_query_panel_accepts_int_or_string_codes(tmp_path):
+    db = tmp_path / "panels.sqlite"
+    write_sqlite_store(outputs(), db)
+
+    for code in (1, "1", "01"):
+        rows = query_panel(db, "trade_export_panel", hs2=code)
+        assert rows[["hs2", "partner_iso3"]].values.tolist() == [["01", "CHN"]]
+    assert query_panel(db, "tariff_hs6_panel", year=2023, hs6="010121")["mfn_adval_hs6"].tolist() == [0.1]
@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from panel_schema import compact_panel, concat_compact_panels
+from tariff_changelog import TariffChangeLog, read_changelog, write_changelog
+
+
+def yearly_panel():
+    rows = [
+        # year, hts8, mfn_ad_val_rate, indicator
+        (2021, 1011000, 0.05, "A"),
+        (2021, 1019000, 0.10, "A"),
+        (2021, 2011000, 0.00, None),
+        (2022, 1011000, 0.05, "A"),
+        (2022, 1019000, 0.20, "B"),  # modified (two fields)
+        (2022, 3021100, 0.15, "A"),  # added; 2011000 removed
+        (2023, 1011000, np.nan, "A"),  # modified to missing
+        (2023, 1019000, 0.20, "B"),
+        (2023, 3021100, 0.15, "A"),
+        (2023, 2011000, 0.01, None),  # re-added
+    ]
+    df = pd.DataFrame(rows, columns=["year", "hts8", "mfn_ad_val_rate", "indicator"])
+    hts8 = df["hts8"].to_numpy(dtype=np.int64)
+    return pd.DataFrame(
+        {
+            "year": df["year"].astype(np.int16),
+            "hts8": hts8,
+            "hs2": (hts8 // 10 ** 6).astype(np.int8),
+            "hs4": (hts8 // 10 ** 4).astype(np.int16),
+            "hs6": (hts8 // 10 ** 2).astype(np.int32),
+            "mfn_ad_val_rate": df["mfn_ad_val_rate"],
+            "indicator": df["indicator"].astype("category"),
+        }
+    )
+
+
+def expected_year(panel, year, chapters=None):
+    out = panel[panel["year"] == year]
+    if chapters is not None:
+        out = out[out["hs2"].isin(chapters)]
+    return out.sort_values("hts8").reset_index(drop=True)
+
+
+@pytest.mark.parametrize("year", [2021, 2022, 2023])
+def test_snapshots_reproduce_the_annual_panel(year):
+    panel = yearly_panel()
+    log = TariffChangeLog.from_panel(panel)
+
+    pd.testing.assert_frame_equal(log.snapshot(year), expected_year(panel, year))
+    pd.testing.assert_frame_equal(log.snapshot(year, chapters=[1]), expected_year(panel, year, chapters=[1]))
+
+
+def test_diff_lists_net_changes():
+    log = TariffChangeLog.from_panel(yearly_panel())
+
+    diff = log.diff(2021, 2023)
+
+    assert diff["added"]["hts8"].tolist() == [3021100]
+    assert diff["removed"].empty  # 2011000 was removed in 2022 and re-added in 2023
+    assert diff["modified"][["hts8", "field"]].values.tolist() == [
+        [1011000, "mfn_ad_val_rate"],
+        [1019000, "indicator"],
+        [1019000, "mfn_ad_val_rate"],
+        [2011000, "mfn_ad_val_rate"],
+    ]
+    assert log.diff(2021, 2022, chapter=2)["removed"]["hts8"].tolist() == [2011000]
+
+
+def test_summary_counts_changes():
+    summary = TariffChangeLog.from_panel(yearly_panel()).summary()
+
+    assert summary[["year", "added", "removed", "modified_lines", "changed_cells"]].values.tolist() == [
+        [2021, 3, 0, 0, 0],
+        [2022, 1, 1, 1, 2],
+        [2023, 1, 0, 1, 1],
+    ]
+
+
+def test_parquet_round_trip(tmp_path):
+    pytest.importorskip("pyarrow")
+    panel = yearly_panel()
+    log = read_changelog(write_changelog(TariffChangeLog.from_panel(panel), tmp_path / "changelog"))
+
+    for year in (2021, 2022, 2023):
+        pd.testing.assert_frame_equal(log.snapshot(year), expected_year(panel, year), check_categorical=False)
+
+
+def vintage_panel():
+    """Three annual vintages compacted and stacked the way datawash builds tariff_yearly."""
+    vintages = [
+        (2021, ["01011000", "01019000", "02011000"], ["Horses", "Asses", "Beef"], pd.Series(["0", "K", "0"], dtype="str")),
+        (2022, ["01011000", "01019000", "03021100"], ["Horses", "Donkeys", "Trout"], [7.0, 0.0, 7.0]),
+        (2023, ["01011000", "01019000", "03021100", "04011000"], ["Horses", "Donkeys", "Trout", "Milk"],
+         pd.Series(["0", "N", "0", "K"], dtype="str")),
+    ]
+    frames = []
+    for year, codes, descriptions, rate_type in vintages:
+        frame = pd.DataFrame(
+            {
+                "year": year,
+                "hts8": codes,
+                "hs2": [c[:2] for c in codes],
+                "brief_description": descriptions,
+                "australia_rate_type_code": rate_type,
+                "mfn_ad_val_rate": np.linspace(0.0, 0.1, len(codes)) + (year - 2021) / 100,
+            }
+        )
+        frames.append(compact_panel(frame))
+    return concat_compact_panels(frames)
+
+
+def test_parquet_round_trip_with_fields_typed_differently_by_year(tmp_path):
+    pytest.importorskip("pyarrow")
+    panel = vintage_panel()
+    assert isinstance(panel["brief_description"].dtype, pd.CategoricalDtype)
+    assert panel["australia_rate_type_code"].dtype == object
+
+    log = read_changelog(write_changelog(TariffChangeLog.from_panel(panel), tmp_path / "changelog"))
+
+    for year in (2021, 2022, 2023):
+        snapshot = log.snapshot(year)
+        expected = panel[panel["year"] == year].reset_index(drop=True)
+        assert snapshot["hts8"].tolist() == expected["hts8"].tolist()
+        assert snapshot["brief_description"].astype(object).tolist() == expected["brief_description"].astype(object).tolist()
+        assert snapshot["australia_rate_type_code"].tolist() == expected["australia_rate_type_code"].astype(str).tolist()
+        np.testing.assert_allclose(snapshot["mfn_ad_val_rate"], expected["mfn_ad_val_rate"])
+    assert log.diff(2021, 2023)["modified"].query("field == 'australia_rate_type_code'")["value_b"].tolist() == ["N"]
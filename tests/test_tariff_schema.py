@@ -0,0 +1,68 @@
+import openpyxl
+import pandas as pd
+import pytest
+
+from tariff_schema import TariffColumn, load_tariff_schema
+
+
+def write_vintage(path, header, rows):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(header)
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+
+
+def test_full_read_keeps_registered_and_unregistered_columns(tmp_path):
+    path = tmp_path / "tariff.xlsx"
+    header = ["hts8", "mfn_ad_val_rate", "usmca_indicator", "usmca_ad_val_rate", "newfta_indicator", "newfta_ad_val_rate"]
+    write_vintage(path, header, [[1011000, 0.05, "S", 0, "N", 0.01], ["01012900", 0.1, None, None, None, None]])
+
+    df = load_tariff_schema().read_vintage(2099, path)
+
+    assert df["hts8"].tolist() == ["01011000", "01012900"]
+    # Every registered USITC column is present, including programs missing from this file
+    assert {"usmca_indicator", "korea_ad_val_rate", "footnote_comment"} <= set(df.columns)
+    assert df["korea_ad_val_rate"].isna().all()
+    assert df["usmca_indicator"].tolist()[0] == "S"
+    # Unregistered source columns pass through as text, without type inference
+    assert df["newfta_ad_val_rate"].dtype == "str"
+    assert df["newfta_ad_val_rate"].tolist()[0] == "0.01"
+    assert df["newfta_indicator"].tolist()[0] == "N"
+    assert list(df.columns[-2:]) == ["newfta_indicator", "newfta_ad_val_rate"]
+
+
+def test_selected_read_skips_other_columns(tmp_path):
+    path = tmp_path / "tariff.xlsx"
+    write_vintage(path, ["hts8", "mfn_ad_val_rate", "newfta_indicator"], [["01011000", 0.05, "N"]])
+
+    df = load_tariff_schema().read_vintage(2099, path, names=["mfn_ad_val_rate"])
+
+    assert list(df.columns) == ["hts8", "mfn_ad_val_rate"]
+    pd.testing.assert_series_equal(df["mfn_ad_val_rate"], pd.Series([0.05], name="mfn_ad_val_rate"))
+
+
+def test_columns_keep_one_dtype_across_numeric_and_text_vintages(tmp_path):
+    numeric = tmp_path / "numeric.xlsx"
+    text = tmp_path / "text.xlsx"
+    header = ["hts8", "australia_rate_type_code", "newfta_rate_type_code"]
+    write_vintage(numeric, header, [["01011000", 0, 7], ["01012900", 7, 0]])
+    write_vintage(text, header, [["01011000", "0", "K"], ["01012900", "N", None]])
+
+    registry = load_tariff_schema()
+    frames = [registry.read_vintage(2098, numeric), registry.read_vintage(2099, text)]
+
+    for col in ("australia_rate_type_code", "newfta_rate_type_code"):
+        assert [f[col].dtype for f in frames] == ["str", "str"]
+    stacked = pd.concat(frames, ignore_index=True)
+    assert stacked["australia_rate_type_code"].tolist() == ["0", "7", "0", "N"]
+    assert stacked["newfta_rate_type_code"].tolist()[:3] == ["7", "0", "K"]
+    assert stacked["newfta_rate_type_code"].isna().tolist() == [False, False, False, True]
+    # A vintage without the column gets an empty text column of the same type
+    assert registry.read_vintage(2099, numeric, names=["mexico_rate_type_code"])["mexico_rate_type_code"].dtype == "str"
+
+
+def test_registered_columns_reject_auto_dtype():
+    with pytest.raises(ValueError, match="explicit dtype"):
+        TariffColumn.from_config("australia_rate_type_code", {"dtype": "auto"})
@@ -0,0 +1,39 @@
+import threading
+
+import telemetry
+from telemetry import load_telemetry, stage_span
+
+
+def test_span_stacks_are_per_thread(tmp_path, monkeypatch):
+    path = tmp_path / "telemetry.jsonl"
+    monkeypatch.setenv(telemetry.TELEMETRY_ENV, str(path))
+    entered, release = threading.Event(), threading.Event()
+    seen = {}
+
+    def worker():
+        with stage_span("worker"):
+            seen["worker"] = list(telemetry._active_spans())
+            entered.set()
+            release.wait(5)
+        seen["worker_after"] = list(telemetry._active_spans())
+
+    with stage_span("main") as outer:
+        thread = threading.Thread(target=worker)
+        thread.start()
+        entered.wait(5)
+        # The worker's open span is not on this thread's stack
+        assert telemetry._active_spans() == [outer]
+        release.set()
+        thread.join()
+        assert telemetry._active_spans() == [outer]
+
+    assert [s.stage for s in seen["worker"]] == ["worker"]
+    assert seen["worker_after"] == []
+    assert telemetry._active_spans() == []
+    assert sorted(load_telemetry(path)["stage"]) == ["main", "worker"]
+
+
+def test_root_scripts_share_the_wash_module():
+    import model_q1
+
+    assert model_q1.instrument is telemetry.instrument
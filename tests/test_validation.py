@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from validation import ValidationRule, load_validation_rules, run_validation, write_validation_report
+
+
+def rule(kind, **params):
+    return ValidationRule(f"test_{kind}", "panel", kind, params)
+
+
+def flagged(rule_, df):
+    return np.flatnonzero(rule_.evaluate(df)).tolist()
+
+
+def test_default_rules_load():
+    rules = load_validation_rules()
+    names = {r.name for r in rules}
+    # The two checks that used to write check_bad_mfn_rates.csv / check_negative_duty.csv
+    assert {"mfn_ad_val_rate_range", "import_duty_non_negative"} <= names
+
+
+def test_range():
+    df = pd.DataFrame({"rate": [0.1, -0.1, 1.5, np.nan]})
+    assert flagged(rule("range", column="rate", min=0, max=1), df) == [1, 2]
+    assert flagged(rule("range", column="rate", min=0, allow_null=False), df) == [1, 3]
+
+
+def test_unique_flags_every_duplicate():
+    df = pd.DataFrame({"year": [2021, 2021, 2022], "hts8": ["01", "01", "01"]})
+    assert flagged(rule("unique", columns=["year", "hts8"]), df) == [0, 1]
+
+
+def test_interval_order_and_overlap():
+    df = pd.DataFrame(
+        {
+            "hts8": ["01", "01", "01", "02"],
+            "begin": pd.to_datetime(["2021-01-01", "2021-03-01", "2021-12-01", "2021-06-01"]),
+            "end": pd.to_datetime(["2021-06-30", "2021-04-30", "2021-11-30", "2021-05-01"]),
+        }
+    )
+    assert flagged(rule("interval_order", start="begin", end="end"), df) == [2, 3]
+    # Row 1 lies inside row 0; row 2 is disjoint and other keys are compared separately
+    assert flagged(rule("interval_overlap", keys=["hts8"], start="begin", end="end"), df) == [0, 1]
+
+
+def test_code_format_checks_digits_and_parents():
+    df = pd.DataFrame({"hts8": ["01011000", "0101100", "02011000"], "hs2": ["01", "01", "03"]})
+    assert flagged(rule("code_format", column="hts8", digits=8, parents={"hs2": 2}), df) == [1, 2]
+
+
+def test_yoy_jump_only_compares_consecutive_years():
+    df = pd.DataFrame(
+        {
+            "year": [2020, 2021, 2023, 2021],
+            "hs2": ["01", "01", "01", "02"],
+            "value": [1.0e6, 2.0e7, 1.0, 5.0],
+        }
+    )
+    assert flagged(rule("yoy_jump", keys=["hs2"], column="value", max_ratio=10, min_base=1e6), df) == [1]
+    assert flagged(rule("yoy_jump", keys=["hs2"], column="value", max_abs_change=1.5e7), df) == [1]
+
+
+def test_run_validation_reports_and_skips(tmp_path):
+    panel = pd.DataFrame({"year": [2021, 2022], "hs2": ["01", "02"], "import_duty": [-5.0, 3.0]})
+    rules = [
+        ValidationRule("duty_non_negative", "panel", "range", {"column": "import_duty", "min": 0}),
+        ValidationRule("missing_table", "other", "range", {"column": "x", "min": 0}),
+        ValidationRule("missing_column", "panel", "range", {"column": "x", "min": 0}),
+    ]
+
+    violations, summary = run_validation({"panel": panel}, rules)
+
+    assert violations[["rule", "row", "year", "code", "value"]].astype(object).values.tolist() == [
+        ["duty_non_negative", 0, 2021, 1, -5.0]
+    ]
+    assert summary.set_index("rule")["status"].to_dict() == {
+        "duty_non_negative": "ok", "missing_table": "skipped", "missing_column": "skipped"
+    }
+
+    write_validation_report(violations, summary, tmp_path)
+    assert pd.read_csv(tmp_path / "validation_violations.csv")["rule"].tolist() == ["duty_non_negative"]
+    assert len(pd.read_csv(tmp_path / "validation_summary.csv")) == 3
+
+
+def test_unknown_kind_is_rejected():
+    with pytest.raises(ValueError, match="Unknown validation rule kind"):
+        ValidationRule("bad", "panel", "no_such_kind", {})
@@ -1,24 +1,198 @@
+"""
+Render the Q1 figures to output/images/.
+
+Each figure is registered in FIGURES with the CSVs it reads and the PNGs it writes.
+Figures are rendered in a process pool under the non-interactive Agg backend, and a
+figure is skipped when the hash of its input files, plot parameters, DPI and the source
+of this module (plot functions, helpers and constants) matches the last render
+(output/images/_render_manifest.json) and its PNGs still exist.
+
+Large result tables (Monte Carlo draws, parameter grids) are aggregated with NumPy
+before anything reaches matplotlib: sensitivity plots switch to quantile fan charts,
+scenario bars to medians with 5-95% whiskers, and plot_outcome_heatmap bins two
+parameters into a 2-D grid of mean outcomes. Small tables are drawn row by row as before.
+
+Usage:
+    python visualization.py [--preview] [--force] [--workers N] [--only NAME ...]
+        --preview   low-DPI renders into output/images/preview/ for quick iteration
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import matplotlib
+matplotlib.use("Agg")  # non-interactive backend: safe in worker processes, no display needed
+
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
 import matplotlib.font_manager as fm
 
+# wash/ modules import telemetry as a top-level module; use the same module object
+WASH_DIR = Path(__file__).resolve().parent / "wash"
+if str(WASH_DIR) not in sys.path:
+    sys.path.insert(0, str(WASH_DIR))
+from telemetry import instrument
+
 # Configuration
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / "output" / "external_cleaned"
 PRED_DIR = BASE_DIR / "output" / "prediction_results"
 IMG_DIR = BASE_DIR / "output" / "images"
 IMG_DIR.mkdir(parents=True, exist_ok=True)
+PREVIEW_DIR = IMG_DIR / "preview"
+MANIFEST_PATH = IMG_DIR / "_render_manifest.json"
+
+FINAL_DPI = 300
+PREVIEW_DPI = 72
+
+# Aggregated plotting: above this many rows, plots are drawn from binned quantiles
+AGGREGATE_MIN_ROWS = 10_000
+AGGREGATE_BINS = 60
+FAN_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
 
-# Set style and font
-sns.set_theme(style="whitegrid")
 # Try to find a font that supports Chinese, fallback to standard sans-serif
 # In a standard Windows env, SimHei or Microsoft YaHei usually works.
-plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'Arial']
+FONT_CANDIDATES = ['SimHei', 'Microsoft YaHei', 'Arial']
+FALLBACK_FONT = 'DejaVu Sans'
+FONT_CACHE_PATH = IMG_DIR / "_font_cache.json"
+
+
+def font_list_fingerprint():
+    """Number of fonts matplotlib knows about and the mtime of its font-list cache file."""
+    cache = Path(matplotlib.get_cachedir()) / f"fontlist-v{fm.FontManager.__version__}.json"
+    mtime = cache.stat().st_mtime_ns if cache.exists() else None
+    return {"count": len(fm.fontManager.ttflist), "cache_mtime_ns": mtime}
+
+
+def resolve_fonts(candidates=FONT_CANDIDATES):
+    """
+    Installed subset of the candidate fonts (plus matplotlib's bundled fallback).
+    The result is cached in FONT_CACHE_PATH, keyed by the matplotlib version and a
+    fingerprint of its font list (number of fonts and the mtime of matplotlib's font
+    cache), so later runs and every render worker skip the font-list scan and the failed
+    lookups for fonts that are not installed, and installing a font invalidates the cache.
+    """
+    key = {
+        "matplotlib": matplotlib.__version__,
+        "candidates": list(candidates),
+        "fonts": font_list_fingerprint(),
+    }
+    if FONT_CACHE_PATH.exists():
+        try:
+            cached = json.loads(FONT_CACHE_PATH.read_text(encoding="utf-8"))
+            if cached.get("key") == key:
+                return cached["fonts"]
+        except (ValueError, KeyError):
+            pass
+    installed = {f.name for f in fm.fontManager.ttflist}
+    fonts = [name for name in candidates if name in installed] + [FALLBACK_FONT]
+    FONT_CACHE_PATH.write_text(json.dumps({"key": key, "fonts": fonts}, indent=2), encoding="utf-8")
+    return fonts
+
+
+# Set style and font
+sns.set_theme(style="whitegrid")
+plt.rcParams['font.sans-serif'] = resolve_fonts()
 plt.rcParams['axes.unicode_minus'] = False
 
-def plot_historical_trends():
+# ----------------------------------------------------------------------
+# NumPy aggregation for large result tables
+# ----------------------------------------------------------------------
+def group_quantiles(codes, values, n_groups, quantiles=FAN_QUANTILES):
+    """
+    Quantiles of values within each group code (0..n_groups-1), linear interpolation
+    as in np.quantile. One lexsort for all groups; returns (len(quantiles), n_groups)
+    with NaN for empty groups, and the per-group counts.
+    """
+    codes = np.asarray(codes)
+    values = np.asarray(values, dtype=float)
+    keep = ~np.isnan(values) & (codes >= 0)
+    codes, values = codes[keep], values[keep]
+
+    order = np.lexsort((values, codes))
+    sorted_values = values[order]
+    counts = np.bincount(codes, minlength=n_groups)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    q = np.asarray(quantiles, dtype=float)[:, None]
+    pos = starts[None, :] + q * np.maximum(counts - 1, 0)[None, :]
+    lo = np.floor(pos).astype(int)
+    hi = np.minimum(lo + 1, starts + np.maximum(counts - 1, 0))
+    frac = pos - lo
+    if len(sorted_values) == 0:
+        return np.full((len(q), n_groups), np.nan), counts
+    lo = np.clip(lo, 0, len(sorted_values) - 1)
+    hi = np.clip(hi, 0, len(sorted_values) - 1)
+    out = sorted_values[lo] * (1 - frac) + sorted_values[hi] * frac
+    out[:, counts == 0] = np.nan
+    return out, counts
+
+
+def bin_codes(x, bins=AGGREGATE_BINS):
+    """
+    Group codes and centers for x: exact values when there are at most `bins` distinct
+    values (parameter grids), otherwise equal-width bins (continuous draws).
+    """
+    x = np.asarray(x, dtype=float)
+    finite = np.isfinite(x)
+    uniques = np.unique(x[finite])
+    if len(uniques) <= bins:
+        codes = np.full(len(x), -1)
+        codes[finite] = np.searchsorted(uniques, x[finite])
+        return codes, uniques
+    edges = np.histogram_bin_edges(x[finite], bins=bins)
+    codes = np.where(finite, np.clip(np.digitize(x, edges[1:-1]), 0, bins - 1), -1)
+    return codes, (edges[:-1] + edges[1:]) / 2
+
+
+def quantile_bands(x, y, bins=AGGREGATE_BINS, quantiles=FAN_QUANTILES):
+    """Per-bin quantiles of y against x: (centers, quantiles x bins); empty bins dropped."""
+    codes, centers = bin_codes(x, bins)
+    bands, counts = group_quantiles(codes, y, len(centers), quantiles)
+    return centers[counts > 0], bands[:, counts > 0]
+
+
+def draw_fan(ax, centers, bands, color, label, quantiles=FAN_QUANTILES, linestyle='-'):
+    """Nested quantile bands (outer pairs lighter) around the median line."""
+    n = len(quantiles)
+    for i in range(n // 2):
+        alpha = 0.15 + 0.2 * i / max(n // 2 - 1, 1)
+        ax.fill_between(centers, bands[i], bands[n - 1 - i], color=color, alpha=alpha, linewidth=0)
+    return ax.plot(centers, bands[n // 2], color=color, linewidth=2.5, linestyle=linestyle, label=label)
+
+
+def fan_note(n_rows, quantiles=FAN_QUANTILES):
+    return f"\nmedian with {quantiles[0]:.0%}-{quantiles[-1]:.0%} bands over {n_rows:,} scenarios"
+
+
+def binned_mean_grid(x, y, z, bins=AGGREGATE_BINS):
+    """Mean of z on a bins x bins grid over (x, y) via two np.histogram2d passes."""
+    x, y, z = (np.asarray(a, dtype=float) for a in (x, y, z))
+    ok = np.isfinite(x) & np.isfinite(y) & np.isfinite(z)
+    counts, x_edges, y_edges = np.histogram2d(x[ok], y[ok], bins=bins)
+    sums, _, _ = np.histogram2d(x[ok], y[ok], bins=[x_edges, y_edges], weights=z[ok])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(counts > 0, sums / counts, np.nan)
+    return mean, x_edges, y_edges
+
+
+def _use_aggregate(df, mode):
+    if mode not in ("auto", "raw", "aggregate"):
+        raise ValueError(f"mode must be 'auto', 'raw' or 'aggregate', got {mode!r}")
+    return mode == "aggregate" or (mode == "auto" and len(df) > AGGREGATE_MIN_ROWS)
+
+
+@instrument()
+def plot_historical_trends(dpi=FINAL_DPI, out_dir=IMG_DIR):
     print("Generating historical trend charts...")
     df = pd.read_csv(DATA_DIR / "china_soy_imports.csv")
     df = df.sort_values(["year", "exporter"])
@@ -33,7 +207,7 @@ def plot_historical_trends():
     plt.xlim(year_min - 0.2, year_max + 0.2)
     plt.xticks(range(year_min, year_max + 1))
     plt.grid(True, linestyle='--', alpha=0.7)
-    plt.savefig(IMG_DIR / "1_historical_quantity_trend.png", dpi=300, bbox_inches='tight')
+    plt.savefig(out_dir / "1_historical_quantity_trend.png", dpi=dpi, bbox_inches='tight')
     plt.close()
 
     # 2. Market Share Trend (Stacked Bar Chart)
@@ -48,13 +222,18 @@ def plot_historical_trends():
     plt.legend(bbox_to_anchor=(1.02, 1), loc='upper left')
     plt.xticks(rotation=0)
     plt.tight_layout()
-    plt.savefig(IMG_DIR / "2_historical_share_trend.png", dpi=300)
+    plt.savefig(out_dir / "2_historical_share_trend.png", dpi=dpi)
     plt.close()
 
-def plot_scenario_impact(scenario_file, scenario_name, file_prefix):
+@instrument()
+def plot_scenario_impact(scenario_file, scenario_name, file_prefix, dpi=FINAL_DPI, out_dir=IMG_DIR, mode="auto"):
     print(f"Generating charts for {scenario_name}...")
     df = pd.read_csv(PRED_DIR / scenario_file)
-    
+    # Several rows per exporter = Monte Carlo draws: plot medians with quantile whiskers
+    if mode == "aggregate" or (mode == "auto" and df["exporter"].duplicated().any()):
+        _plot_scenario_impact_aggregated(df, scenario_name, out_dir / f"{file_prefix}_volume_impact.png", dpi)
+        return
+
     # Prepare data for plotting (Melt q0 and q_new)
     plot_data = df.melt(id_vars=["exporter"], value_vars=["q0", "q_new"], var_name="Type", value_name="Quantity")
     plot_data["Type"] = plot_data["Type"].map({"q0": "Baseline (2024)", "q_new": "Predicted"})
@@ -70,10 +249,35 @@ def plot_scenario_impact(scenario_file, scenario_name, file_prefix):
     plt.title(f"Impact on Export Volume: {scenario_name}")
     plt.ylabel("Quantity (Tons)")
     plt.xlabel("Exporter")
-    plt.savefig(IMG_DIR / f"{file_prefix}_volume_impact.png", dpi=300, bbox_inches='tight')
+    plt.savefig(out_dir / f"{file_prefix}_volume_impact.png", dpi=dpi, bbox_inches='tight')
     plt.close()
 
-def plot_share_comparison_pie():
+def _plot_scenario_impact_aggregated(df, scenario_name, path, dpi, quantiles=(0.05, 0.5, 0.95)):
+    codes, exporters = pd.factorize(df["exporter"])
+    x = np.arange(len(exporters))
+    width = 0.4
+    colors = sns.color_palette("muted")
+
+    plt.figure(figsize=(10, 6))
+    ax = plt.gca()
+    for i, (col, label) in enumerate([("q0", "Baseline (2024)"), ("q_new", "Predicted")]):
+        bands, counts = group_quantiles(codes, df[col].to_numpy(), len(exporters), quantiles)
+        low, median, high = bands
+        bars = ax.bar(x + (i - 0.5) * width, median, width, color=colors[i],
+                      label=f"{label} (median, {quantiles[0]:.0%}-{quantiles[-1]:.0%})",
+                      yerr=[median - low, high - median], capsize=4)
+        ax.bar_label(bars, fmt='%.0f', padding=3, fontsize=9)
+
+    ax.set_xticks(x, exporters)
+    ax.legend()
+    plt.title(f"Impact on Export Volume: {scenario_name} ({len(df):,} draws)")
+    plt.ylabel("Quantity (Tons)")
+    plt.xlabel("Exporter")
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    plt.close()
+
+@instrument()
+def plot_share_comparison_pie(dpi=FINAL_DPI, out_dir=IMG_DIR):
     print("Generating market share comparison pie charts...")
     # Load data
     df1 = pd.read_csv(PRED_DIR / "prediction_results_scenario1.csv")
@@ -107,10 +311,11 @@ def plot_share_comparison_pie():
     
     plt.suptitle("Impact of Tariff Shock on Market Structure", fontsize=20)
     plt.tight_layout(rect=[0, 0, 1, 0.92])
-    plt.savefig(IMG_DIR / "4_share_comparison_pie.png", dpi=300)
+    plt.savefig(out_dir / "4_share_comparison_pie.png", dpi=dpi)
     plt.close()
 
-def plot_sensitivity_analysis():
+@instrument()
+def plot_sensitivity_analysis(dpi=FINAL_DPI, out_dir=IMG_DIR, mode="auto"):
     print("Generating sensitivity analysis chart...")
     sens_file = PRED_DIR / "sensitivity_analysis_sigma.csv"
     if not sens_file.exists():
@@ -125,9 +330,15 @@ def plot_sensitivity_analysis():
     # Create a twin axis to show Share on right
     ax1 = plt.gca()
     
+    aggregate = _use_aggregate(df, mode)
+
     # Line 1: US Export Change % (Left Axis)
-    line1 = ax1.plot(df["sigma"], df["us_pct_change"] * 100, marker='o', linewidth=2.5, 
-             color='#d62728', label="US Export Change (%)")
+    if aggregate:
+        line1 = draw_fan(ax1, *quantile_bands(df["sigma"], df["us_pct_change"] * 100),
+                         color='#d62728', label="US Export Change (%)")
+    else:
+        line1 = ax1.plot(df["sigma"], df["us_pct_change"] * 100, marker='o', linewidth=2.5,
+                 color='#d62728', label="US Export Change (%)")
     ax1.set_xlabel(r"Substitution Elasticity ($\sigma$)", fontsize=12)
     ax1.set_ylabel("US Export Volume Change (%)", color='#d62728', fontsize=12)
     ax1.tick_params(axis='y', labelcolor='#d62728')
@@ -139,8 +350,12 @@ def plot_sensitivity_analysis():
     
     # Line 2: US Market Share (Right Axis)
     ax2 = ax1.twinx()
-    line2 = ax2.plot(df["sigma"], df["us_share_new"] * 100, marker='s', linewidth=2.5, 
-             color='#1f77b4', linestyle='--', label="US New Market Share (%)")
+    if aggregate:
+        line2 = draw_fan(ax2, *quantile_bands(df["sigma"], df["us_share_new"] * 100),
+                         color='#1f77b4', label="US New Market Share (%)", linestyle='--')
+    else:
+        line2 = ax2.plot(df["sigma"], df["us_share_new"] * 100, marker='s', linewidth=2.5,
+                 color='#1f77b4', linestyle='--', label="US New Market Share (%)")
     ax2.set_ylabel("US New Market Share (%)", color='#1f77b4', fontsize=12)
     ax2.tick_params(axis='y', labelcolor='#1f77b4')
     ax2.set_ylim(0, 30) # Force scale to show share clearly (0-30%)
@@ -150,12 +365,14 @@ def plot_sensitivity_analysis():
     labels = [l.get_label() for l in lines]
     ax1.legend(lines, labels, loc='upper left', bbox_to_anchor=(1.18, 1.0))
     
-    plt.title(r"Sensitivity Analysis: Impact of Elasticity ($\sigma$) on US Exports", fontsize=14)
+    plt.title(r"Sensitivity Analysis: Impact of Elasticity ($\sigma$) on US Exports"
+              + (fan_note(len(df)) if aggregate else ""), fontsize=14)
     plt.tight_layout(rect=[0, 0, 0.7, 1])
-    plt.savefig(IMG_DIR / "5_sensitivity_sigma.png", dpi=300, bbox_inches="tight")
+    plt.savefig(out_dir / "5_sensitivity_sigma.png", dpi=dpi, bbox_inches="tight")
     plt.close()
 
-def plot_eta_sensitivity():
+@instrument()
+def plot_eta_sensitivity(dpi=FINAL_DPI, out_dir=IMG_DIR, mode="auto"):
     print("Generating eta sensitivity chart...")
     sens_file = PRED_DIR / "sensitivity_analysis_eta.csv"
     if not sens_file.exists():
@@ -170,17 +387,29 @@ def plot_eta_sensitivity():
     plt.figure(figsize=(12, 6))
     ax1 = plt.gca()
 
-    line_us = ax1.plot(df["eta"], df["us_pct_change_q"] * 100, marker='o', linewidth=2.5,
-                       color='#d62728', label="US Export Change (%)")
-    line_total = ax1.plot(df["eta"], df["total_pct_change_q"] * 100, marker='s', linewidth=2.5,
-                          color='#2ca02c', linestyle='--', label="Total Import Change (%)")
+    aggregate = _use_aggregate(df, mode)
+
+    if aggregate:
+        line_us = draw_fan(ax1, *quantile_bands(df["eta"], df["us_pct_change_q"] * 100),
+                           color='#d62728', label="US Export Change (%)")
+        line_total = draw_fan(ax1, *quantile_bands(df["eta"], df["total_pct_change_q"] * 100),
+                              color='#2ca02c', label="Total Import Change (%)", linestyle='--')
+    else:
+        line_us = ax1.plot(df["eta"], df["us_pct_change_q"] * 100, marker='o', linewidth=2.5,
+                           color='#d62728', label="US Export Change (%)")
+        line_total = ax1.plot(df["eta"], df["total_pct_change_q"] * 100, marker='s', linewidth=2.5,
+                              color='#2ca02c', linestyle='--', label="Total Import Change (%)")
     ax1.set_xlabel(r"Demand Elasticity ($\eta$)", fontsize=12)
     ax1.set_ylabel("Volume Change (%)", fontsize=12)
     ax1.grid(True, linestyle='--', alpha=0.5)
 
     ax2 = ax1.twinx()
-    line_share = ax2.plot(df["eta"], df["us_share_new"] * 100, marker='^', linewidth=2.0,
-                          color='#1f77b4', linestyle='-.', label="US New Market Share (%)")
+    if aggregate:
+        line_share = draw_fan(ax2, *quantile_bands(df["eta"], df["us_share_new"] * 100),
+                              color='#1f77b4', label="US New Market Share (%)", linestyle='-.')
+    else:
+        line_share = ax2.plot(df["eta"], df["us_share_new"] * 100, marker='^', linewidth=2.0,
+                              color='#1f77b4', linestyle='-.', label="US New Market Share (%)")
     ax2.set_ylabel("US New Market Share (%)", color='#1f77b4', fontsize=12)
     ax2.tick_params(axis='y', labelcolor='#1f77b4')
 
@@ -188,16 +417,192 @@ def plot_eta_sensitivity():
     labels = [l.get_label() for l in lines]
     ax1.legend(lines, labels, loc='upper left', bbox_to_anchor=(1.18, 1.0))
 
-    plt.title(r"Sensitivity Analysis: Impact of Demand Elasticity ($\eta$)", fontsize=14)
+    plt.title(r"Sensitivity Analysis: Impact of Demand Elasticity ($\eta$)"
+              + (fan_note(len(df)) if aggregate else ""), fontsize=14)
     plt.tight_layout(rect=[0, 0, 0.7, 1])
-    plt.savefig(IMG_DIR / "6_sensitivity_eta.png", dpi=300, bbox_inches="tight")
+    plt.savefig(out_dir / "6_sensitivity_eta.png", dpi=dpi, bbox_inches="tight")
+    plt.close()
+
+@instrument()
+def plot_outcome_heatmap(results_file, x, y, value, out_name, bins=AGGREGATE_BINS, title=None,
+                         dpi=FINAL_DPI, out_dir=IMG_DIR):
+    """
+    Mean of `value` over a binned (x, y) parameter grid, e.g. sigma x eta draws vs US change.
+    Reads only the three columns; the grid is computed with np.histogram2d.
+    """
+    print(f"Generating binned heatmap of {value} over {x} x {y}...")
+    path = PRED_DIR / results_file
+    if not path.exists():
+        print(f"{results_file} not found, skipping heatmap...")
+        return
+    df = pd.read_csv(path, usecols=[x, y, value])
+    mean, x_edges, y_edges = binned_mean_grid(df[x], df[y], df[value], bins)
+
+    fig, ax = plt.subplots(figsize=(10, 7))
+    mesh = ax.pcolormesh(x_edges, y_edges, mean.T, cmap="RdBu_r", shading="flat")
+    fig.colorbar(mesh, ax=ax, label=f"Mean {value}")
+    ax.set_xlabel(x, fontsize=12)
+    ax.set_ylabel(y, fontsize=12)
+    ax.grid(False)
+    n_bins = "x".join(str(b) for b in (bins if np.ndim(bins) else (bins, bins)))
+    ax.set_title(title or f"{value} by {x} and {y} ({len(df):,} scenarios, {n_bins} bins)", fontsize=14)
+    plt.savefig(out_dir / out_name, dpi=dpi, bbox_inches="tight")
     plt.close()
 
+# ----------------------------------------------------------------------
+# Figure registry and cached parallel rendering
+# ----------------------------------------------------------------------
+FIGURES: Dict[str, dict] = {
+    "historical_trends": {
+        "func": plot_historical_trends,
+        "kwargs": {},
+        "inputs": [DATA_DIR / "china_soy_imports.csv"],
+        "outputs": ["1_historical_quantity_trend.png", "2_historical_share_trend.png"],
+    },
+    "scenario1_impact": {
+        "func": plot_scenario_impact,
+        "kwargs": {"scenario_file": "prediction_results_scenario1.csv",
+                   "scenario_name": "Scenario 1 (Tariff Only)", "file_prefix": "3a"},
+        "inputs": [PRED_DIR / "prediction_results_scenario1.csv"],
+        "outputs": ["3a_volume_impact.png"],
+    },
+    "scenario2_impact": {
+        "func": plot_scenario_impact,
+        "kwargs": {"scenario_file": "prediction_results_scenario2.csv",
+                   "scenario_name": "Scenario 2 (Tariff + Price Adj)", "file_prefix": "3b"},
+        "inputs": [PRED_DIR / "prediction_results_scenario2.csv"],
+        "outputs": ["3b_volume_impact.png"],
+    },
+    "share_pie": {
+        "func": plot_share_comparison_pie,
+        "kwargs": {},
+        "inputs": [PRED_DIR / "prediction_results_scenario1.csv"],
+        "outputs": ["4_share_comparison_pie.png"],
+    },
+    "sensitivity_sigma": {
+        "func": plot_sensitivity_analysis,
+        "kwargs": {},
+        "inputs": [PRED_DIR / "sensitivity_analysis_sigma.csv"],
+        "outputs": ["5_sensitivity_sigma.png"],
+    },
+    "sensitivity_eta": {
+        "func": plot_eta_sensitivity,
+        "kwargs": {},
+        "inputs": [PRED_DIR / "sensitivity_analysis_eta.csv"],
+        "outputs": ["6_sensitivity_eta.png"],
+    },
+    "sensitivity_grid": {
+        "func": plot_outcome_heatmap,
+        # one bin per grid point of model_q1's 13 x 18 sigma x eta sweep
+        "kwargs": {"results_file": "sensitivity_analysis_grid.csv", "x": "sigma", "y": "eta",
+                   "value": "us_pct_change_q", "out_name": "7_sensitivity_grid_heatmap.png", "bins": [13, 18],
+                   "title": r"US Import Change over $\sigma$ x $\eta$ (Scenario 1)"},
+        "inputs": [PRED_DIR / "sensitivity_analysis_grid.csv"],
+        "outputs": ["7_sensitivity_grid_heatmap.png"],
+    },
+}
+
+
+def figure_hash(name, dpi):
+    """
+    Hash of a figure's input files, plot parameters, DPI and this module's source.
+    The whole module is hashed because plot functions share helpers and constants.
+    """
+    spec = FIGURES[name]
+    h = hashlib.sha256()
+    h.update(Path(__file__).read_bytes())
+    h.update(json.dumps({"kwargs": spec["kwargs"], "dpi": dpi}, sort_keys=True).encode("utf-8"))
+    for path in spec["inputs"]:
+        h.update(str(Path(path).name).encode("utf-8"))
+        h.update(Path(path).read_bytes() if Path(path).exists() else b"<missing>")
+    return h.hexdigest()
+
+
+def load_manifest():
+    if MANIFEST_PATH.exists():
+        return json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    return {}
+
+
+def _render_figure(name, dpi, out_dir):
+    """Worker: render one registered figure, return its wall time."""
+    start = time.perf_counter()
+    spec = FIGURES[name]
+    spec["func"](**spec["kwargs"], dpi=dpi, out_dir=Path(out_dir))
+    plt.close("all")
+    return time.perf_counter() - start
+
+
+def render_figures(names: Optional[List[str]] = None, preview=False, force=False, workers=None):
+    """
+    Render the named figures (default: all), skipping the ones whose hash is unchanged.
+    Returns {figure: "rendered" | "cached" | "skipped" | "failed"}.
+    """
+    names = list(FIGURES) if not names else names
+    unknown = [n for n in names if n not in FIGURES]
+    if unknown:
+        raise KeyError(f"Unknown figure(s) {unknown}; available: {list(FIGURES)}")
+
+    dpi = PREVIEW_DPI if preview else FINAL_DPI
+    out_dir = PREVIEW_DIR if preview else IMG_DIR
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest()
+    key_prefix = "preview:" if preview else ""
+
+    status = {}
+    hashes = {n: figure_hash(n, dpi) for n in names}
+    todo = []
+    for n in names:
+        outputs_exist = all((out_dir / f).exists() for f in FIGURES[n]["outputs"])
+        if not force and outputs_exist and manifest.get(key_prefix + n) == hashes[n]:
+            status[n] = "cached"
+        else:
+            todo.append(n)
+
+    if todo:
+        n_workers = workers or min(len(todo), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            futures = {n: pool.submit(_render_figure, n, dpi, str(out_dir)) for n in todo}
+            for n, fut in futures.items():
+                try:
+                    elapsed = fut.result()
+                except Exception as exc:  # one broken figure should not stop the others
+                    print(f"[Render] {n}: failed: {exc!r}")
+                    status[n] = "failed"
+                    manifest.pop(key_prefix + n, None)
+                    continue
+                if not all((out_dir / f).exists() for f in FIGURES[n]["outputs"]):
+                    # plot function skipped itself (e.g. sensitivity CSV not generated yet)
+                    status[n] = "skipped"
+                    manifest.pop(key_prefix + n, None)
+                    continue
+                print(f"[Render] {n}: {elapsed:.2f}s")
+                status[n] = "rendered"
+                manifest[key_prefix + n] = hashes[n]
+
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    cached = [n for n in names if status[n] == "cached"]
+    if cached:
+        print(f"[Render] Unchanged, skipped: {cached}")
+    return status
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Render Q1 figures (cached, parallel)")
+    parser.add_argument("--preview", action="store_true",
+                        help=f"Render at {PREVIEW_DPI} DPI into {PREVIEW_DIR.relative_to(BASE_DIR)}")
+    parser.add_argument("--force", action="store_true", help="Re-render even if inputs are unchanged")
+    parser.add_argument("--workers", type=int, default=None, help="Process-pool size")
+    parser.add_argument("--only", nargs="+", metavar="NAME", default=None,
+                        help=f"Render only these figures: {', '.join(FIGURES)}")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    render_figures(args.only, preview=args.preview, force=args.force, workers=args.workers)
+    print(f"\nAll images saved to {PREVIEW_DIR if args.preview else IMG_DIR}")
+
+
 if __name__ == "__main__":
-    plot_historical_trends()
-    plot_scenario_impact("prediction_results_scenario1.csv", "Scenario 1 (Tariff Only)", "3a")
-    plot_scenario_impact("prediction_results_scenario2.csv", "Scenario 2 (Tariff + Price Adj)", "3b")
-    plot_share_comparison_pie()
-    plot_sensitivity_analysis()
-    plot_eta_sensitivity()
-    print(f"\nAll images saved to {IMG_DIR}")
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+HS 编码对照与行业分类（数组查表）
+
+所有分类方案和 HS 版本对照都预先展开成以整数编码为下标的查找数组：
+
+- 行业方案（sector scheme）：长度 10^d 的 int16 数组，值为标签序号；
+  应用时 ``labels[index[code]]`` 一次完成，结果直接是 categorical。
+- 版本对照（vintage map）：长度 10^d 的 int64 数组，值为目标编码，-1 表示编码不变。
+
+配置文件默认是 wash/config/hs_concordance.json，格式：
+
+    {
+      "sector_schemes": {
+        "<输出列名>": {"level": "hs2", "default": "...",
+                      "ranges": [[起, 止, "标签"], ...]}        # 闭区间
+        "<输出列名>": {"level": "hs4", "default": "...",
+                      "codes": {"1201": "soybean", ...}}
+      },
+      "vintages": {
+        "<名称>": {"level": "hs6", "codes": {"源编码": "目标编码", ...}}
+        "<名称>": {"level": "hs6", "csv": "相对配置文件的路径",
+                   "source_col": "...", "target_col": "..."}
+      }
+    }
+
+版本对照只支持 n:1（多个旧编码并入一个新编码）；1:n 拆分需要先在对照表里选定目标。
+默认配置附带 hs2017_hs2022（config/hs2017_hs2022_sample.csv），只是 HS2017 -> HS2022
+变动的一个小样本，拆分的子目取其中的“其他”子目；需要完整对照时换成 WCO 的对照表。
+"""
+
+from __future__ import annotations
+
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_CONCORDANCE_PATH = Path(__file__).resolve().parent / "config" / "hs_concordance.json"
+
+# 层级名 -> 编码位数（由粗到细）
+CODE_LEVEL_DIGITS: Dict[str, int] = {
+    "hs2": 2,
+    "hs4": 4,
+    "hs6": 6,
+    "hts8": 8,
+}
+
+
+def codes_to_int(codes: pd.Series) -> np.ndarray:
+    """
+    将编码列（补零字符串或整数）转为 int64 数组，无法解析的记为 -1。
+    """
+    if pd.api.types.is_integer_dtype(codes.dtype):
+        return codes.to_numpy(dtype=np.int64, na_value=-1)
+    numeric = pd.to_numeric(codes, errors="coerce")
+    return numeric.fillna(-1).astype(np.int64).to_numpy()
+
+
+class SectorScheme:
+    """
+    一个行业分类方案：某 HS 层级的整数编码 -> 行业标签。
+    """
+
+    def __init__(self, name: str, level: str, labels: List[str], index: np.ndarray, default: str) -> None:
+        self.name = name
+        self.level = level
+        self.digits = CODE_LEVEL_DIGITS[level]
+        self.labels = labels
+        self.index = index
+        self.default_pos = labels.index(default)
+
+    @classmethod
+    def from_config(cls, name: str, spec: Dict[str, object]) -> "SectorScheme":
+        level = str(spec["level"])
+        if level not in CODE_LEVEL_DIGITS:
+            raise ValueError(f"Unknown HS level '{level}' in sector scheme '{name}'")
+        digits = CODE_LEVEL_DIGITS[level]
+        # 构建期间 labels[0] 为默认标签
+        labels: List[str] = [str(spec.get("default", "other"))]
+        label_pos: Dict[str, int] = {labels[0]: 0}
+        index = np.zeros(10 ** digits, dtype=np.int16)
+
+        def _pos(label: str) -> int:
+            if label not in label_pos:
+                label_pos[label] = len(labels)
+                labels.append(label)
+            return label_pos[label]
+
+        for lo, hi, label in spec.get("ranges", []):  # type: ignore[union-attr]
+            index[int(lo): int(hi) + 1] = _pos(str(label))
+        for code, label in dict(spec.get("codes", {})).items():  # type: ignore[arg-type]
+            index[int(code)] = _pos(str(label))
+
+        # 标签按字母序排列，使 categorical 的分组 / 排序结果与字符串列一致
+        order = np.argsort(labels, kind="stable")
+        remap = np.empty(len(labels), dtype=np.int16)
+        remap[order] = np.arange(len(labels), dtype=np.int16)
+        sorted_labels = [labels[i] for i in order]
+        return cls(name, level, sorted_labels, remap[index], default=labels[0])
+
+    def lookup(self, codes: np.ndarray) -> pd.Categorical:
+        """
+        对本层级的整数编码数组查表；越界或无效编码取默认标签。
+        """
+        valid = (codes >= 0) & (codes < self.index.size)
+        pos = np.full(codes.size, self.default_pos, dtype=np.int16)
+        pos[valid] = self.index[codes[valid]]
+        return pd.Categorical.from_codes(pos, categories=self.labels)
+
+
+class VintageMap:
+    """
+    HS 版本对照：源版本整数编码 -> 目标版本整数编码（-1 表示不变）。
+    """
+
+    def __init__(self, name: str, level: str, target: np.ndarray) -> None:
+        self.name = name
+        self.level = level
+        self.digits = CODE_LEVEL_DIGITS[level]
+        self.target = target
+
+    @classmethod
+    def from_config(cls, name: str, spec: Dict[str, object], base_dir: Path) -> "VintageMap":
+        level = str(spec["level"])
+        if level not in CODE_LEVEL_DIGITS:
+            raise ValueError(f"Unknown HS level '{level}' in vintage map '{name}'")
+        target = np.full(10 ** CODE_LEVEL_DIGITS[level], -1, dtype=np.int64)
+
+        if "csv" in spec:
+            table = pd.read_csv(base_dir / str(spec["csv"]), dtype=str)
+            src = codes_to_int(table[str(spec["source_col"])])
+            dst = codes_to_int(table[str(spec["target_col"])])
+        else:
+            pairs = dict(spec.get("codes", {}))  # type: ignore[arg-type]
+            src = np.asarray([int(k) for k in pairs], dtype=np.int64)
+            dst = np.asarray([int(v) for v in pairs.values()], dtype=np.int64)
+
+        ok = (src >= 0) & (src < target.size) & (dst >= 0)
+        dup = pd.Series(dst[ok]).groupby(src[ok]).nunique()
+        if (dup > 1).any():
+            raise ValueError(f"Vintage map '{name}' splits source codes {dup.index[dup > 1].tolist()}; pick one target each")
+        target[src[ok]] = dst[ok]
+        return cls(name, level, target)
+
+    def convert(self, codes: np.ndarray) -> np.ndarray:
+        """
+        将源版本编码数组转换为目标版本；未列出的编码和无效编码（-1）保持不变。
+        """
+        valid = (codes >= 0) & (codes < self.target.size)
+        out = codes.copy()
+        mapped = np.full(codes.size, -1, dtype=np.int64)
+        mapped[valid] = self.target[codes[valid]]
+        hit = mapped >= 0
+        out[hit] = mapped[hit]
+        return out
+
+
+class Concordance:
+    """
+    从配置文件加载的全部行业方案和版本对照。
+    """
+
+    def __init__(self, schemes: Dict[str, SectorScheme], vintages: Dict[str, VintageMap]) -> None:
+        self.schemes = schemes
+        self.vintages = vintages
+
+    def level_codes(self, df: pd.DataFrame, level: str) -> Optional[np.ndarray]:
+        """
+        取 df 中某层级的整数编码：优先用同名列，否则从更细的编码列截取前缀。
+        找不到可用列时返回 None。
+        """
+        digits = CODE_LEVEL_DIGITS[level]
+        for col, col_digits in CODE_LEVEL_DIGITS.items():
+            if col_digits < digits or col not in df.columns:
+                continue
+            codes = codes_to_int(df[col])
+            return np.where(codes >= 0, codes // (10 ** (col_digits - digits)), -1)
+        return None
+
+    def apply_sector_labels(
+        self,
+        df: pd.DataFrame,
+        schemes: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        把指定（默认全部）行业方案作为 categorical 列加到 df 上（原地修改并返回）。
+        df 中没有可用编码列的方案会被跳过。
+        """
+        names = list(self.schemes) if schemes is None else list(schemes)
+        for name in names:
+            scheme = self.schemes[name]
+            codes = self.level_codes(df, scheme.level)
+            if codes is None:
+                continue
+            df[name] = scheme.lookup(codes)
+        return df
+
+    def convert_vintage(self, codes: pd.Series, vintage: str) -> np.ndarray:
+        """
+        按名称做 HS 版本转换，返回整数编码数组（无法解析的编码为 -1）。
+        """
+        return self.vintages[vintage].convert(codes_to_int(codes))
+
+
+def load_concordance(path: Path = DEFAULT_CONCORDANCE_PATH) -> Concordance:
+    """
+    读取对照配置文件并构建查找数组（同一路径只构建一次）。
+    """
+    return _load_concordance_cached(Path(path).resolve())
+
+
+@lru_cache(maxsize=None)
+def _load_concordance_cached(path: Path) -> Concordance:
+    if not path.exists():
+        raise FileNotFoundError(f"HS concordance config not found: {path}")
+    spec = json.loads(path.read_text(encoding="utf-8"))
+
+    schemes = {
+        name: SectorScheme.from_config(name, scheme_spec)
+        for name, scheme_spec in spec.get("sector_schemes", {}).items()
+    }
+    vintages = {
+        name: VintageMap.from_config(name, vintage_spec, path.parent)
+        for name, vintage_spec in spec.get("vintages", {}).items()
+    }
+    return Concordance(schemes, vintages)
@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+国家名称 -> ISO3 统一规范化
+
+DataWeb（"Country"）、WITS（"Partner"）和 PSD（表格行标签）各自使用不同的国家拼写。
+本模块为三者提供同一套映射：
+
+- 每个唯一名称只解析一次：先查 COUNTRY_ALIASES（各数据源中 pycountry 识别不了的拼写），
+  再用 ``pycountry.countries.lookup``。
+- 解析结果保存在进程内字典里，并持久化到 CSV（默认 wash/output/country_iso3_map.csv），
+  下次运行直接读表，不再调用 pycountry。别名表始终优先于缓存，新增别名可以修正
+  已缓存的结果。
+- 缓存的读写由锁保护（线程模式下各读取阶段并发调用）；写表时先并入磁盘上其他
+  进程写入的条目，再写临时文件并 ``os.replace``，不会留下写了一半的文件。
+- 应用时先把名称列转成 categorical，只映射类别，再展开回整列（向量化），
+  避免在数百万行长表上逐行调用 pycountry。
+
+pycountry 是可选依赖：未安装时只使用别名表，其余名称的 ISO3 为缺失值（且不写入缓存，
+以便安装后重新解析）。
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+# 可选依赖：用于将国家名映射为 ISO3 代码。
+try:
+    import pycountry  # type: ignore
+except ImportError:  # pragma: no cover - safe fallback
+    pycountry = None  # type: ignore
+
+
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parent / "output" / "country_iso3_map.csv"
+
+# pycountry.lookup 识别不了、但在 DataWeb / WITS / PSD 中出现的拼写（统一小写作键）。
+# 值为 None 表示汇总项或非国家条目。
+COUNTRY_ALIASES: Dict[str, Optional[str]] = {
+    "brunei": "BRN",
+    "czechia (czech republic)": "CZE",
+    "czech republic": "CZE",
+    "côte d`ivoire": "CIV",
+    "cote d'ivoire": "CIV",
+    "ivory coast": "CIV",
+    "democratic republic of the congo": "COD",
+    "congo (kinshasa)": "COD",
+    "congo (brazzaville)": "COG",
+    "eswatini (swaziland)": "SWZ",
+    "swaziland": "SWZ",
+    "ethiopia(excludes eritrea)": "ETH",
+    "falkland islands": "FLK",
+    "french southern and antarctic lands": "ATF",
+    "gaza strip": "PSE",
+    "west bank": "PSE",
+    "heard and mcdonald islands": "HMD",
+    "kosovo": "XKX",
+    "macau": "MAC",
+    "micronesia": "FSM",
+    "myanmar (burma)": "MMR",
+    "burma": "MMR",
+    "pitcairn islands": "PCN",
+    "reunion": "REU",
+    "russia": "RUS",
+    "saint helena": "SHN",
+    "sint maarten": "SXM",
+    "são tomé and príncipe": "STP",
+    "sao tome and principe": "STP",
+    "turkey": "TUR",
+    "turkiye": "TUR",
+    "vatican city": "VAT",
+    "korea, south": "KOR",
+    "south korea": "KOR",
+    "korea, north": "PRK",
+    "north korea": "PRK",
+    "taiwan": "TWN",
+    "hong kong": "HKG",
+    "vietnam": "VNM",
+    "laos": "LAO",
+    "iran": "IRN",
+    "syria": "SYR",
+    "tanzania": "TZA",
+    "bolivia": "BOL",
+    "venezuela": "VEN",
+    "moldova": "MDA",
+    "united states": "USA",
+    "united kingdom": "GBR",
+    # 汇总 / 非国家条目
+    "world": None,
+    "total": None,
+    "other": None,
+    "others": None,
+    "european union": None,
+    "eu-27": None,
+}
+
+# 进程内缓存：名称（strip 后）-> ISO3
+_RESOLVED: Dict[str, Optional[str]] = {}
+_LOADED_PATHS: set = set()
+# 保护 _RESOLVED / _LOADED_PATHS 以及缓存文件的写入
+_LOCK = threading.RLock()
+
+
+def _clean_name(name: object) -> Optional[str]:
+    if not isinstance(name, str):
+        return None
+    name_str = name.strip()
+    return name_str or None
+
+
+def resolve_country_name(name: object) -> Optional[str]:
+    """
+    解析单个名称（不查缓存）：先查别名表，再用 pycountry.lookup。失败返回 None。
+    """
+    name_str = _clean_name(name)
+    if name_str is None:
+        return None
+    key = name_str.casefold()
+    if key in COUNTRY_ALIASES:
+        return COUNTRY_ALIASES[key]
+    if pycountry is None:
+        return None
+    try:
+        return pycountry.countries.lookup(name_str).alpha_3  # type: ignore[no-any-return]
+    except LookupError:
+        return None
+
+
+def _read_country_table(path: Path) -> Dict[str, Optional[str]]:
+    table = pd.read_csv(path, dtype=str, keep_default_na=False)
+    return {name: iso3 or None for name, iso3 in zip(table["name"], table["iso3"])}
+
+
+def load_country_table(path: Path = DEFAULT_CACHE_PATH) -> Dict[str, Optional[str]]:
+    """
+    读取持久化的名称映射表并并入进程内缓存（每个路径只读一次）。
+    """
+    with _LOCK:
+        if path not in _LOADED_PATHS and path.exists():
+            for name, iso3 in _read_country_table(path).items():
+                _RESOLVED.setdefault(name, iso3)
+            _LOADED_PATHS.add(path)
+    return _RESOLVED
+
+
+def save_country_table(path: Path = DEFAULT_CACHE_PATH) -> None:
+    """
+    将进程内缓存写回 CSV（列：name, iso3；无法解析的 iso3 为空）。
+
+    先并入磁盘上已有、本进程没有的条目（其他进程可能同时在写），
+    再写临时文件并原子替换。
+    """
+    with _LOCK:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        merged = dict(_RESOLVED)
+        if path.exists():
+            for name, iso3 in _read_country_table(path).items():
+                merged.setdefault(name, iso3)
+        table = pd.DataFrame(
+            {
+                "name": list(merged.keys()),
+                "iso3": [v or "" for v in merged.values()],
+            }
+        ).sort_values("name")
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        table.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+
+def resolve_country_names(
+    names: Iterable[object],
+    cache_path: Optional[Path] = DEFAULT_CACHE_PATH,
+) -> Dict[str, Optional[str]]:
+    """
+    解析一组名称，每个唯一名称只解析一次；新解析的结果写回持久化表。
+
+    返回 {名称（strip 后）: ISO3 或 None}。
+    """
+    if cache_path is not None:
+        load_country_table(cache_path)
+
+    result: Dict[str, Optional[str]] = {}
+    new_names = False
+    with _LOCK:
+        for name in set(names):
+            name_str = _clean_name(name)
+            if name_str is None:
+                continue
+            key = name_str.casefold()
+            if key in COUNTRY_ALIASES:
+                # 别名表优先：覆盖缓存中过期的结果（包括缓存的解析失败）
+                iso3 = COUNTRY_ALIASES[key]
+                if _RESOLVED.get(name_str, "<missing>") != iso3:
+                    _RESOLVED[name_str] = iso3
+                    new_names = True
+            elif name_str not in _RESOLVED:
+                iso3 = resolve_country_name(name_str)
+                if iso3 is None and pycountry is None:
+                    # 没有 pycountry 时不缓存失败结果
+                    result[name_str] = None
+                    continue
+                _RESOLVED[name_str] = iso3
+                new_names = True
+            result[name_str] = _RESOLVED[name_str]
+
+        if new_names and cache_path is not None:
+            save_country_table(cache_path)
+    return result
+
+
+def normalize_country_series(
+    names: pd.Series,
+    cache_path: Optional[Path] = DEFAULT_CACHE_PATH,
+) -> pd.Series:
+    """
+    将国家名称列向量化映射为 ISO3（categorical）。
+
+    名称先转为 categorical，只对类别做解析和映射，再按 codes 展开回整列。
+    """
+    cats = names.astype("category")
+    categories = cats.cat.categories
+    mapping = resolve_country_names(categories, cache_path=cache_path)
+    iso3_by_cat = pd.Series(
+        [mapping.get(str(c).strip()) for c in categories],
+        dtype=object,
+    )
+    iso3_values = iso3_by_cat.astype("category")
+    codes = cats.cat.codes.to_numpy()
+    # 缺失名称（code -1）不参与查表；全部缺失时没有任何类别
+    out_codes = np.full(codes.size, -1, dtype=np.int64)
+    present = codes >= 0
+    out_codes[present] = iso3_values.cat.codes.to_numpy()[codes[present]]
+    return pd.Series(
+        pd.Categorical.from_codes(out_codes, categories=iso3_values.cat.categories),
+        index=names.index,
+        name="iso3",
+    )
+
+
+def map_iso3_to_labels(
+    iso3: pd.Series,
+    labels: Mapping[str, str],
+) -> pd.Series:
+    """
+    将 ISO3 列映射为模型内部使用的标签（如 {"USA": "US", "BRA": "Brazil"}），
+    不在映射中的记为缺失。
+    """
+    return iso3.astype(object).map(labels)
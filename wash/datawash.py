@@ -13,31 +13,46 @@ APMCM 2025 Problem C - Unified Data Cleaning Script
 - tariff_yearly.csv                : 年度 HTS8 关税面板
 - tariff_hs2_panel.csv             : 年度 HS2 聚合 MFN 关税
 - tariff_hs4_panel.csv             : 年度 HS4 聚合 MFN 关税
+- tariff_hs6_panel.csv             : 年度 HS6 聚合 MFN 关税
 - trade_export_panel.csv           : 出口额 + HS2 关税
 - trade_duty_panel.csv             : 关税收入 + HS2 关税
 - exports_CN_sector.csv            : 对华出口（按年份 × sector_big）
 - duty_total_year.csv              : 全部关税收入（按年）
 - duty_by_sector_year.csv          : 关税收入（按年 × sector_big）
+- validation_violations.csv        : 质量检查违规行（validation_summary.csv 为各规则汇总）
+- duty_scenarios_year.csv          : 可选，关税情景下的反事实关税收入（按年；另有 _hs2_year）
 
 只需要根据你本地数据文件的位置改一下 CONFIG 部分（默认假设脚本和数据在同一目录）。
+只刷新部分输出时用 --targets（见 WASH_TARGETS），只会执行这些输出的上游阶段：
+
+    python datawash.py --targets exports_CN_sector duty_total_year
 """
 
 from __future__ import annotations
 
+import argparse
 import os
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
 
-import matplotlib.pyplot as plt
-
-# 可选依赖：用于将国家名映射为 ISO3 代码。如果没有安装 pycountry，则 partner_iso3 会是 None。
-try:
-    import pycountry  # type: ignore
-except ImportError:  # pragma: no cover - safe fallback
-    pycountry = None  # type: ignore
+from concordance import DEFAULT_CONCORDANCE_PATH, load_concordance
+from country_names import normalize_country_series
+from dataweb_reader import DEFAULT_CHUNK_ROWS, iter_dataweb_long_chunks
+from duty_simulator import DEFAULT_RATE_COL, DEFAULT_SCENARIOS_PATH, load_duty_scenarios, run_duty_scenarios
+from hs_rollup import build_hs_rollup, build_trade_weights, finest_trade_level
+from join_index import PanelJoinIndex
+from output_store import OUTPUT_FORMATS, write_csv_output, write_parquet_output
+from panel_schema import TARIFF_CORE_COLUMNS, compact_panel, concat_compact_panels, memory_usage_mb
+from sqlite_store import write_sqlite_store
+from stage_graph import Stage, print_stage_timings, run_stage_graph, select_stages
+from tariff_changelog import TariffChangeLog, write_changelog
+from tariff_schema import DEFAULT_TARIFF_SCHEMA_PATH, load_tariff_schema
+from telemetry import instrument
+from validation import DEFAULT_VALIDATION_RULES_PATH, load_validation_rules, run_validation, write_validation_report
 
 
 # ---------------------------------------------------------------------------
@@ -82,9 +97,39 @@ def build_default_config() -> Dict[str, object]:
         "OUTPUT_DIR": output_dir,
         "TARIFF_DIR": data_root,  # 关税 Excel 所在目录
         "TARIFF_FILE_INFO": tariff_file_info,
+        # 读取的关税规范列（须在 schema 注册表中登记）；None 表示文件中的全部列
+        # （tariff_yearly 保留各自由贸易协定 / 优惠项目列）。不输出 tariff_yearly / 变更日志时
+        # 只读 panel_schema.TARIFF_CORE_COLUMNS（HS 汇总只用到这些列）
+        "TARIFF_KEEP_COLUMNS": None,
+        "TARIFF_SCHEMA_PATH": DEFAULT_TARIFF_SCHEMA_PATH,  # 各年度关税库的列映射与类型
         "DATAWEB_EXPORT_XLSX": data_root / "DataWeb-Query-Export.xlsx",
         "DATAWEB_IMPORT_XLSX": data_root / "DataWeb-Query-Import.xlsx",
+        "DATAWEB_CHUNK_ROWS": DEFAULT_CHUNK_ROWS,  # 流式读取时每块的宽表行数
+        "CONCORDANCE_PATH": DEFAULT_CONCORDANCE_PATH,  # 行业分类 / HS 版本对照配置
+        "VALIDATION_RULES_PATH": DEFAULT_VALIDATION_RULES_PATH,  # 质量检查规则
+        # 关税收入反事实情景（duty_scenarios_*.csv）
+        "DUTY_SCENARIOS": False,
+        "DUTY_SCENARIOS_PATH": DEFAULT_SCENARIOS_PATH,
+        # 税则变更日志（base 快照 + 逐年增量，写入 output/tariff_changelog/，需要 pyarrow）
+        "TARIFF_CHANGELOG": False,
+        # 输出格式："csv" / "parquet"（按 year 分区，需要 pyarrow）/ "both"
+        "OUTPUT_FORMAT": "csv",
+        "OUTPUT_PARTITION_HS2": False,  # Parquet 是否再按 hs2 分区
+        # 是否另外把全部输出面板写入带索引的本地 SQLite 库（查询见 sqlite_store.query_panel）
+        "SQLITE_STORE": False,
+        "SQLITE_DB_PATH": output_dir / "wash_panels.sqlite",
+        # 阶段执行方式："process"（进程池并发读取）/ "thread" / "serial"
+        "PIPELINE_EXECUTOR": "process",
+        "PIPELINE_WORKERS": 3,
+        # 只构建这些输出（见 WASH_TARGETS）及其上游阶段；None 表示全部
+        "TARGETS": None,
         "MID_MONTH_DAY": "-06-30",  # 年度中点
+        # HS 汇总统计量："mean" / "median"（_median 列）/ "weighted"（贸易加权，_tw 列；权重取
+        # DataWeb 导出的最细编码粒度，只为比它更粗的层级输出。只有 HS2 的导出不支持加权）。
+        # 默认只算简单平均，面板列与已发布的 CSV 一致；其余统计量按需加入
+        "ROLLUP_STATS": ("mean",),
+        # 贸易加权所用的 DataWeb 指标："export_fas" 或 "import_duty"
+        "ROLLUP_WEIGHT_METRIC": "export_fas",
     }
     return config
 
@@ -120,159 +165,47 @@ def parse_date_series(series: pd.Series) -> pd.Series:
     return pd.to_datetime(series, errors="coerce")
 
 
-def map_country_to_iso3(name: Optional[str]) -> Optional[str]:
-    """
-    将国家名称映射为 ISO3 代码（如果安装了 pycountry）。
-
-    未安装 pycountry 或匹配失败时返回 None。
-    """
-    if not isinstance(name, str):
-        return None
-    name_str = name.strip()
-    if not name_str:
-        return None
-    if pycountry is None:
-        return None
-    try:
-        country = pycountry.countries.lookup(name_str)
-        return country.alpha_3  # type: ignore[no-any-return]
-    except Exception:
-        return None
-
-
-def classify_hs2_sector_big(hs2_code: str) -> str:
-    """
-    将 HS2 章号映射为大类行业（sector_big），用于宏观分析。
-    """
-    try:
-        code_int = int(str(hs2_code).strip())
-    except (TypeError, ValueError):
-        return "others"
-
-    if 1 <= code_int <= 24:
-        return "agriculture"
-    if 25 <= code_int <= 27:
-        return "mineral"
-    if 28 <= code_int <= 38:
-        return "chemical"
-    if 39 <= code_int <= 40:
-        return "plastic_rubber"
-    if 41 <= code_int <= 43:
-        return "hides_skins_leather"
-    if 44 <= code_int <= 49:
-        return "wood_paper"
-    if 50 <= code_int <= 63:
-        return "textiles"
-    if 64 <= code_int <= 67:
-        return "footwear_headgear"
-    if 68 <= code_int <= 71:
-        return "stone_glass_jewelry"
-    if 72 <= code_int <= 83:
-        return "base_metals"
-    if code_int == 84:
-        return "machinery"
-    if code_int == 85:
-        return "electrical_equipment"
-    if 86 <= code_int <= 89:
-        return "transport_equipment"
-    if 90 <= code_int <= 92:
-        return "precision_instruments"
-    if code_int == 93:
-        return "arms_ammunition"
-    if 94 <= code_int <= 96:
-        return "misc_manufactures"
-    if code_int == 97:
-        return "art_collectors_pieces"
-    return "others"
-
-
-def classify_hs4_sector_specific(hs4_code: str) -> str:
-    """
-    对关键行业的 HS4 做更细标签：大豆、汽车、半导体等。
-
-    未列出的 HS4 返回 "other"。
-    """
-    code_str = str(hs4_code).strip()
-    if code_str.isdigit() and len(code_str) < 4:
-        code_str = code_str.zfill(4)
-
-    mapping: Dict[str, str] = {
-        "1201": "soybean",
-        "8703": "auto_passenger",
-        "8704": "auto_truck",
-        "8541": "semiconductor_diode",
-        "8542": "semiconductor_ic",
-    }
-    return mapping.get(code_str, "other")
-
-
 # ---------------------------------------------------------------------------
 # 1. 关税库：读取并年化 HTS8 面板
 # ---------------------------------------------------------------------------
 
+@instrument()
 def read_single_tariff_file(
     year: int,
     file_path: Path,
+    keep_columns: Optional[Sequence[str]] = None,
+    schema_path: Path = DEFAULT_TARIFF_SCHEMA_PATH,
 ) -> pd.DataFrame:
     """
     读取单个年度关税 Excel，并做基础清洗：
-    - hts8 补零为 8 位字符串
+    - 按 schema 注册表（见 tariff_schema.py）读取 keep_columns 映射到的源列
+      （None 表示全部列，未登记的列原样保留），并显式转换类型：hts8 补零为 8 位字符串，
+      税率为数值，税率类型代码为整数，生效日期解析为 datetime
     - 生成 hs2、hs4、hs6
-    - 解析 begin_effect_date / end_effective_date
-    - 转换主要税率字段为数值
     - 生成 has_additional_duty 标志
     - 添加 year 列
+    - 编码转整数、整数列降位（见 panel_schema；税率保留 float64）
+
+    各年度返回的列完全相同（文件中缺少的列为空列），可以直接拼接。
     """
     if not file_path.exists():
         raise FileNotFoundError(f"Tariff file for year {year} not found: {file_path}")
 
-    df = pd.read_excel(file_path)
-
-    # 确保 hts8 存在并补零
-    if "hts8" not in df.columns:
-        raise KeyError(f"'hts8' column not found in tariff file: {file_path}")
+    df = load_tariff_schema(schema_path).read_vintage(year, file_path, names=keep_columns)
 
-    df["hts8"] = zero_pad_series(df["hts8"], 8)
     df["hs2"] = df["hts8"].str[:2]
     df["hs4"] = df["hts8"].str[:4]
     df["hs6"] = df["hts8"].str[:6]
 
     df["year"] = int(year)
 
-    # 日期字段
-    if "begin_effect_date" in df.columns:
-        df["begin_effect_date"] = parse_date_series(df["begin_effect_date"])
-    else:
+    # 日期字段：没有结束日期视为长期有效
+    if "begin_effect_date" not in df.columns:
         df["begin_effect_date"] = pd.NaT
-
-    if "end_effective_date" in df.columns:
-        df["end_effective_date"] = parse_date_series(df["end_effective_date"])
-    else:
+    if "end_effective_date" not in df.columns:
         df["end_effective_date"] = pd.NaT
-
     df["end_effective_date"] = df["end_effective_date"].fillna(pd.Timestamp("2050-12-31"))
 
-    # 税率字段
-    float_cols = [
-        "mfn_ad_val_rate",
-        "mfn_specific_rate",
-        "mfn_other_rate",
-        "col2_ad_val_rate",
-        "col2_specific_rate",
-        "col2_other_rate",
-    ]
-    for col in float_cols:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-
-    int_cols = [
-        "mfn_rate_type_code",
-        "col2_rate_type_code",
-    ]
-    for col in int_cols:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int64")
-
     # additional_duty Yes/No -> has_additional_duty
     if "additional_duty" in df.columns:
         df["has_additional_duty"] = (
@@ -281,19 +214,11 @@ def read_single_tariff_file(
     else:
         df["has_additional_duty"] = 0
 
-    return df
-
-
-def align_tariff_columns(dfs: List[pd.DataFrame]) -> pd.DataFrame:
-    """
-    多个年度关税 DataFrame 列对齐：取所有列的并集，然后重索引。
-    """
-    all_cols: List[str] = sorted({col for df in dfs for col in df.columns})
-    aligned = [df.reindex(columns=all_cols) for df in dfs]
-    combined = pd.concat(aligned, ignore_index=True)
-    return combined
+    # 各年度拼接前不转 categorical（类别集合不同的 categorical 拼接会退化为 object）
+    return compact_panel(df, name=f"tariff {year}", categorize=False)
 
 
+@instrument()
 def annualize_tariff_by_middate(tariff_raw_allyears: pd.DataFrame) -> pd.DataFrame:
     """
     对 (year, hts8) 做年度选择，形成唯一记录，规则：
@@ -349,56 +274,94 @@ def annualize_tariff_by_middate(tariff_raw_allyears: pd.DataFrame) -> pd.DataFra
     return tariff_yearly
 
 
-def build_tariff_yearly_panel(config: Dict[str, object]) -> pd.DataFrame:
+def build_tariff_raw_panel(config: Dict[str, object]) -> pd.DataFrame:
     """
-    读取所有年度关税 Excel，列对齐后按年度中点规则生成年度 HTS8 面板。
+    读取所有年度关税 Excel（TARIFF_KEEP_COLUMNS 指定的列，默认全部列），拼接为未年度化的原始记录
+    （year 为所属年度文件；同一 hts8 在一个年度文件中可有多条生效区间）。
     """
     tariff_dir: Path = config["TARIFF_DIR"]  # type: ignore[assignment]
     tariff_file_info: List[Tuple[int, str]] = config["TARIFF_FILE_INFO"]  # type: ignore[assignment]
+    keep_columns = config.get("TARIFF_KEEP_COLUMNS")
+    schema_path = config.get("TARIFF_SCHEMA_PATH", DEFAULT_TARIFF_SCHEMA_PATH)
 
     all_year_dfs: List[pd.DataFrame] = []
 
     for year, filename in tariff_file_info:
         file_path = tariff_dir / filename
         print(f"[Tariff] Reading {file_path} for year {year} ...")
-        df = read_single_tariff_file(year, file_path)
+        df = read_single_tariff_file(
+            year,
+            file_path,
+            keep_columns=keep_columns,  # type: ignore[arg-type]
+            schema_path=schema_path,  # type: ignore[arg-type]
+        )
         all_year_dfs.append(df)
 
-    print("[Tariff] Aligning columns across years ...")
-    tariff_raw_allyears = align_tariff_columns(all_year_dfs)
+    # 已登记列各年度一致；只在部分年度出现的未登记列由 concat 补缺失。列按名称排序以保持输出列顺序不变
+    tariff_raw_allyears = pd.concat(all_year_dfs, ignore_index=True)
+    return tariff_raw_allyears[sorted(tariff_raw_allyears.columns)]
+
 
+def annualize_tariff_panel(tariff_raw_allyears: pd.DataFrame) -> pd.DataFrame:
+    """
+    原始记录 -> 按年度中点规则选出的年度 HTS8 面板（紧凑 dtype）。
+    """
     print("[Tariff] Annualizing by mid-date selection ...")
     tariff_yearly = annualize_tariff_by_middate(tariff_raw_allyears)
+    tariff_yearly = compact_panel(tariff_yearly, name="tariff_yearly")
 
     print(f"[Tariff] Completed annual panel with {len(tariff_yearly)} rows.")
     return tariff_yearly
 
 
+def build_tariff_yearly_panel(config: Dict[str, object]) -> pd.DataFrame:
+    """
+    读取所有年度关税 Excel（只读注册表映射的列），按年度中点规则生成年度 HTS8 面板。
+    """
+    return annualize_tariff_panel(build_tariff_raw_panel(config))
+
+
 # ---------------------------------------------------------------------------
-# 2. 将 HTS8 聚合到 HS2 / HS4
+# 2. 将 HTS8 聚合到 HS2 / HS4 / HS6
 # ---------------------------------------------------------------------------
 
-def build_tariff_aggregates(
+# 关税汇总的数值列：源列 -> 输出前缀
+TARIFF_ROLLUP_VALUE_COLS: Dict[str, str] = {
+    "mfn_ad_val_rate": "mfn_adval",
+    "mfn_specific_rate": "mfn_spec_q1",
+    "mfn_other_rate": "mfn_other",
+}
+TARIFF_ROLLUP_MAX_COLS: Dict[str, str] = {
+    "has_additional_duty": "has_additional_duty",
+}
+
+
+TARIFF_LEVELS: Tuple[str, ...] = ("hs2", "hs4", "hs6")
+
+
+def build_tariff_level_panels(
     tariff_yearly: pd.DataFrame,
-) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    levels: Sequence[str] = TARIFF_LEVELS,
+    trade_weights: Optional[pd.DataFrame] = None,
+    stats: Tuple[str, ...] = ("mean",),
+) -> Dict[str, pd.DataFrame]:
     """
-    从 HTS8 年度面板构造 HS2 / HS4 聚合 MFN 关税。
+    只计算 levels 中的 HS 层级聚合面板，返回 {层级: 面板}。
+
+    所需层级由 ``build_hs_rollup`` 在一次排序后同时算出；HS4 面板附带具体
+    sector 标签。stats 可包含 "mean"（简单平均，列名不带后缀）、"median"
+    （后缀 _median）和 "weighted"（贸易加权，后缀 _tw，需要 trade_weights，
+    只输出比权重粒度更粗的层级）。
 
     返回
     -------
-    tariff_hs2_panel : DataFrame
-        列：year, hs2, mfn_adval_hs2, mfn_spec_q1_hs2, mfn_other_hs2,
-             has_additional_duty_hs2
-    tariff_hs4_panel : DataFrame
-        列：year, hs4, mfn_adval_hs4, mfn_spec_q1_hs4, mfn_other_hs4,
-             has_additional_duty_hs4, sector
+    {"hs2": ..., "hs4": ..., "hs6": ...} 中 levels 所选的面板，例如 hs2 面板列：
+        year, hs2, mfn_adval_hs2, mfn_spec_q1_hs2, mfn_other_hs2,
+        has_additional_duty_hs2（及可选的 _median / _tw 列）；hs4 面板另有 sector
     """
     core_cols = [
         "year",
         "hts8",
-        "hs2",
-        "hs4",
-        "hs6",
         "mfn_ad_val_rate",
         "mfn_specific_rate",
         "mfn_other_rate",
@@ -407,41 +370,48 @@ def build_tariff_aggregates(
     missing = [c for c in core_cols if c not in tariff_yearly.columns]
     if missing:
         raise KeyError(f"Missing expected columns in tariff_yearly: {missing}")
-
-    t_core = tariff_yearly[core_cols].copy()
-
-    # HS2 聚合
-    hs2_group = t_core.groupby(["year", "hs2"], as_index=False)
-    tariff_hs2_panel = hs2_group.agg(
-        mfn_adval_hs2=("mfn_ad_val_rate", "mean"),
-        mfn_spec_q1_hs2=("mfn_specific_rate", "mean"),
-        mfn_other_hs2=("mfn_other_rate", "mean"),
-        has_additional_duty_hs2=("has_additional_duty", "max"),
-    )
-
-    # HS4 聚合
-    hs4_group = t_core.groupby(["year", "hs4"], as_index=False)
-    tariff_hs4_panel = hs4_group.agg(
-        mfn_adval_hs4=("mfn_ad_val_rate", "mean"),
-        mfn_spec_q1_hs4=("mfn_specific_rate", "mean"),
-        mfn_other_hs4=("mfn_other_rate", "mean"),
-        has_additional_duty_hs4=("has_additional_duty", "max"),
+    unknown = [lvl for lvl in levels if lvl not in TARIFF_LEVELS]
+    if unknown:
+        raise ValueError(f"Unknown HS levels {unknown}; expected a subset of {TARIFF_LEVELS}")
+
+    if "weighted" in stats and trade_weights is None:
+        print("[Rollup] No trade weights available; skipping trade-weighted averages.")
+        stats = tuple(s for s in stats if s != "weighted")
+    if "weighted" in stats and "hs2" in trade_weights.columns:  # type: ignore[union-attr]
+        print("[Rollup] Trade weights are HS2 only; trade-weighted averages need sub-HS2 DataWeb codes. Skipping.")
+        stats = tuple(s for s in stats if s != "weighted")
+
+    cube = build_hs_rollup(
+        tariff_yearly,
+        value_cols=TARIFF_ROLLUP_VALUE_COLS,
+        max_cols=TARIFF_ROLLUP_MAX_COLS,
+        levels=tuple(lvl for lvl in TARIFF_LEVELS if lvl in levels),
+        stats=stats,
+        trade_weights=trade_weights,
     )
+    panels: Dict[str, pd.DataFrame] = {}
+    for level, panel in cube.items():
+        flag_col = f"has_additional_duty_{level}"
+        panel[flag_col] = panel[flag_col].fillna(0).astype(int)
+        panels[level] = compact_panel(panel)
 
     # HS4 加具体行业标签
-    tariff_hs4_panel["sector"] = tariff_hs4_panel["hs4"].map(classify_hs4_sector_specific)
+    if "hs4" in panels:
+        load_concordance().apply_sector_labels(panels["hs4"], schemes=["sector"])
 
-    return tariff_hs2_panel, tariff_hs4_panel
+    return panels
 
 
 # ---------------------------------------------------------------------------
 # 3. DataWeb 贸易数据：宽表转长表
 # ---------------------------------------------------------------------------
 
+@instrument()
 def read_dataweb_metric(
     xlsx_path: Path,
     sheet_name: str,
     metric_name: str,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
 ) -> pd.DataFrame:
     """
     读取一个 DataWeb 导出表并转成长表。
@@ -452,6 +422,11 @@ def read_dataweb_metric(
     - 第 2 行： 表头： "Data Type", "HTS Number", "Description", "Country", "2020", ... "2025"
     - 第 3 行起：真实数据
 
+    实际读取由 ``dataweb_reader.iter_dataweb_long_chunks`` 以只读模式逐行完成，
+    表头行位置和期间列（年度或月度）自动识别，每 chunk_rows 行直接展开成长表块，
+    不再整表 melt。每块到达后立即紧凑化（编码转整数、文本转 categorical）再保留，
+    峰值内存只含一个未紧凑化的块。月度导出按年汇总，下游仍是年度长表。
+
     参数
     ----------
     xlsx_path : Path
@@ -459,239 +434,131 @@ def read_dataweb_metric(
         "FAS Value" 或 "General Import Charges"
     metric_name : str
         内部指标名："export_fas" 或 "import_duty"
+    chunk_rows : int
+        流式读取时每块的宽表行数
 
     返回
     -------
     长表 DataFrame，列：
-        year, hs2, description, partner_name, partner_iso3, metric, value
+        year, hs2, hts_code, description, partner_name, partner_iso3, metric, value
+    （hts_code 为导出粒度下的完整编码）
     """
-    if not xlsx_path.exists():
-        raise FileNotFoundError(f"DataWeb file not found: {xlsx_path}")
-
     print(f"[DataWeb] Reading {xlsx_path} sheet '{sheet_name}' ...")
 
-    # header=2 直接用第三行作为列名
-    df = pd.read_excel(xlsx_path, sheet_name=sheet_name, header=2)
-
-    expected_cols = ["Data Type", "HTS Number", "Description", "Country"]
-    for col in expected_cols:
-        if col not in df.columns:
-            raise KeyError(f"Expected column '{col}' not found in sheet '{sheet_name}' of {xlsx_path}")
-
-    # HTS Number -> HS2
-    df["HTS Number"] = pd.to_numeric(df["HTS Number"], errors="coerce")
-    df["hs2"] = zero_pad_series(df["HTS Number"], 2)
-
-    # 自动识别年份列（2020–2025）
-    year_cols: List[str] = []
-    for col in df.columns:
-        try:
-            year_int = int(str(col))
-        except (TypeError, ValueError):
-            continue
-        if 2020 <= year_int <= 2100:
-            year_cols.append(str(col))
-
-    if not year_cols:
-        raise ValueError(f"No year columns (like 2020, 2021, ...) found in sheet '{sheet_name}'")
-
-    id_vars = ["hs2", "Description", "Country"]
-    long = df.melt(
-        id_vars=id_vars,
-        value_vars=year_cols,
-        var_name="year",
-        value_name="value",
-    )
-
-    long["year"] = long["year"].astype(int)
-    long["value"] = pd.to_numeric(long["value"], errors="coerce").fillna(0.0)
+    chunks = [
+        compact_panel(chunk)
+        for chunk in iter_dataweb_long_chunks(xlsx_path, sheet_name, metric_name, chunk_rows=chunk_rows)
+    ]
+    if not chunks:
+        raise ValueError(f"No data rows found in sheet '{sheet_name}' of {xlsx_path}")
+    before = sum(memory_usage_mb(chunk) for chunk in chunks)
+    long = concat_compact_panels(chunks)
+    del chunks
 
-    long["metric"] = metric_name
-    long["partner_name"] = long["Country"].astype(str)
-    long["description"] = long["Description"].astype(str)
+    if "month" in long.columns:
+        keys = ["year", "hs2", "hts_code", "description", "partner_name", "metric"]
+        long = long.groupby(keys, observed=True, sort=False)["value"].sum().reset_index()
 
-    # ISO3 代码（可选）
-    long["partner_iso3"] = long["partner_name"].apply(map_country_to_iso3)
+    # ISO3 代码（可选）：每个唯一国名只解析一次，结果持久化，按类别向量化映射
+    long["partner_iso3"] = normalize_country_series(long["partner_name"])
 
     cols = [
         "year",
         "hs2",
+        "hts_code",
         "description",
         "partner_name",
         "partner_iso3",
         "metric",
         "value",
     ]
-    long = long[cols].copy()
+    long = compact_panel(long[cols])
+    print(f"[Memory] dataweb {metric_name}: {before:.1f} MB in compacted chunks -> {memory_usage_mb(long):.1f} MB")
 
     print(f"[DataWeb] Loaded {len(long)} rows for metric '{metric_name}'.")
     return long
 
 
-def build_trade_long_tables(
-    config: Dict[str, object],
-) -> Tuple[pd.DataFrame, pd.DataFrame]:
-    """
-    从 DataWeb 文件构建：
-    - exports_long (FAS Value)
-    - duties_long (General Import Charges)
-    """
-    export_path: Path = config["DATAWEB_EXPORT_XLSX"]  # type: ignore[assignment]
-    import_path: Path = config["DATAWEB_IMPORT_XLSX"]  # type: ignore[assignment]
-
-    exports_long = read_dataweb_metric(
-        export_path,
-        sheet_name="FAS Value",
-        metric_name="export_fas",
-    )
-    duties_long = read_dataweb_metric(
-        import_path,
-        sheet_name="General Import Charges",
-        metric_name="import_duty",
-    )
-
-    return exports_long, duties_long
-
-
 # ---------------------------------------------------------------------------
 # 4. 将关税并入贸易数据
 # ---------------------------------------------------------------------------
 
-def merge_tariff_trade(
-    tariff_hs2_panel: pd.DataFrame,
-    exports_long: pd.DataFrame,
-    duties_long: pd.DataFrame,
-) -> Tuple[pd.DataFrame, pd.DataFrame]:
+def trade_value_frame(trade_long: pd.DataFrame, value_name: str) -> pd.DataFrame:
     """
-    将 HS2 聚合关税合并到出口 & 关税收入面板里。
+    DataWeb 长表 -> 贸易面板的基础列：year, hs2, partner_name, partner_iso3, <value_name>。
 
-    返回
-    -------
-    trade_export_panel : year, hs2, partner_name, partner_iso3, export_fas, mfn_*_hs2...
-    trade_duty_panel   : year, hs2, partner_name, partner_iso3, import_duty, mfn_*_hs2...
-    """
-    # 出口面板
-    e = exports_long.copy()
-    e = e.rename(columns={"value": "export_fas"})
-    e = e[["year", "hs2", "partner_name", "partner_iso3", "export_fas"]]
-
-    trade_export_panel = e.merge(
-        tariff_hs2_panel,
-        how="left",
-        on=["year", "hs2"],
-        validate="m:1",
+    导出粒度细于 HS2 时（hts_code 为 HS4 / HTS10 等）同一 (year, hs2, 伙伴国) 有多行，
+    这里按 HS2 汇总，贸易面板每个 (year, hs2, partner_name) 只有一行。
+    """
+    keys = ["year", "hs2", "partner_name", "partner_iso3"]
+    return (
+        trade_long.groupby(keys, observed=True, sort=False, dropna=False)["value"]
+        .sum()
+        .rename(value_name)
+        .reset_index()
     )
 
-    # 关税收入面板
-    d = duties_long.copy()
-    d = d.rename(columns={"value": "import_duty"})
-    d = d[["year", "hs2", "partner_name", "partner_iso3", "import_duty"]]
 
-    trade_duty_panel = d.merge(
-        tariff_hs2_panel,
-        how="left",
-        on=["year", "hs2"],
-        validate="m:1",
-    )
+def build_trade_panel(
+    join_index: PanelJoinIndex,
+    trade_long: pd.DataFrame,
+    value_name: str,
+    name: str,
+) -> pd.DataFrame:
+    """
+    将聚合关税并入一张贸易面板（出口或关税收入）。
 
-    print(f"[Merge] trade_export_panel rows: {len(trade_export_panel)}")
-    print(f"[Merge] trade_duty_panel rows: {len(trade_duty_panel)}")
+    join_index 为关税面板上的 (year, code) 整数键连接索引（见 join_index.py），
+    按行号 take 关税列，结果等同于 left merge + validate="m:1"；出口和关税收入
+    两张面板共用同一个索引。
 
-    return trade_export_panel, trade_duty_panel
+    返回列：year, hs2, partner_name, partner_iso3, <value_name>, mfn_*_hs2...
+    """
+    panel = join_index.attach(trade_value_frame(trade_long, value_name))
+    print(f"[Merge] {name} rows: {len(panel)}")
+    return panel
 
 
 # ---------------------------------------------------------------------------
 # 5. 五题共用的派生变量
 # ---------------------------------------------------------------------------
 
-def add_sector_labels(
-    tariff_yearly: pd.DataFrame,
-    tariff_hs2_panel: pd.DataFrame,
-    tariff_hs4_panel: pd.DataFrame,
-    trade_export_panel: pd.DataFrame,
-    trade_duty_panel: pd.DataFrame,
-) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
-    """
-    给关税和贸易面板加上行业标签：HS4 的具体 sector，HS2 的 sector_big。
-    """
-    # HTS8 年度面板：用 hs4 映射具体行业
-    if "sector" not in tariff_yearly.columns:
-        tariff_yearly = tariff_yearly.copy()
-        tariff_yearly["sector"] = tariff_yearly["hs4"].map(classify_hs4_sector_specific)
-
-    # HS2 大类行业标签
-    for df, name in [
-        (tariff_hs2_panel, "tariff_hs2_panel"),
-        (trade_export_panel, "trade_export_panel"),
-        (trade_duty_panel, "trade_duty_panel"),
-    ]:
-        if "hs2" not in df.columns:
-            raise KeyError(f"'hs2' column not found in {name}")
-        df["sector_big"] = df["hs2"].astype(str).map(classify_hs2_sector_big)
-
-    return tariff_yearly, tariff_hs2_panel, tariff_hs4_panel, trade_export_panel, trade_duty_panel
-
-
-def build_common_features(
-    tariff_yearly: pd.DataFrame,
-    tariff_hs2_panel: pd.DataFrame,
-    tariff_hs4_panel: pd.DataFrame,
-    trade_export_panel: pd.DataFrame,
-    trade_duty_panel: pd.DataFrame,
-) -> Dict[str, pd.DataFrame]:
+def build_exports_cn_sector(trade_export_panel: pd.DataFrame) -> pd.DataFrame:
     """
-    构建五道题都要用到的统一派生数据集。
+    对中国出口（按年 × sector_big）。只用到 export_fas 和 sector_big 列，
+    因此也可直接传入加了行业标签的出口长表（不必先并入关税）。
     """
-    (
-        tariff_yearly,
-        tariff_hs2_panel,
-        tariff_hs4_panel,
-        trade_export_panel,
-        trade_duty_panel,
-    ) = add_sector_labels(
-        tariff_yearly=tariff_yearly,
-        tariff_hs2_panel=tariff_hs2_panel,
-        tariff_hs4_panel=tariff_hs4_panel,
-        trade_export_panel=trade_export_panel,
-        trade_duty_panel=trade_duty_panel,
-    )
-
-    # (1) 对中国出口（按年 × sector_big）
-    exports_CN_sector = (
+    return (
         trade_export_panel.loc[trade_export_panel["partner_name"] == "China"]
-        .groupby(["year", "sector_big"], as_index=False)["export_fas"]
+        .groupby(["year", "sector_big"], as_index=False, observed=True)["export_fas"]
         .sum()
         .rename(columns={"export_fas": "export_US_to_CN_by_sector"})
     )
 
-    # (2) 全部关税收入（按年）
-    duty_total_year = (
+
+def build_duty_total_year(trade_duty_panel: pd.DataFrame) -> pd.DataFrame:
+    """
+    全部关税收入（按年）。
+    """
+    return (
         trade_duty_panel
         .groupby("year", as_index=False)["import_duty"]
         .sum()
         .rename(columns={"import_duty": "duty_total"})
     )
 
-    # (3) 按年 × sector_big 的关税收入
-    duty_by_sector_year = (
+
+def build_duty_by_sector_year(trade_duty_panel: pd.DataFrame) -> pd.DataFrame:
+    """
+    按年 × sector_big 的关税收入。
+    """
+    return (
         trade_duty_panel
-        .groupby(["year", "sector_big"], as_index=False)["import_duty"]
+        .groupby(["year", "sector_big"], as_index=False, observed=True)["import_duty"]
         .sum()
         .rename(columns={"import_duty": "duty_by_sector"})
     )
 
-    outputs: Dict[str, pd.DataFrame] = {
-        "tariff_yearly": tariff_yearly,
-        "tariff_hs2_panel": tariff_hs2_panel,
-        "tariff_hs4_panel": tariff_hs4_panel,
-        "trade_export_panel": trade_export_panel,
-        "trade_duty_panel": trade_duty_panel,
-        "exports_CN_sector": exports_CN_sector,
-        "duty_total_year": duty_total_year,
-        "duty_by_sector_year": duty_by_sector_year,
-    }
-    return outputs
-
 
 # ---------------------------------------------------------------------------
 # 6. 保存结果 & 基础质量检查
@@ -700,51 +567,58 @@ def build_common_features(
 def save_all_outputs(
     outputs: Dict[str, pd.DataFrame],
     output_dir: Path,
+    output_format: str = "csv",
+    partition_by_hs2: bool = False,
 ) -> None:
     """
-    将所有 DataFrame 保存为 CSV。
+    保存所有 DataFrame。
+
+    output_format:
+    - "csv"     : 每个输出一个 CSV（编码列恢复为补零字符串）
+    - "parquet" : 每个输出一个按 year（可选 hs2）分区的压缩 Parquet 目录，附 _schema.json
+    - "both"    : 两者都写
     """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format '{output_format}'; expected one of {OUTPUT_FORMATS}")
+
     ensure_output_dir(output_dir)
     for name, df in outputs.items():
-        file_path = output_dir / f"{name}.csv"
-        print(f"[Save] Writing {file_path} ({len(df)} rows, {len(df.columns)} columns)")
-        df.to_csv(file_path, index=False)
+        print(f"[Save] Writing {name} ({len(df)} rows, {len(df.columns)} columns) as {output_format}")
+        if output_format in ("csv", "both"):
+            write_csv_output(df, output_dir, name)
+        if output_format in ("parquet", "both"):
+            write_parquet_output(df, output_dir, name, partition_by_hs2=partition_by_hs2)
 
 
-def run_basic_quality_checks(
+def run_quality_checks(
     outputs: Dict[str, pd.DataFrame],
     output_dir: Path,
+    rules_path: Path = DEFAULT_VALIDATION_RULES_PATH,
+    tariff_raw: Optional[pd.DataFrame] = None,
 ) -> None:
     """
-    做一些基础检查和简单图表：
-    - MFN 从价税率是否在 [0,1]
-    - 关税收入是否为非负
+    质量检查和简单图表：
+    - 按 rules_path 中的规则校验各面板（税率范围、键重复、日期区间、编码格式、同比跳变等），
+      违规行写入 validation_violations.csv，每条规则的计数与耗时写入 validation_summary.csv。
+      tariff_raw（年度化之前的原始记录）给出时作为 "tariff_raw" 表参与校验
+      （生效区间重叠只能在年度化之前检查）
     - 按年关税收入时间序列折线图
     """
     ensure_output_dir(output_dir)
 
-    tariff_yearly = outputs["tariff_yearly"]
-    trade_duty_panel = outputs["trade_duty_panel"]
-    duty_total_year = outputs["duty_total_year"]
+    # 6.1 规则校验
+    tables = dict(outputs)
+    if tariff_raw is not None:
+        tables["tariff_raw"] = tariff_raw
+    violations, summary = run_validation(tables, load_validation_rules(rules_path))
+    write_validation_report(violations, summary, output_dir)
+
+    # 6.2 按年关税收入时间序列图（按目标只构建部分输出时可能不存在）
+    duty_total_year = outputs.get("duty_total_year")
+    if duty_total_year is not None and not duty_total_year.empty:
+        # matplotlib 只在画图时导入（约 0.5s），--targets 只构建数据表时不加载
+        import matplotlib.pyplot as plt
 
-    # 6.1 MFN 税率范围检查
-    if "mfn_ad_val_rate" in tariff_yearly.columns:
-        bad_mfn = tariff_yearly[
-            (tariff_yearly["mfn_ad_val_rate"] < 0)
-            | (tariff_yearly["mfn_ad_val_rate"] > 1)
-        ]
-        bad_mfn_path = output_dir / "check_bad_mfn_rates.csv"
-        print(f"[Check] MFN rates outside [0,1]: {len(bad_mfn)} rows -> {bad_mfn_path}")
-        bad_mfn.to_csv(bad_mfn_path, index=False)
-
-    # 6.2 关税收入非负检查
-    bad_duty = trade_duty_panel[trade_duty_panel["import_duty"] < 0]
-    bad_duty_path = output_dir / "check_negative_duty.csv"
-    print(f"[Check] Negative import duties: {len(bad_duty)} rows -> {bad_duty_path}")
-    bad_duty.to_csv(bad_duty_path, index=False)
-
-    # 6.3 按年关税收入时间序列图
-    if not duty_total_year.empty:
         fig, ax = plt.subplots(figsize=(8, 5))
         ax.plot(duty_total_year["year"], duty_total_year["duty_total"], marker="o")
         ax.set_xlabel("Year")
@@ -762,49 +636,277 @@ def run_basic_quality_checks(
 # 7. 主入口
 # ---------------------------------------------------------------------------
 
-def main() -> None:
-    """
-    主流程：
-    1. 构建年度 HTS8 关税面板
-    2. 聚合到 HS2 / HS4
-    3. 从 DataWeb 构建贸易长表
-    4. 合并关税与贸易
-    5. 构建五题共用的派生数据
-    6. 保存结果并做基础质量检查
-    """
-    config = build_default_config()
+WASH_OUTPUTS: Tuple[str, ...] = (
+    "tariff_yearly",
+    "tariff_hs2_panel",
+    "tariff_hs4_panel",
+    "tariff_hs6_panel",
+    "trade_export_panel",
+    "trade_duty_panel",
+    "exports_CN_sector",
+    "duty_total_year",
+    "duty_by_sector_year",
+)
+# 可选的分析阶段，也可以作为目标直接点名（点名时不看对应的开关配置）
+WASH_EXTRA_TARGETS: Tuple[str, ...] = ("duty_scenarios", "tariff_changelog")
+WASH_TARGETS: Tuple[str, ...] = WASH_OUTPUTS + WASH_EXTRA_TARGETS
+
+
+def build_wash_stages(
+    config: Dict[str, object],
+    targets: Optional[Sequence[str]] = None,
+) -> List[Stage]:
+    """
+    主流程的阶段依赖图，每个输出表是一个阶段：
+    1. 关税面板、出口 DataWeb、关税收入 DataWeb 三个读取阶段互不依赖，并发执行
+    2. HS2 / HS4 / HS6 聚合（含贸易加权），只算用得到的层级
+    3. 合并关税与贸易（trade_export_panel / trade_duty_panel，共用一个 HS2 连接索引）
+    4. 五题共用的派生数据：exports_CN_sector、duty_total_year、duty_by_sector_year
+       只依赖 DataWeb 长表（关税按 left join 并入，不改变行），不必等关税面板
+    5. 保存结果（可选写入 SQLite 分析库）并做质量检查
+    6. 可选：关税收入反事实情景（DUTY_SCENARIOS）、税则变更日志（TARIFF_CHANGELOG）
+
+    targets 为 None 时构建全部输出（及配置中打开的可选阶段）；否则只保留
+    targets（取自 WASH_TARGETS）及其上游阶段，例如只要 duty_total_year 时
+    不会读取关税 Excel 和出口 DataWeb 文件。
+    """
+    if targets is not None:
+        unknown = [t for t in targets if t not in WASH_TARGETS]
+        if unknown:
+            raise ValueError(f"Unknown wash targets {unknown}; expected a subset of {WASH_TARGETS}")
+        wanted_outputs = [name for name in WASH_OUTPUTS if name in targets]
+        extras = [name for name in WASH_EXTRA_TARGETS if name in targets]
+    else:
+        wanted_outputs = list(WASH_OUTPUTS)
+        extras = [
+            name
+            for name, key in zip(WASH_EXTRA_TARGETS, ("DUTY_SCENARIOS", "TARIFF_CHANGELOG"))
+            if config.get(key, False)
+        ]
 
     output_dir: Path = config["OUTPUT_DIR"]  # type: ignore[assignment]
-    ensure_output_dir(output_dir)
+    chunk_rows = int(config.get("DATAWEB_CHUNK_ROWS", DEFAULT_CHUNK_ROWS))  # type: ignore[arg-type]
+    weight_metric = config.get("ROLLUP_WEIGHT_METRIC", "export_fas")
+    stats = tuple(config.get("ROLLUP_STATS", ("mean",)))  # type: ignore[arg-type]
+    if "duty_scenarios" in extras and "median" not in stats:
+        # 情景模拟的基准税率默认是 HS2 中位 MFN 税率（mfn_adval_hs2_median）
+        _, _, base = load_duty_scenarios(config["DUTY_SCENARIOS_PATH"])  # type: ignore[arg-type]
+        rate_col = str(base.get("rate_col", DEFAULT_RATE_COL))
+        if rate_col.endswith("_median"):
+            print(f"[Rollup] Duty scenarios use '{rate_col}'; adding median to ROLLUP_STATS.")
+            stats = (*stats, "median")
+    weighted = "weighted" in stats
+    concordance_path: Path = config["CONCORDANCE_PATH"]  # type: ignore[assignment]
+    # 需要计算的 HS 层级在裁剪依赖图之后确定
+    levels: List[str] = []
+
+    def _weights(trade_long: pd.DataFrame) -> pd.DataFrame:
+        return build_trade_weights(trade_long, code_col=finest_trade_level(trade_long))
+
+    def _levels(tariff_yearly: pd.DataFrame, trade_weights: Optional[pd.DataFrame] = None) -> Dict[str, pd.DataFrame]:
+        return build_tariff_level_panels(tariff_yearly, levels=levels, trade_weights=trade_weights, stats=stats)
+
+    def _labelled(df: pd.DataFrame) -> pd.DataFrame:
+        load_concordance(concordance_path).apply_sector_labels(df)
+        return df
+
+    def _tariff_yearly(tariff_yearly: pd.DataFrame) -> pd.DataFrame:
+        return _labelled(tariff_yearly.copy())
+
+    def _tariff_level(level: str, panels: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        return _labelled(panels[level].copy())
+
+    def _join_index(panels: Dict[str, pd.DataFrame]) -> PanelJoinIndex:
+        return PanelJoinIndex(panels["hs2"], level="hs2")
+
+    def _trade_panel(
+        name: str,
+        value_name: str,
+        join_index: PanelJoinIndex,
+        trade_long: pd.DataFrame,
+    ) -> pd.DataFrame:
+        return _labelled(build_trade_panel(join_index, trade_long, value_name, name))
+
+    def _exports_cn(exports_long: pd.DataFrame) -> pd.DataFrame:
+        return build_exports_cn_sector(_labelled(trade_value_frame(exports_long, "export_fas")))
+
+    def _duty_total(duties_long: pd.DataFrame) -> pd.DataFrame:
+        return build_duty_total_year(trade_value_frame(duties_long, "import_duty"))
+
+    def _duty_by_sector(duties_long: pd.DataFrame) -> pd.DataFrame:
+        return build_duty_by_sector_year(_labelled(trade_value_frame(duties_long, "import_duty")))
+
+    def _collect(*tables: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        return dict(zip(wanted_outputs, tables))
+
+    def _save(outputs: Dict[str, pd.DataFrame]) -> None:
+        save_all_outputs(
+            outputs,
+            output_dir=output_dir,
+            output_format=str(config.get("OUTPUT_FORMAT", "csv")),
+            partition_by_hs2=bool(config.get("OUTPUT_PARTITION_HS2", False)),
+        )
+        if config.get("SQLITE_STORE", False):
+            write_sqlite_store(outputs, db_path=config["SQLITE_DB_PATH"])  # type: ignore[arg-type]
+
+    def _check(outputs: Dict[str, pd.DataFrame], tariff_raw: Optional[pd.DataFrame] = None) -> None:
+        run_quality_checks(
+            outputs,
+            output_dir=output_dir,
+            rules_path=config.get("VALIDATION_RULES_PATH", DEFAULT_VALIDATION_RULES_PATH),  # type: ignore[arg-type]
+            tariff_raw=tariff_raw,
+        )
+
+    def _scenarios(trade_duty_panel: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        return run_duty_scenarios(
+            trade_duty_panel,
+            output_dir=output_dir,
+            scenarios_path=config["DUTY_SCENARIOS_PATH"],  # type: ignore[arg-type]
+            concordance=load_concordance(concordance_path),
+        )
+
+    def _changelog(tariff_yearly: pd.DataFrame) -> TariffChangeLog:
+        log = TariffChangeLog.from_panel(tariff_yearly)
+        path = write_changelog(log, output_dir / "tariff_changelog")
+        print(
+            f"[Tariff] Change log: {log.memory_usage_mb():.1f} MB "
+            f"(full panel {memory_usage_mb(tariff_yearly):.1f} MB) -> {path}"
+        )
+        print(log.summary().to_string(index=False))
+        return log
+
+    # 只有 tariff_yearly 和变更日志保留全部关税列；其余输出只需要 HS 汇总用到的核心列
+    tariff_config = config
+    if (
+        config.get("TARIFF_KEEP_COLUMNS") is None
+        and "tariff_yearly" not in wanted_outputs
+        and "tariff_changelog" not in extras
+    ):
+        tariff_config = {**config, "TARIFF_KEEP_COLUMNS": TARIFF_CORE_COLUMNS}
+
+    weight_source = "exports_long" if weight_metric == "export_fas" else "duties_long"
+    stages = [
+        # 读取阶段：提交到工作池
+        Stage("tariff_raw", partial(build_tariff_raw_panel, tariff_config)),
+        Stage(
+            "exports_long",
+            partial(
+                read_dataweb_metric,
+                config["DATAWEB_EXPORT_XLSX"],
+                sheet_name="FAS Value",
+                metric_name="export_fas",
+                chunk_rows=chunk_rows,
+            ),
+        ),
+        Stage(
+            "duties_long",
+            partial(
+                read_dataweb_metric,
+                config["DATAWEB_IMPORT_XLSX"],
+                sheet_name="General Import Charges",
+                metric_name="import_duty",
+                chunk_rows=chunk_rows,
+            ),
+        ),
+        # 下游阶段：在主进程执行
+        Stage("tariff_source", annualize_tariff_panel, deps=("tariff_raw",), inline=True),
+        Stage("trade_weights", _weights, deps=(weight_source,), inline=True),
+        Stage(
+            "tariff_levels",
+            _levels,
+            deps=("tariff_source", "trade_weights") if weighted else ("tariff_source",),
+            inline=True,
+        ),
+        Stage("tariff_yearly", _tariff_yearly, deps=("tariff_source",), inline=True),
+        *[
+            Stage(f"tariff_{level}_panel", partial(_tariff_level, level), deps=("tariff_levels",), inline=True)
+            for level in TARIFF_LEVELS
+        ],
+        # 两张贸易面板共用同一个 HS2 连接索引
+        Stage("tariff_join_index", _join_index, deps=("tariff_levels",), inline=True),
+        Stage(
+            "trade_export_panel",
+            partial(_trade_panel, "trade_export_panel", "export_fas"),
+            deps=("tariff_join_index", "exports_long"),
+            inline=True,
+        ),
+        Stage(
+            "trade_duty_panel",
+            partial(_trade_panel, "trade_duty_panel", "import_duty"),
+            deps=("tariff_join_index", "duties_long"),
+            inline=True,
+        ),
+        Stage("exports_CN_sector", _exports_cn, deps=("exports_long",), inline=True),
+        Stage("duty_total_year", _duty_total, deps=("duties_long",), inline=True),
+        Stage("duty_by_sector_year", _duty_by_sector, deps=("duties_long",), inline=True),
+        Stage("outputs", _collect, deps=tuple(wanted_outputs), inline=True),
+        Stage("save", _save, deps=("outputs",), inline=True),
+        Stage("quality_checks", _check, deps=("outputs",), inline=True),
+        Stage("duty_scenarios", _scenarios, deps=("trade_duty_panel",), inline=True),
+        Stage("tariff_changelog", _changelog, deps=("tariff_source",), inline=True),
+    ]
+    stages = select_stages(stages, ["save", "quality_checks", *extras])
+
+    selected = {stage.name for stage in stages}
+    # 关税原始记录已在图中时，质量检查也校验它（只要 DataWeb 输出时不为此读取关税 Excel）
+    if "tariff_raw" in selected:
+        for stage in stages:
+            if stage.name == "quality_checks":
+                stage.deps = (*stage.deps, "tariff_raw")
+    levels.extend(
+        level
+        for level in TARIFF_LEVELS
+        if f"tariff_{level}_panel" in selected
+        or (level == "hs2" and "tariff_join_index" in selected)
+    )
+    return stages
 
-    # 1. 关税面板
-    tariff_yearly = build_tariff_yearly_panel(config)
 
-    # 2. HS2 / HS4 聚合
-    tariff_hs2_panel, tariff_hs4_panel = build_tariff_aggregates(tariff_yearly)
+def run_wash_pipeline(
+    config: Dict[str, object],
+    targets: Optional[Sequence[str]] = None,
+) -> Dict[str, pd.DataFrame]:
+    """
+    按依赖图执行清洗流程，打印各阶段耗时，返回派生数据字典。
 
-    # 3. 贸易长表
-    exports_long, duties_long = build_trade_long_tables(config)
+    targets 未给出时取 config["TARGETS"]；两者都为 None 时构建全部输出。
+    """
+    ensure_output_dir(config["OUTPUT_DIR"])  # type: ignore[arg-type]
+    if targets is None:
+        targets = config.get("TARGETS")  # type: ignore[assignment]
 
-    # 4. 合并关税与贸易
-    trade_export_panel, trade_duty_panel = merge_tariff_trade(
-        tariff_hs2_panel=tariff_hs2_panel,
-        exports_long=exports_long,
-        duties_long=duties_long,
+    results, timings = run_stage_graph(
+        build_wash_stages(config, targets=targets),
+        max_workers=int(config.get("PIPELINE_WORKERS", 3)),  # type: ignore[arg-type]
+        executor=str(config.get("PIPELINE_EXECUTOR", "process")),
     )
-
-    # 5. 构建统一派生数据
-    outputs = build_common_features(
-        tariff_yearly=tariff_yearly,
-        tariff_hs2_panel=tariff_hs2_panel,
-        tariff_hs4_panel=tariff_hs4_panel,
-        trade_export_panel=trade_export_panel,
-        trade_duty_panel=trade_duty_panel,
+    print_stage_timings(timings)
+    return results["outputs"]  # type: ignore[return-value]
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="APMCM 2025 Problem C data cleaning")
+    parser.add_argument(
+        "--targets",
+        nargs="+",
+        choices=WASH_TARGETS,
+        metavar="TARGET",
+        help=f"Only build these outputs and their upstream stages (choices: {', '.join(WASH_TARGETS)})",
     )
+    return parser.parse_args(argv)
 
-    # 6. 保存并检查
-    save_all_outputs(outputs, output_dir=output_dir)
-    run_basic_quality_checks(outputs, output_dir=output_dir)
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """
+    主流程：见 build_wash_stages。例如只刷新两张小表：
+
+        python datawash.py --targets exports_CN_sector duty_total_year
+    """
+    args = parse_args(argv)
+    config = build_default_config()
+    if args.targets:
+        config["TARGETS"] = args.targets
+    run_wash_pipeline(config)
 
     print("[Done] All data cleaned and saved.")
 
@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+DataWeb 导出表的流式读取器
+
+``pd.read_excel`` 会把整张 sheet 读进内存，再整体 melt 成长表；生产环境的 DataWeb
+数据（HTS10 × 全部伙伴国 × 月度）远大于 wash/data 里的样例，这种读法会耗尽内存。
+
+本模块用 openpyxl 的只读模式逐行遍历 sheet：
+
+- 自动定位表头行（包含 "Data Type", "HTS Number", "Description", "Country" 的那一行）
+- 自动识别期间列：年度（"2024"）或月度（"2024-01"、"2024/1"、"Jan 2024"、
+  "January 2024"，或 Excel 日期单元格）；同一张表不能混用年度和月度列
+- 每累计 chunk_rows 个宽表行，就向量化地展开为一个长表块并 yield
+
+长表保留完整的 HTS 编码（hts_code，HS2 / HS4 / HS6 / HTS8 / HTS10 取决于导出粒度），
+hs2 由它截取。月度导出的长表多一个 month 列（年度导出没有）。
+
+因此读取阶段的峰值内存只和 chunk_rows 有关，与 sheet 大小无关。
+"""
+
+from __future__ import annotations
+
+import calendar
+import datetime as dt
+import re
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import openpyxl
+
+
+DATAWEB_ID_COLUMNS: Tuple[str, ...] = ("Data Type", "HTS Number", "Description", "Country")
+
+# 表头最多出现在前多少行
+HEADER_SEARCH_ROWS = 50
+
+DEFAULT_CHUNK_ROWS = 50_000
+
+# 期间列的年份范围（与原读取器的年份列识别规则一致）
+PERIOD_MIN_YEAR = 2020
+PERIOD_MAX_YEAR = 2100
+
+# 月份名（英文全称和缩写，小写）-> 月份
+MONTH_NUMBERS = {
+    **{name.lower(): i for i, name in enumerate(calendar.month_name) if name},
+    **{name.lower(): i for i, name in enumerate(calendar.month_abbr) if name},
+    "sept": 9,
+}
+
+_YEAR_RE = re.compile(r"^(\d{4})$")
+_YEAR_MONTH_RE = re.compile(r"^(\d{4})\s*[-/.]\s*(\d{1,2})$")
+_MONTH_YEAR_RE = re.compile(r"^([A-Za-z]+)\.?[\s\-]+(\d{4})$")
+
+
+def parse_period_label(label: object) -> Optional[Tuple[int, int]]:
+    """
+    表头单元格 -> (年, 月)；年度列的月为 0。不是期间列时返回 None。
+    """
+    if isinstance(label, dt.date):
+        year, month = label.year, label.month
+    else:
+        text = str(label).strip() if label is not None else ""
+        if isinstance(label, float) and label.is_integer():
+            text = str(int(label))
+        match = _YEAR_RE.match(text)
+        if match:
+            year, month = int(match.group(1)), 0
+        elif _YEAR_MONTH_RE.match(text):
+            match = _YEAR_MONTH_RE.match(text)
+            year, month = int(match.group(1)), int(match.group(2))
+        elif _MONTH_YEAR_RE.match(text):
+            match = _MONTH_YEAR_RE.match(text)
+            month = MONTH_NUMBERS.get(match.group(1).lower(), -1)
+            year = int(match.group(2))
+        else:
+            return None
+    if not PERIOD_MIN_YEAR <= year <= PERIOD_MAX_YEAR or not 0 <= month <= 12:
+        return None
+    return year, month
+
+
+def is_year_label(label: object) -> bool:
+    """
+    判断表头单元格是否为年度列（如 "2020"）。
+    """
+    period = parse_period_label(label)
+    return period is not None and period[1] == 0
+
+
+def find_period_columns(header: Sequence[object]) -> Tuple[List[int], np.ndarray, np.ndarray]:
+    """
+    表头中的期间列：(列下标, 年, 月)，年度列的月为 0。
+    年度列和月度列混在一起时报错（同时读会重复计数）。
+    """
+    found = [(i, period) for i, period in ((i, parse_period_label(v)) for i, v in enumerate(header)) if period]
+    positions = [i for i, _ in found]
+    years = np.asarray([p[0] for _, p in found], dtype=np.int64)
+    months = np.asarray([p[1] for _, p in found], dtype=np.int64)
+    if months.size and (months == 0).any() and (months > 0).any():
+        raise ValueError("DataWeb sheet mixes annual and monthly period columns")
+    return positions, years, months
+
+
+def normalize_hts_codes(codes: np.ndarray) -> np.ndarray:
+    """
+    规范化 HTS Number：去掉 ".0" 和空白；数值型编码按偶数位左侧补零
+    （Excel 会吃掉前导 0，例如 101 -> "0101"，1 -> "01"）。
+    """
+    text = pd.Series(codes, dtype=object).astype(str).str.strip().str.replace(r"\.0$", "", regex=True)
+    lengths = text.str.len()
+    padded_len = lengths + (lengths % 2)
+    out = [c.zfill(n) if c.isdigit() else c for c, n in zip(text.tolist(), padded_len.tolist())]
+    return np.asarray(out, dtype=object)
+
+
+def _locate_header(
+    rows: Iterator[Tuple[object, ...]],
+    sheet_name: str,
+    xlsx_path: Path,
+) -> Tuple[List[object], int]:
+    """
+    从行迭代器中找到表头行，返回表头列表和其行号（0 起）。
+    文本单元格去掉首尾空白，日期单元格（月度列）原样保留。
+    """
+    for idx, row in enumerate(rows):
+        if idx >= HEADER_SEARCH_ROWS:
+            break
+        labels = [v if isinstance(v, dt.date) else ("" if v is None else str(v).strip()) for v in row]
+        if all(col in labels for col in DATAWEB_ID_COLUMNS):
+            return labels, idx
+    raise KeyError(
+        f"Expected columns {list(DATAWEB_ID_COLUMNS)} not found in the first "
+        f"{HEADER_SEARCH_ROWS} rows of sheet '{sheet_name}' of {xlsx_path}"
+    )
+
+
+def melt_dataweb_rows(
+    buffer: Sequence[Sequence[object]],
+    id_pos: Sequence[int],
+    period_pos: Sequence[int],
+    years: np.ndarray,
+    months: np.ndarray,
+    metric_name: str,
+) -> pd.DataFrame:
+    """
+    把一批宽表行向量化展开为长表：id 列 repeat，期间 tile，数值 ravel。
+
+    id_pos 为 DATAWEB_ID_COLUMNS 各列的下标，period_pos / years / months 见
+    find_period_columns。返回列：year, [month], hs2, hts_code, description,
+    partner_name, metric, value（month 只在月度表中出现）。
+    """
+    width = max(max(id_pos), max(period_pos)) + 1
+    block = np.empty((len(buffer), width), dtype=object)
+    for i, row in enumerate(buffer):
+        n = min(len(row), width)
+        block[i, :n] = row[:n]
+
+    n_rows = block.shape[0]
+    n_periods = years.size
+    codes = normalize_hts_codes(block[:, id_pos[1]])
+    hs2 = np.asarray([c[:2] for c in codes], dtype=object)
+
+    values = pd.to_numeric(pd.Series(block[:, period_pos].ravel()), errors="coerce").fillna(0.0)
+
+    columns = {"year": np.tile(years, n_rows)}
+    if (months > 0).any():
+        columns["month"] = np.tile(months, n_rows)
+    columns.update(
+        {
+            "hs2": np.repeat(hs2, n_periods),
+            "hts_code": np.repeat(codes, n_periods),
+            "description": np.repeat(block[:, id_pos[2]].astype(str), n_periods),
+            "partner_name": np.repeat(block[:, id_pos[3]].astype(str), n_periods),
+            "metric": metric_name,
+            "value": values.to_numpy(dtype=float),
+        }
+    )
+    return pd.DataFrame(columns)
+
+
+def iter_dataweb_long_chunks(
+    xlsx_path: Path,
+    sheet_name: str,
+    metric_name: str,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> Iterator[pd.DataFrame]:
+    """
+    以只读模式逐行读取 DataWeb sheet，按块产出长表。
+
+    参数
+    ----------
+    xlsx_path : Path
+    sheet_name : str
+        "FAS Value" 或 "General Import Charges"
+    metric_name : str
+        内部指标名："export_fas" 或 "import_duty"
+    chunk_rows : int
+        每块包含的宽表行数；长表块行数 = chunk_rows × 期间数。
+
+    产出
+    -------
+    长表 DataFrame 块，列：year, [month], hs2, hts_code, description, partner_name,
+    metric, value（见 melt_dataweb_rows；partner_iso3 由调用方按唯一国名统一映射）
+    """
+    if not xlsx_path.exists():
+        raise FileNotFoundError(f"DataWeb file not found: {xlsx_path}")
+    if chunk_rows <= 0:
+        raise ValueError(f"chunk_rows must be positive, got {chunk_rows}")
+
+    wb = openpyxl.load_workbook(xlsx_path, read_only=True, data_only=True)
+    try:
+        if sheet_name not in wb.sheetnames:
+            raise KeyError(f"Sheet '{sheet_name}' not found in {xlsx_path}")
+        ws = wb[sheet_name]
+        # DataWeb 导出文件的 dimension 元数据不可靠，只读模式下需重置后才能读到全部行
+        ws.reset_dimensions()
+        rows = ws.iter_rows(values_only=True)
+
+        header, _ = _locate_header(rows, sheet_name, xlsx_path)
+        id_pos = [header.index(col) for col in DATAWEB_ID_COLUMNS]
+        period_pos, years, months = find_period_columns(header)
+        if not period_pos:
+            raise ValueError(
+                f"No period columns (like 2020, 2024-01 or Jan 2024) found in sheet '{sheet_name}'"
+            )
+
+        buffer: List[Tuple[object, ...]] = []
+        for row in rows:
+            if not row or len(row) <= id_pos[1] or str(row[id_pos[1]] or "").strip() == "":
+                # 空行或尾部 "Total:" 汇总行（HTS Number 为空）
+                continue
+            buffer.append(row)
+            if len(buffer) >= chunk_rows:
+                yield melt_dataweb_rows(buffer, id_pos, period_pos, years, months, metric_name)
+                buffer = []
+        if buffer:
+            yield melt_dataweb_rows(buffer, id_pos, period_pos, years, months, metric_name)
+    finally:
+        wb.close()
+
@@ -0,0 +1,342 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+美国关税收入反事实模拟（HS2 × 伙伴国 × 年份）
+
+在清洗好的 trade_duty_panel 上施加关税情景，计算每个 章 × 伙伴国 × 年份 的
+反事实关税收入和进口额。面板只在构造模拟器时整理一次为数组，之后每个情景都是
+对这些数组的向量运算，多个情景按批堆成 (情景数, 行数) 矩阵一起算、一起汇总。
+
+模型（逐行）：
+    t0 : 基准从价税率（rate_col，默认 HS2 中位 MFN 税率）
+    V0 : 基准进口额；面板无进口额列时用 R0 / max(t0, min_rate) 反推
+    t1 : 情景税率
+    V1 = V0 * ((1 + t1) / (1 + t0)) ^ (-ε_章)
+    R1 = R0 * V1 / V0 + (t1 - t0) * V1
+
+即原有的关税收入（含附加税、其他费用）随进口量等比例变化，税率变化部分按新进口额
+计征；当 R0 = t0 * V0 时退化为 R1 = t1 * V1。缺少基准税率的行保持原值。
+
+DataWeb 只提供 General Import Charges，没有进口额时反推的 V0 只是近似：R0 还包含
+301 等附加税，而很多章的中位 MFN 税率为 0，因此 min_rate 默认取接近美国整体有效
+税率的 3%，避免进口额被放大。有真实进口额时应通过 value_col 传入。
+
+情景配置见 wash/config/duty_scenarios.json，每个情景由若干冲击（shock）组成：
+
+    {"chapters": [85], "partners": ["CHN"], "sectors": [...], "years": [2025],
+     "mode": "add" | "set" | "scale", "value": 0.25}
+
+未给出的维度不限；同一情景内的冲击按顺序依次作用。
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from concordance import Concordance, codes_to_int, load_concordance
+from output_store import write_csv_output
+
+
+DEFAULT_SCENARIOS_PATH = Path(__file__).resolve().parent / "config" / "duty_scenarios.json"
+
+SHOCK_MODES = ("add", "set", "scale")
+
+# 默认基准税率列：HS2 中位 MFN 税率（需要 datawash 的 ROLLUP_STATS 包含 "median"）
+DEFAULT_RATE_COL = "mfn_adval_hs2_median"
+
+# 每批同时计算的情景数（批内矩阵大小 = 批大小 × 面板行数）
+DEFAULT_BATCH_SIZE = 64
+
+# 未能解析为 ISO3 的伙伴国（partner_iso3 缺失）统一记为该标签，按伙伴国汇总时单独成组
+UNKNOWN_PARTNER = "UNK"
+
+
+class TariffShock:
+    """
+    作用于一部分 (章, 伙伴国, 行业, 年份) 的税率变化。
+    """
+
+    def __init__(
+        self,
+        mode: str,
+        value: float,
+        chapters: Optional[Sequence[int]] = None,
+        partners: Optional[Sequence[str]] = None,
+        sectors: Optional[Sequence[str]] = None,
+        years: Optional[Sequence[int]] = None,
+    ) -> None:
+        if mode not in SHOCK_MODES:
+            raise ValueError(f"Unknown shock mode '{mode}', expected one of {SHOCK_MODES}")
+        self.mode = mode
+        self.value = float(value)
+        self.chapters = [int(c) for c in chapters] if chapters else None
+        self.partners = [str(p) for p in partners] if partners else None
+        self.sectors = [str(s) for s in sectors] if sectors else None
+        self.years = [int(y) for y in years] if years else None
+
+    @classmethod
+    def from_config(cls, spec: Dict[str, object]) -> "TariffShock":
+        return cls(
+            mode=str(spec.get("mode", "add")),
+            value=float(spec["value"]),  # type: ignore[arg-type]
+            chapters=spec.get("chapters"),  # type: ignore[arg-type]
+            partners=spec.get("partners"),  # type: ignore[arg-type]
+            sectors=spec.get("sectors"),  # type: ignore[arg-type]
+            years=spec.get("years"),  # type: ignore[arg-type]
+        )
+
+
+class Scenario:
+    """
+    一个关税情景：有序的冲击列表。
+    """
+
+    def __init__(self, name: str, shocks: Sequence[TariffShock]) -> None:
+        self.name = name
+        self.shocks = list(shocks)
+
+    @classmethod
+    def from_config(cls, spec: Dict[str, object]) -> "Scenario":
+        shocks = [TariffShock.from_config(s) for s in spec.get("shocks", [])]  # type: ignore[union-attr]
+        return cls(str(spec["name"]), shocks)
+
+
+def chapter_elasticities(default: float, chapters: Optional[Dict[object, float]] = None) -> np.ndarray:
+    """
+    长度 100 的进口需求弹性数组（下标为 HS2 章号）。
+    """
+    eps = np.full(100, float(default), dtype=np.float64)
+    for chapter, value in (chapters or {}).items():
+        eps[int(chapter)] = float(value)  # type: ignore[call-overload]
+    return eps
+
+
+def load_duty_scenarios(
+    path: Path = DEFAULT_SCENARIOS_PATH,
+) -> Tuple[List[Scenario], np.ndarray, Dict[str, object]]:
+    """
+    读取情景配置，返回 (情景列表, 各章弹性数组, 基准设定)。
+    """
+    if not path.exists():
+        raise FileNotFoundError(f"Duty scenario config not found: {path}")
+    spec = json.loads(path.read_text(encoding="utf-8"))
+    elasticity = spec.get("elasticity", {})
+    eps = chapter_elasticities(elasticity.get("default", 1.0), elasticity.get("chapters"))
+    scenarios = [Scenario.from_config(s) for s in spec.get("scenarios", [])]
+    names = [sc.name for sc in scenarios]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate scenario names in {path}")
+    return scenarios, eps, dict(spec.get("base", {}))
+
+
+class DutySimulator:
+    """
+    在 HS2 关税收入面板上批量计算反事实关税收入与进口额。
+    """
+
+    def __init__(
+        self,
+        panel: pd.DataFrame,
+        elasticities: np.ndarray,
+        rate_col: str = DEFAULT_RATE_COL,
+        value_col: Optional[str] = None,
+        duty_col: str = "import_duty",
+        min_rate: float = 0.03,
+        concordance: Optional[Concordance] = None,
+        sector_scheme: str = "sector_big",
+    ) -> None:
+        for col in ("year", "hs2", "partner_iso3", duty_col, rate_col):
+            if col not in panel.columns:
+                raise KeyError(f"Column '{col}' not found in duty panel")
+
+        self.panel = panel.reset_index(drop=True)
+        self.duty_col = duty_col
+
+        # 维度下标
+        self.hs2 = np.clip(codes_to_int(self.panel["hs2"]), -1, 99)
+        self.year_values, self.year_idx = np.unique(self.panel["year"].to_numpy(dtype=np.int64), return_inverse=True)
+        partner_iso3 = self.panel["partner_iso3"].astype(object).fillna(UNKNOWN_PARTNER)
+        partner_idx, partner_values = pd.factorize(partner_iso3)
+        self.partner_idx = partner_idx
+        self.partner_values = [str(p) for p in partner_values]
+
+        concordance = concordance or load_concordance()
+        scheme = concordance.schemes[sector_scheme]
+        self.sector_labels = list(scheme.labels)
+        self.sector_idx = np.asarray(scheme.lookup(self.hs2).codes, dtype=np.int64)
+
+        # 基准税率、关税收入与进口额
+        self.duty0 = pd.to_numeric(self.panel[duty_col], errors="coerce").fillna(0.0).to_numpy(dtype=np.float64)
+        self.rate0 = pd.to_numeric(self.panel[rate_col], errors="coerce").to_numpy(dtype=np.float64)
+        if value_col is not None:
+            self.value0 = pd.to_numeric(self.panel[value_col], errors="coerce").to_numpy(dtype=np.float64)
+        else:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                self.value0 = self.duty0 / np.fmax(self.rate0, min_rate)
+        self.active = np.isfinite(self.rate0) & np.isfinite(self.value0) & (self.value0 > 0) & (self.hs2 >= 0)
+        self.eps = np.where(self.hs2 >= 0, elasticities[np.clip(self.hs2, 0, 99)], 0.0)
+
+    # ------------------------------------------------------------------
+    # 情景 -> 税率矩阵
+    # ------------------------------------------------------------------
+
+    def shock_mask(self, shock: TariffShock) -> np.ndarray:
+        """
+        冲击覆盖的行（各维度的查找数组取交集）。
+        """
+        mask = self.active.copy()
+        if shock.chapters is not None:
+            chapters = np.zeros(101, dtype=bool)
+            chapters[[c for c in shock.chapters if 0 <= c <= 99]] = True
+            mask &= chapters[self.hs2]
+        if shock.partners is not None:
+            wanted = set(shock.partners)
+            partners = np.asarray([p in wanted for p in self.partner_values], dtype=bool)
+            mask &= partners[self.partner_idx]
+        if shock.sectors is not None:
+            sectors = np.asarray([s in set(shock.sectors) for s in self.sector_labels], dtype=bool)
+            mask &= sectors[self.sector_idx]
+        if shock.years is not None:
+            mask &= np.isin(self.year_values, shock.years)[self.year_idx]
+        return mask
+
+    def scenario_rates(self, scenarios: Sequence[Scenario]) -> np.ndarray:
+        """
+        (情景数, 行数) 的情景税率矩阵。
+        """
+        rates = np.repeat(self.rate0[np.newaxis, :], len(scenarios), axis=0)
+        for i, scenario in enumerate(scenarios):
+            for shock in scenario.shocks:
+                mask = self.shock_mask(shock)
+                if shock.mode == "add":
+                    rates[i, mask] += shock.value
+                elif shock.mode == "set":
+                    rates[i, mask] = shock.value
+                else:
+                    rates[i, mask] *= shock.value
+        return np.maximum(rates, 0.0, where=np.isfinite(rates), out=rates)
+
+    def counterfactual(self, rates: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        给定情景税率矩阵，返回 (反事实关税收入, 反事实进口额)，形状与 rates 相同。
+        """
+        active = self.active[np.newaxis, :]
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            ratio = ((1.0 + rates) / (1.0 + self.rate0)) ** (-self.eps)
+            value1 = self.value0 * ratio
+            duty1 = self.duty0 * ratio + (rates - self.rate0) * value1
+        duty1 = np.where(active, duty1, self.duty0)
+        value1 = np.where(active, value1, np.nan)
+        return duty1, value1
+
+    # ------------------------------------------------------------------
+    # 输出
+    # ------------------------------------------------------------------
+
+    def simulate_panel(self, scenario: Scenario) -> pd.DataFrame:
+        """
+        单个情景的逐行结果：year, hs2, partner_iso3, 基准/情景税率、关税收入与进口额。
+        """
+        rates = self.scenario_rates([scenario])
+        duty1, value1 = self.counterfactual(rates)
+        out = self.panel[["year", "hs2", "partner_name"]].copy()
+        out["partner_iso3"] = np.asarray(self.partner_values, dtype=object)[self.partner_idx]
+        out["rate_base"] = self.rate0
+        out["rate_cf"] = rates[0]
+        out["duty_base"] = self.duty0
+        out["duty_cf"] = duty1[0]
+        out["imports_base"] = np.where(self.active, self.value0, np.nan)
+        out["imports_cf"] = value1[0]
+        return out
+
+    def summarize(
+        self,
+        scenarios: Sequence[Scenario],
+        by: Sequence[str] = ("year",),
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> pd.DataFrame:
+        """
+        多个情景按 by 维度汇总：scenario, by..., duty_base, duty_cf, duty_change,
+        imports_base, imports_cf, imports_change。
+
+        by 可取 year / hs2 / partner_iso3 / sector（sector 为行业方案标签）。
+        未解析的伙伴国汇总为 UNKNOWN_PARTNER 一组。
+        """
+        keys = self.panel[[c for c in by if c not in ("sector", "partner_iso3")]].copy()
+        if "sector" in by:
+            keys["sector"] = pd.Categorical.from_codes(self.sector_idx, categories=self.sector_labels)
+        if "partner_iso3" in by:
+            keys["partner_iso3"] = np.asarray(self.partner_values, dtype=object)[self.partner_idx]
+        keys = keys[list(by)]
+        group = keys.groupby(list(by), observed=True, sort=True).ngroup().to_numpy() if by else np.zeros(len(keys), dtype=np.int64)
+        n_groups = int(group.max()) + 1 if group.size else 0
+        group_keys = keys.assign(_g=group).drop_duplicates("_g").sort_values("_g").drop(columns="_g").reset_index(drop=True)
+
+        value0 = np.where(self.active, self.value0, 0.0)
+        duty_base = np.bincount(group, weights=self.duty0, minlength=n_groups)
+        imports_base = np.bincount(group, weights=value0, minlength=n_groups)
+
+        duty_cf = np.empty((len(scenarios), n_groups), dtype=np.float64)
+        imports_cf = np.empty((len(scenarios), n_groups), dtype=np.float64)
+        for start in range(0, len(scenarios), batch_size):
+            batch = scenarios[start:start + batch_size]
+            duty1, value1 = self.counterfactual(self.scenario_rates(batch))
+            flat = (np.arange(len(batch))[:, np.newaxis] * n_groups + group[np.newaxis, :]).ravel()
+            size = len(batch) * n_groups
+            stop = start + len(batch)
+            duty_cf[start:stop] = np.bincount(flat, weights=duty1.ravel(), minlength=size).reshape(len(batch), n_groups)
+            imports_cf[start:stop] = np.bincount(
+                flat, weights=np.nan_to_num(value1).ravel(), minlength=size
+            ).reshape(len(batch), n_groups)
+
+        # 一次性拼出 (情景 × 分组) 长表
+        n_scenarios = len(scenarios)
+        result = group_keys.iloc[np.tile(np.arange(n_groups), n_scenarios)].reset_index(drop=True)
+        result.insert(
+            0,
+            "scenario",
+            pd.Categorical.from_codes(
+                np.repeat(np.arange(n_scenarios), n_groups),
+                categories=pd.Index([sc.name for sc in scenarios]),
+            ),
+        )
+        result["duty_base"] = np.tile(duty_base, n_scenarios)
+        result["duty_cf"] = duty_cf.ravel()
+        result["duty_change"] = result["duty_cf"] - result["duty_base"]
+        result["imports_base"] = np.tile(imports_base, n_scenarios)
+        result["imports_cf"] = imports_cf.ravel()
+        result["imports_change"] = result["imports_cf"] - result["imports_base"]
+        return result
+
+
+def run_duty_scenarios(
+    trade_duty_panel: pd.DataFrame,
+    output_dir: Path,
+    scenarios_path: Path = DEFAULT_SCENARIOS_PATH,
+    concordance: Optional[Concordance] = None,
+) -> Dict[str, pd.DataFrame]:
+    """
+    按配置文件跑全部情景，写出按年和按 年 × HS2 的汇总。
+    """
+    scenarios, eps, base = load_duty_scenarios(scenarios_path)
+    simulator = DutySimulator(
+        trade_duty_panel,
+        elasticities=eps,
+        rate_col=str(base.get("rate_col", DEFAULT_RATE_COL)),
+        value_col=base.get("value_col"),  # type: ignore[arg-type]
+        min_rate=float(base.get("min_rate", 0.03)),  # type: ignore[arg-type]
+        concordance=concordance,
+    )
+    results = {
+        "duty_scenarios_year": simulator.summarize(scenarios, by=("year",)),
+        "duty_scenarios_hs2_year": simulator.summarize(scenarios, by=("year", "hs2")),
+    }
+    for name, df in results.items():
+        path = write_csv_output(df, output_dir, name)
+        print(f"[Scenario] {len(scenarios)} scenarios -> {path}")
+    return results
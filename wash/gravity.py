@@ -0,0 +1,350 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+PPML 引力模型（高维固定效应）
+
+在 trade_export_panel（已并入 HS2 关税）上估计分章的关税弹性：
+
+    E[X_pit] = exp( Σ_k β_k · 1[hs2 = k] · ln(1 + t_kt) + FE )
+
+- 固定效应不展开成哑变量矩阵，而是在每次 IRLS 迭代中用加权交替投影
+  （组内加权均值，经稀疏的 组 × 行 指示矩阵一次算完所有列）把被解释变量和
+  回归元中的 FE 成分去掉；下一次迭代以上一次的去均值结果为起点（热启动）。
+- 回归元（章 × 关税交互项）按稀疏矩阵构造；第一次去均值直接作用在稀疏矩阵上，
+  稠密的只有去均值后的结果，原始回归元始终不展开。
+- 去除只含零贸易的 FE 组（否则 PPML 无有限解）和单例组。
+- 标准误为按 cluster（默认 伙伴国 × 章）聚类的稳健标准误。
+
+数据中出口方固定为美国，因此“出口方 × 年”已被“进口方 × 年”吸收，
+“国家对”即 伙伴国 × 章。注意 章 × 年 的税率不能再加 章 × 年 固定效应。
+
+tariff_col 没有默认值，必须由调用方指定：被解释变量是美国出口，对应的关税应是
+伙伴国对美国商品征收的税率（如 WITS 面板中的列）。tariff_hs2_panel 的
+mfn_adval_* 是美国自己的进口税率，放进来估出的 β 不是替代弹性。
+仓库里没有这类伙伴国税率，datawash 因此不调用本模块；并入伙伴国税率后
+直接调用 run_gravity_estimation / estimate_hs2_trade_elasticities。
+
+按 CES 引力模型，β_k = 1 - σ_k，输出中同时给出 sigma = 1 - β。
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from concordance import codes_to_int
+from output_store import write_csv_output
+
+# 可选依赖：稀疏矩阵
+try:
+    import scipy.sparse as sp  # type: ignore
+except ImportError:  # pragma: no cover - safe fallback
+    sp = None  # type: ignore
+
+
+def _require_scipy() -> None:
+    if sp is None:
+        raise ImportError("Gravity estimation requires scipy; install it or set GRAVITY_ESTIMATION=False.")
+
+
+# 默认固定效应：进口方 × 年、国家对（伙伴国 × 章）
+DEFAULT_GRAVITY_FIXED_EFFECTS: Sequence[Tuple[str, ...]] = (
+    ("partner_iso3", "year"),
+    ("partner_iso3", "hs2"),
+)
+DEFAULT_GRAVITY_CLUSTER: Tuple[str, ...] = ("partner_iso3", "hs2")
+
+
+class PPMLResult:
+    """
+    PPML 估计结果。kept 为输入行中实际参与估计的行（去掉分离 / 单例组后）的掩码。
+    """
+
+    def __init__(
+        self,
+        beta: np.ndarray,
+        se: np.ndarray,
+        n_obs: int,
+        n_dropped: int,
+        iterations: int,
+        converged: bool,
+        deviance: float,
+        kept: np.ndarray,
+    ) -> None:
+        self.beta = beta
+        self.se = se
+        self.n_obs = n_obs
+        self.n_dropped = n_dropped
+        self.iterations = iterations
+        self.converged = converged
+        self.deviance = deviance
+        self.kept = kept
+
+
+# ---------------------------------------------------------------------------
+# 固定效应工具
+# ---------------------------------------------------------------------------
+
+def group_ids(df: pd.DataFrame, columns: Sequence[str]) -> np.ndarray:
+    """
+    多列组合键 -> 0..G-1 的整数组号。
+    """
+    return df.groupby(list(columns), observed=True, sort=False).ngroup().to_numpy(dtype=np.int64)
+
+
+def _indicator(groups: np.ndarray) -> "sp.csr_matrix":
+    """
+    行 × 组 的稀疏指示矩阵。
+    """
+    n = groups.size
+    n_groups = int(groups.max()) + 1 if n else 0
+    return sp.csr_matrix((np.ones(n), (np.arange(n), groups)), shape=(n, n_groups))
+
+
+def drop_separated(
+    y: np.ndarray,
+    fe_groups: Sequence[np.ndarray],
+    max_rounds: int = 50,
+) -> np.ndarray:
+    """
+    反复去掉 被解释变量全为零的 FE 组 和 单例组，返回保留行的掩码。
+    """
+    keep = np.ones(y.size, dtype=bool)
+    for _ in range(max_rounds):
+        changed = False
+        for groups in fe_groups:
+            g = groups[keep]
+            size = np.bincount(g, minlength=int(groups.max()) + 1)
+            total = np.bincount(g, weights=y[keep], minlength=size.size)
+            bad = (total <= 0) | (size <= 1)
+            drop = keep & bad[groups]
+            if drop.any():
+                keep &= ~drop
+                changed = True
+        if not changed:
+            break
+    return keep
+
+
+def demean_by_fixed_effects(
+    values: "sp.spmatrix | np.ndarray",
+    indicators: Sequence["sp.csr_matrix"],
+    weights: np.ndarray,
+    tol: float = 1e-10,
+    max_iter: int = 1000,
+) -> np.ndarray:
+    """
+    加权交替投影：依次减去各 FE 的组内加权均值，直到更新量小于 tol（相对尺度）。
+    values 为 (n,) 或 (n, k)，也可以是稀疏矩阵；返回同形状的稠密去均值结果。
+    """
+    # 每个 FE 预先构造加权平均算子 A = diag(1/Σw) Dᵀ diag(w)，组内均值即 A @ out
+    averagers = []
+    for D in indicators:
+        group_weight = np.asarray(D.T @ weights).ravel()
+        inv = np.where(group_weight > 0, 1.0 / np.where(group_weight > 0, group_weight, 1.0), 0.0)
+        averagers.append(sp.diags(inv) @ D.T @ sp.diags(weights))
+
+    if sp is not None and sp.issparse(values):
+        # 稀疏输入：第一个 FE 的组均值直接由稀疏矩阵算出，稠密的只有去均值后的结果
+        values = sp.coo_matrix(values)
+        scale = max(float(np.abs(values.data).max()) if values.nnz else 0.0, 1.0)
+        if not indicators:
+            return values.toarray()
+        out = -(indicators[0] @ (averagers[0] @ values).toarray())
+        np.add.at(out, (values.row, values.col), values.data)
+        squeeze = False
+    else:
+        out = np.array(values, dtype=np.float64, copy=True)
+        squeeze = out.ndim == 1
+        if squeeze:
+            out = out[:, np.newaxis]
+        scale = max(float(np.abs(out).max()) if out.size else 0.0, 1.0)
+
+    for _ in range(max_iter):
+        max_update = 0.0
+        for D, A in zip(indicators, averagers):
+            means = A @ out
+            out -= D @ means
+            max_update = max(max_update, float(np.abs(means).max()) if means.size else 0.0)
+        if max_update <= tol * scale:
+            break
+    return out.ravel() if squeeze else out
+
+
+# ---------------------------------------------------------------------------
+# PPML-IRLS
+# ---------------------------------------------------------------------------
+
+def fit_ppml_hdfe(
+    y: np.ndarray,
+    X: "sp.spmatrix | np.ndarray",
+    fe_groups: Sequence[np.ndarray],
+    cluster: Optional[np.ndarray] = None,
+    tol: float = 1e-8,
+    max_iter: int = 100,
+) -> PPMLResult:
+    """
+    带高维固定效应的泊松伪极大似然估计。
+
+    y         : (n,) 非负被解释变量
+    X         : (n, k) 回归元（稀疏或稠密）
+    fe_groups : 每个固定效应一组 0..G-1 的组号数组
+    cluster   : 聚类组号；为 None 时给出异方差稳健标准误
+
+    与 FE 共线（去均值后为零）的回归元系数为 NaN。
+    """
+    _require_scipy()
+    y = np.asarray(y, dtype=np.float64)
+    keep = drop_separated(y, fe_groups)
+    n_dropped = int((~keep).sum())
+
+    y = y[keep]
+    X = sp.csr_matrix(X)[keep] if sp.issparse(X) else np.asarray(X, dtype=np.float64)[keep]
+    fe_kept = [pd.factorize(g[keep])[0] for g in fe_groups]
+    indicators = [_indicator(g) for g in fe_kept]
+    n, k = X.shape
+
+    mu = (y + y.mean()) / 2.0
+    eta = np.log(mu)
+    beta = np.zeros(k)
+    z_fe = np.zeros(n)       # 上一次迭代中 z 的 FE 成分（热启动用）
+    X_tilde = X              # 第一次迭代后为稠密的去均值回归元
+    active = np.ones(k, dtype=bool)
+    deviance = np.inf
+    converged = False
+
+    iteration = 0
+    for iteration in range(1, max_iter + 1):
+        z = eta + (y - mu) / mu
+        w = mu
+
+        # 热启动：上一轮的 FE 成分落在 FE 张成的空间里，先减掉再投影结果不变
+        z_tilde = demean_by_fixed_effects(z - z_fe, indicators, w)
+        X_tilde = demean_by_fixed_effects(X_tilde, indicators, w)
+
+        if iteration == 1:
+            norms = np.sqrt((X_tilde ** 2 * w[:, np.newaxis]).sum(axis=0))
+            if sp.issparse(X):
+                base = np.sqrt(np.asarray(X.multiply(X).T @ w).ravel())
+            else:
+                base = np.sqrt((X ** 2 * w[:, np.newaxis]).sum(axis=0))
+            active = norms > 1e-9 * np.maximum(base, 1.0)
+
+        Xa = X_tilde[:, active]
+        xtwx = Xa.T @ (Xa * w[:, np.newaxis])
+        xtwz = Xa.T @ (z_tilde * w)
+        beta_a = np.linalg.solve(xtwx, xtwz) if active.any() else np.zeros(0)
+
+        resid = z_tilde - Xa @ beta_a
+        z_fe = z - z_tilde
+        eta = z - resid
+        mu = np.exp(np.clip(eta, -700, 700))
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            term = np.where(y > 0, y * np.log(y / mu), 0.0)
+        new_deviance = 2.0 * float(np.sum(term - (y - mu)))
+        change = abs(new_deviance - deviance) / max(abs(new_deviance), 0.1)
+        deviance = new_deviance
+        beta = np.full(k, np.nan)
+        beta[active] = beta_a
+        if change < tol:
+            converged = True
+            break
+
+    # 稳健（聚类）标准误：B^-1 (Σ s s') B^-1，s_i = x̃_i (y_i - μ_i)
+    se = np.full(k, np.nan)
+    if active.any():
+        Xa = demean_by_fixed_effects(X_tilde, indicators, mu)[:, active]
+        bread = np.linalg.inv(Xa.T @ (Xa * mu[:, np.newaxis]))
+        scores = Xa * (y - mu)[:, np.newaxis]
+        if cluster is not None:
+            scores = np.asarray(_indicator(pd.factorize(np.asarray(cluster)[keep])[0]).T @ scores)
+        meat = scores.T @ scores
+        se[active] = np.sqrt(np.diag(bread @ meat @ bread))
+
+    return PPMLResult(beta, se, n, n_dropped, iteration, converged, deviance, kept=keep)
+
+
+# ---------------------------------------------------------------------------
+# 分章关税弹性
+# ---------------------------------------------------------------------------
+
+def estimate_hs2_trade_elasticities(
+    trade_panel: pd.DataFrame,
+    tariff_col: str,
+    value_col: str = "export_fas",
+    fixed_effects: Sequence[Tuple[str, ...]] = DEFAULT_GRAVITY_FIXED_EFFECTS,
+    cluster: Optional[Sequence[str]] = DEFAULT_GRAVITY_CLUSTER,
+    max_tariff: float = 1.0,
+) -> pd.DataFrame:
+    """
+    估计各 HS2 章的贸易对 ln(1 + 关税) 的弹性。
+
+    tariff_col 必须是贸易流向上征收的关税（出口面板即伙伴国对美国的税率），
+    否则 sigma 没有替代弹性的含义。
+
+    返回列：hs2, beta, se, z, sigma (= 1 - beta), n_obs（去掉分离 / 单例组后的行数）；
+    无法识别的章 beta 为 NaN。
+    关税缺失或超出 [0, max_tariff]（税则中的占位值）的行不参与估计。
+    """
+    _require_scipy()
+    needed = {value_col, tariff_col, "hs2", *[c for fe in fixed_effects for c in fe]}
+    missing = [c for c in needed if c not in trade_panel.columns]
+    if missing:
+        raise KeyError(f"Columns {missing} not found in trade panel for gravity estimation")
+
+    tariff = pd.to_numeric(trade_panel[tariff_col], errors="coerce").to_numpy(dtype=np.float64)
+    y_all = pd.to_numeric(trade_panel[value_col], errors="coerce").to_numpy(dtype=np.float64)
+    usable = np.isfinite(tariff) & (tariff >= 0) & (tariff <= max_tariff) & np.isfinite(y_all) & (y_all >= 0)
+    for fe in fixed_effects:
+        usable &= trade_panel[list(fe)].notna().all(axis=1).to_numpy()
+    panel = trade_panel.loc[usable].reset_index(drop=True)
+
+    # 章 × ln(1+t) 交互项：每行只有一个非零元
+    hs2 = codes_to_int(panel["hs2"])
+    chapters, col = np.unique(hs2, return_inverse=True)
+    X = sp.csr_matrix(
+        (np.log1p(tariff[usable]), (np.arange(len(panel)), col)),
+        shape=(len(panel), chapters.size),
+    )
+    fe_groups = [group_ids(panel, fe) for fe in fixed_effects]
+    cluster_ids = group_ids(panel, cluster) if cluster else None
+
+    print(f"[Gravity] PPML on {len(panel)} rows, {chapters.size} chapters, FE: {list(fixed_effects)}")
+    result = fit_ppml_hdfe(y_all[usable], X, fe_groups, cluster=cluster_ids)
+    print(
+        f"[Gravity] {'converged' if result.converged else 'NOT converged'} after {result.iterations} iterations; "
+        f"{result.n_dropped} rows dropped (separated / singleton)"
+    )
+
+    # 只计实际参与估计的行（分离 / 单例组已去掉）
+    n_obs = np.bincount(col[result.kept], minlength=chapters.size)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = result.beta / result.se
+    return pd.DataFrame(
+        {
+            "hs2": chapters.astype(np.int16),
+            "beta": result.beta,
+            "se": result.se,
+            "z": z,
+            "sigma": 1.0 - result.beta,
+            "n_obs": n_obs,
+        }
+    )
+
+
+def run_gravity_estimation(
+    trade_export_panel: pd.DataFrame,
+    output_dir: Path,
+    tariff_col: str,
+) -> pd.DataFrame:
+    """
+    估计分章弹性并写出 gravity_hs2_elasticities.csv。
+    """
+    elasticities = estimate_hs2_trade_elasticities(trade_export_panel, tariff_col)
+    path = write_csv_output(elasticities, output_dir, "gravity_hs2_elasticities")
+    print(f"[Gravity] Saved HS2 elasticities -> {path}")
+    return elasticities
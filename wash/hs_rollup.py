@@ -0,0 +1,291 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+HS 层级汇总（rollup cube）
+
+把 HTS8 年度面板一次性汇总到 HS2 / HS4 / HS6 各层级：
+
+- 只对 (year, hts8) 整数编码排序一次。HS 编码天然嵌套（hs2 ⊂ hs4 ⊂ hs6 ⊂ hts8），
+  排好序后每个层级的分组都是连续区间，可以直接用 ``np.add.reduceat`` 逐层归约，
+  不需要每个层级再做一次 groupby。
+- 统计量：简单平均（mean）、中位数（median）、贸易加权平均（weighted），
+  以及 0/1 标志列的最大值（max）。
+- 贸易权重来自 DataWeb 长表（``read_dataweb_metric`` 的输出），粒度由导出的完整
+  编码（hts_code）决定：HS2 / HS4 / HS6 / HTS8（``finest_trade_level``）。
+  每条 HTS8 取其所属前缀的权重。组内权重只有比该层级更细时加权平均才与简单平均不同，
+  因此只为比权重表粒度更粗的层级输出 _tw 列。只有 HS2 粒度的导出（如样例数据）
+  不支持贸易加权：不产生任何 _tw 列。
+- 无法解析的编码（-1）不属于任何 HS 分组，汇总前剔除。
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+# 层级名 -> 编码位数
+HS_LEVEL_DIGITS: Dict[str, int] = {
+    "hs2": 2,
+    "hs4": 4,
+    "hs6": 6,
+    "hts8": 8,
+}
+
+ROLLUP_STATS = ("mean", "median", "weighted")
+
+
+def encode_product_codes(codes: pd.Series) -> np.ndarray:
+    """
+    将 HS/HTS 编码字符串转为 int64 数组，无法解析的记为 -1。
+    """
+    numeric = pd.to_numeric(codes, errors="coerce")
+    return numeric.fillna(-1).astype(np.int64).to_numpy()
+
+
+def _level_key(year: np.ndarray, code8: np.ndarray, level: str) -> np.ndarray:
+    """
+    由年份和 8 位编码计算某个层级的组合键：year * 10^d + 编码前 d 位。
+    code8 必须非负（无法解析的 -1 由调用方事先剔除，否则会落到上一年的 99… 组）。
+    """
+    digits = HS_LEVEL_DIGITS[level]
+    return year * (10 ** digits) + code8 // (10 ** (8 - digits))
+
+
+def _group_starts(key: np.ndarray) -> np.ndarray:
+    """
+    已排序键数组中每个分组的起始位置。
+    """
+    if key.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    change = np.empty(key.size, dtype=bool)
+    change[0] = True
+    np.not_equal(key[1:], key[:-1], out=change[1:])
+    return np.flatnonzero(change)
+
+
+def _group_mean(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    valid = ~np.isnan(values)
+    sums = np.add.reduceat(np.where(valid, values, 0.0), starts)
+    counts = np.add.reduceat(valid.astype(np.int64), starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+
+def _group_weighted_mean(values: np.ndarray, weights: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    valid = ~np.isnan(values)
+    w = np.where(valid, weights, 0.0)
+    num = np.add.reduceat(w * np.where(valid, values, 0.0), starts)
+    den = np.add.reduceat(w, starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(den > 0, num / np.where(den > 0, den, 1.0), np.nan)
+
+
+def _group_median(values: np.ndarray, starts: np.ndarray, n_rows: int) -> np.ndarray:
+    """
+    分组中位数：按 (组号, 值) 排序一次，NaN 会排在每组末尾，再按有效个数取中间位置。
+    """
+    sizes = np.diff(np.append(starts, n_rows))
+    group_id = np.repeat(np.arange(starts.size), sizes)
+    order = np.lexsort((values, group_id))
+    sorted_vals = values[order]
+    counts = np.add.reduceat((~np.isnan(values)).astype(np.int64), starts)
+    lo = starts + np.maximum(counts - 1, 0) // 2
+    hi = starts + np.maximum(counts, 1) // 2
+    median = (sorted_vals[lo] + sorted_vals[hi]) / 2.0
+    return np.where(counts > 0, median, np.nan)
+
+
+def finest_trade_level(trade_long: pd.DataFrame) -> str:
+    """
+    DataWeb 长表能支持的最细权重层级：由最短的完整编码（hts_code）决定，
+    没有 hts_code 列时为 hs2。
+    """
+    if "hts_code" not in trade_long.columns or trade_long.empty:
+        return "hs2"
+    lengths = trade_long["hts_code"].astype(str).str.len()
+    shortest = int(lengths.min())
+    for level in ("hts8", "hs6", "hs4"):
+        if HS_LEVEL_DIGITS[level] <= shortest:
+            return level
+    return "hs2"
+
+
+def build_trade_weights(
+    trade_long: pd.DataFrame,
+    code_col: str = "hs2",
+) -> pd.DataFrame:
+    """
+    从 DataWeb 长表构造贸易权重：按 (year, code_col) 汇总所有伙伴国的 value。
+
+    code_col 不在长表中、但长表有完整编码 hts_code 时，按层级位数截取其前缀
+    （比该层级更短的编码无法归入，直接报错）。
+
+    返回列：year, <code_col>, weight
+    """
+    if code_col not in trade_long.columns and code_col in HS_LEVEL_DIGITS and "hts_code" in trade_long.columns:
+        digits = HS_LEVEL_DIGITS[code_col]
+        codes = trade_long["hts_code"].astype(str)
+        if (codes.str.len() < digits).any():
+            raise ValueError(f"Trade long table has codes shorter than {code_col}; use finest_trade_level")
+        trade_long = trade_long.assign(**{code_col: codes.str[:digits]})
+
+    for col in ("year", code_col, "value"):
+        if col not in trade_long.columns:
+            raise KeyError(f"Missing expected column '{col}' in trade long table")
+
+    weights = (
+        trade_long
+        .groupby(["year", code_col], as_index=False, observed=True)["value"]
+        .sum()
+        .rename(columns={"value": "weight"})
+    )
+    return weights
+
+
+def _weight_level(weights: pd.DataFrame) -> str:
+    """
+    权重表的编码粒度（唯一的 HS 编码列名）。
+    """
+    code_cols = [c for c in weights.columns if c in HS_LEVEL_DIGITS]
+    if len(code_cols) != 1:
+        raise KeyError(f"Trade weights must have exactly one HS code column, got {code_cols}")
+    return code_cols[0]
+
+
+def _row_weights(
+    year: np.ndarray,
+    code8: np.ndarray,
+    weights: pd.DataFrame,
+) -> np.ndarray:
+    """
+    为每条 HTS8 记录查找权重：用权重表的编码粒度截取前缀，再用 searchsorted 匹配。
+    """
+    level = _weight_level(weights)
+
+    w_year = weights["year"].to_numpy(dtype=np.int64)
+    w_code = encode_product_codes(weights[level])
+    w_val = pd.to_numeric(weights["weight"], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+    valid = w_code >= 0
+    w_year, w_code, w_val = w_year[valid], w_code[valid], w_val[valid]
+    w_key = w_year * (10 ** HS_LEVEL_DIGITS[level]) + w_code
+
+    order = np.argsort(w_key, kind="stable")
+    w_key = w_key[order]
+    w_val = w_val[order]
+
+    row_key = _level_key(year, code8, level)
+    pos = np.searchsorted(w_key, row_key)
+    pos_clipped = np.minimum(pos, max(w_key.size - 1, 0))
+    if w_key.size == 0:
+        return np.zeros(row_key.size, dtype=float)
+    hit = w_key[pos_clipped] == row_key
+    return np.where(hit, w_val[pos_clipped], 0.0)
+
+
+def build_hs_rollup(
+    panel: pd.DataFrame,
+    value_cols: Mapping[str, str],
+    max_cols: Optional[Mapping[str, str]] = None,
+    levels: Sequence[str] = ("hs2", "hs4", "hs6"),
+    stats: Iterable[str] = ("mean",),
+    trade_weights: Optional[pd.DataFrame] = None,
+) -> Dict[str, pd.DataFrame]:
+    """
+    对 HTS8 面板做单次排序的多层级汇总。
+
+    参数
+    ----------
+    panel : DataFrame
+        至少包含 year, hts8 以及 value_cols / max_cols 中的列。
+    value_cols : Mapping[str, str]
+        源列 -> 输出前缀，例如 {"mfn_ad_val_rate": "mfn_adval"}。
+        输出列名：mean -> "<前缀>_<层级>"，median -> "<前缀>_<层级>_median"，
+        weighted -> "<前缀>_<层级>_tw"（仅限比权重表粒度更粗的层级）。
+    max_cols : Mapping[str, str], optional
+        取组内最大值的列（如 has_additional_duty），输出 "<前缀>_<层级>"。
+    levels : Sequence[str]
+        需要输出的层级，取自 hs2 / hs4 / hs6。
+    stats : Iterable[str]
+        "mean"、"median"、"weighted" 的任意组合。
+    trade_weights : DataFrame, optional
+        ``build_trade_weights`` 的输出；stats 含 "weighted" 时必须提供。
+
+    返回
+    -------
+    Dict[str, DataFrame]
+        层级 -> 面板（列：year, <层级>, 各统计量），层级编码为补零字符串。
+    """
+    stats = tuple(stats)
+    unknown = [s for s in stats if s not in ROLLUP_STATS]
+    if unknown:
+        raise ValueError(f"Unknown rollup stats: {unknown}; expected any of {ROLLUP_STATS}")
+    bad_levels = [lv for lv in levels if lv not in ("hs2", "hs4", "hs6")]
+    if bad_levels:
+        raise ValueError(f"Unknown HS levels: {bad_levels}")
+    if "weighted" in stats and trade_weights is None:
+        raise ValueError("Trade-weighted rollup requested but no trade_weights given.")
+
+    max_cols = dict(max_cols or {})
+    missing = [c for c in ["year", "hts8", *value_cols, *max_cols] if c not in panel.columns]
+    if missing:
+        raise KeyError(f"Missing expected columns for HS rollup: {missing}")
+
+    year = panel["year"].to_numpy(dtype=np.int64)
+    code8 = encode_product_codes(panel["hts8"])
+
+    # 唯一一次排序：(year, hts8)；无法解析的编码不属于任何分组，先剔除
+    valid = np.flatnonzero(code8 >= 0)
+    order = valid[np.lexsort((code8[valid], year[valid]))]
+    year = year[order]
+    code8 = code8[order]
+    n_rows = year.size
+
+    values: Dict[str, np.ndarray] = {
+        col: pd.to_numeric(panel[col], errors="coerce").to_numpy(dtype=float)[order]
+        for col in value_cols
+    }
+    flags: Dict[str, np.ndarray] = {
+        col: pd.to_numeric(panel[col], errors="coerce").to_numpy(dtype=float)[order]
+        for col in max_cols
+    }
+    row_w: Optional[np.ndarray] = None
+    weighted_levels: Sequence[str] = ()
+    if "weighted" in stats:
+        weight_digits = HS_LEVEL_DIGITS[_weight_level(trade_weights)]  # type: ignore[arg-type]
+        weighted_levels = [lv for lv in levels if HS_LEVEL_DIGITS[lv] < weight_digits]
+        if weighted_levels:
+            row_w = _row_weights(year, code8, trade_weights)  # type: ignore[arg-type]
+
+    result: Dict[str, pd.DataFrame] = {}
+    for level in levels:
+        digits = HS_LEVEL_DIGITS[level]
+        key = _level_key(year, code8, level)
+        starts = _group_starts(key)
+        group_key = key[starts]
+
+        columns: Dict[str, object] = {
+            "year": (group_key // (10 ** digits)).astype(np.int64),
+            level: pd.Series(group_key % (10 ** digits)).astype(str).str.zfill(digits).to_numpy(),
+        }
+        for col, prefix in value_cols.items():
+            v = values[col]
+            if n_rows == 0:
+                continue
+            if "mean" in stats:
+                columns[f"{prefix}_{level}"] = _group_mean(v, starts)
+            if "median" in stats:
+                columns[f"{prefix}_{level}_median"] = _group_median(v, starts, n_rows)
+            if level in weighted_levels:
+                columns[f"{prefix}_{level}_tw"] = _group_weighted_mean(v, row_w, starts)  # type: ignore[arg-type]
+        for col, prefix in max_cols.items():
+            if n_rows == 0:
+                continue
+            columns[f"{prefix}_{level}"] = np.fmax.reduceat(flags[col], starts)
+
+        result[level] = pd.DataFrame(columns)
+
+    return result
+
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+(year, HS 编码) 整数键连接索引
+
+关税面板（HS2 / HS4 / HS6）对每个 (year, code) 只有一行。把键编码为
+``(year - year_min) * 10^d + code`` 的整数后：
+
+- 键空间不大时（HS2、HS4）建一个稠密数组：slot -> 关税面板行号（-1 表示缺失）；
+- 键空间过大时（HS6 跨很多年）改用排好序的键数组 + searchsorted。
+
+任意贸易面板都可以用 ``attach`` 一次性算出行号，再对每个关税列做向量化 take，
+代替按字符串键的 hash merge；同一个索引可以反复用于出口、关税收入等多张面板。
+结果与 ``DataFrame.merge(how="left", validate="m:1")`` 相同。关税面板中年份或编码
+无法解析（-1）、编码位数超过该层级的行不可能被匹配，建索引时剔除。
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from concordance import CODE_LEVEL_DIGITS, codes_to_int
+
+
+# 稠密数组的最大槽位数（int32，约 20 MB）
+DENSE_MAX_SLOTS = 5_000_000
+
+
+class PanelJoinIndex:
+    """
+    某个 (year, level) 唯一键面板的连接索引。
+    """
+
+    def __init__(self, panel: pd.DataFrame, level: str = "hs2") -> None:
+        if level not in CODE_LEVEL_DIGITS:
+            raise ValueError(f"Unknown HS level '{level}'")
+        for col in ("year", level):
+            if col not in panel.columns:
+                raise KeyError(f"Column '{col}' not found in panel for join index")
+
+        self.panel = panel
+        self.level = level
+        self.digits = CODE_LEVEL_DIGITS[level]
+
+        years = codes_to_int(panel["year"])
+        codes = codes_to_int(panel[level])
+        # 无法解析的键会写到错误的槽位（或回绕到数组末尾），先剔除
+        rows = np.flatnonzero((years >= 0) & (codes >= 0) & (codes < 10 ** self.digits))
+        years = years[rows]
+        codes = codes[rows]
+        self.year_min = int(years.min()) if years.size else 0
+        self.n_years = int(years.max()) - self.year_min + 1 if years.size else 0
+        keys = self._encode(years, codes)
+
+        if np.unique(keys).size != keys.size:
+            raise ValueError(f"Join index keys (year, {level}) are not unique in the right-hand panel")
+
+        n_slots = self.n_years * (10 ** self.digits)
+        self.dense: Optional[np.ndarray] = None
+        self.sorted_keys: Optional[np.ndarray] = None
+        self.sorted_rows: Optional[np.ndarray] = None
+        if n_slots <= DENSE_MAX_SLOTS:
+            self.dense = np.full(n_slots, -1, dtype=np.int32)
+            self.dense[keys] = rows.astype(np.int32)
+        else:
+            order = np.argsort(keys, kind="stable")
+            self.sorted_keys = keys[order]
+            self.sorted_rows = rows[order].astype(np.int64)
+
+    def _encode(self, years: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        return (years - self.year_min) * (10 ** self.digits) + codes
+
+    def positions(self, years: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """
+        每个 (year, code) 在关税面板中的行号，找不到为 -1。
+        """
+        valid = (
+            (years >= self.year_min)
+            & (years < self.year_min + self.n_years)
+            & (codes >= 0)
+            & (codes < 10 ** self.digits)
+        )
+        keys = self._encode(years, codes)
+        pos = np.full(keys.size, -1, dtype=np.int64)
+
+        if self.dense is not None:
+            pos[valid] = self.dense[keys[valid]]
+            return pos
+
+        assert self.sorted_keys is not None and self.sorted_rows is not None
+        if self.sorted_keys.size == 0:
+            return pos
+        idx = np.searchsorted(self.sorted_keys, keys[valid])
+        idx = np.minimum(idx, self.sorted_keys.size - 1)
+        hit = self.sorted_keys[idx] == keys[valid]
+        found = np.full(idx.size, -1, dtype=np.int64)
+        found[hit] = self.sorted_rows[idx[hit]]
+        pos[valid] = found
+        return pos
+
+    def left_codes(self, left: pd.DataFrame) -> np.ndarray:
+        """
+        取左表在本层级的整数编码：有同名列直接用，否则从更细的编码列截取前缀。
+        """
+        for col, col_digits in CODE_LEVEL_DIGITS.items():
+            if col_digits < self.digits or col not in left.columns:
+                continue
+            codes = codes_to_int(left[col])
+            return np.where(codes >= 0, codes // (10 ** (col_digits - self.digits)), -1)
+        raise KeyError(f"No '{self.level}' (or finer) code column in left panel")
+
+    def attach(
+        self,
+        left: pd.DataFrame,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        把关税面板的列按 (year, code) 接到左表上（左连接语义），返回新 DataFrame。
+
+        columns 默认为关税面板中除 year 和编码列外的全部列；与左表重名的列报错
+        （不加后缀，避免静默生成 _x / _y 列）。
+        """
+        if columns is None:
+            columns = [c for c in self.panel.columns if c not in ("year", self.level)]
+        overlap = [c for c in columns if c in left.columns]
+        if overlap:
+            raise ValueError(f"Columns {overlap} exist in both the left panel and the {self.level} panel")
+        pos = self.positions(codes_to_int(left["year"]), self.left_codes(left))
+
+        out = left.reset_index(drop=True)
+        new_cols: Dict[str, object] = {}
+        for col in columns:
+            values = self.panel[col].array
+            new_cols[col] = pd.api.extensions.take(values, pos, allow_fill=True)
+        return pd.concat([out, pd.DataFrame(new_cols, index=out.index)], axis=1)
+
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+清洗结果的输出后端：CSV / 按年份分区的 Parquet
+
+- CSV：与原来一致，编码列写成补零字符串。
+- Parquet：压缩列式存储，按 year（可选再按 hs2）分区写成目录
+  ``<name>.parquet/year=2021/hs2=1/part-0.parquet``，目录下附 ``_schema.json``
+  记录列名、dtype、分区列与编码宽度。下游用 ``read_parquet_output`` 读取时，
+  filters 会下推到分区目录和 row group，只读到需要的年份 / 章节。
+
+Parquet 依赖 pyarrow（可选）；未安装时请求 Parquet 输出会直接报错。
+"""
+
+from __future__ import annotations
+
+import json
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from panel_schema import CODE_COLUMN_WIDTHS, format_code_columns
+
+# 可选依赖：Parquet 读写
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+except ImportError:  # pragma: no cover - safe fallback
+    pa = None  # type: ignore
+    pq = None  # type: ignore
+
+
+OUTPUT_FORMATS = ("csv", "parquet", "both")
+SCHEMA_FILE_NAME = "_schema.json"
+DEFAULT_COMPRESSION = "zstd"
+
+
+def _require_pyarrow() -> None:
+    if pa is None or pq is None:
+        raise ImportError("Parquet output requires pyarrow; install it or use OUTPUT_FORMAT='csv'.")
+
+
+def parquet_dataset_path(output_dir: Path, name: str) -> Path:
+    return output_dir / f"{name}.parquet"
+
+
+def write_csv_output(df: pd.DataFrame, output_dir: Path, name: str) -> Path:
+    """
+    写出单个 CSV（编码列恢复为补零字符串）。
+    """
+    file_path = output_dir / f"{name}.csv"
+    format_code_columns(df).to_csv(file_path, index=False)
+    return file_path
+
+
+def _arrow_ready(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    返回可以直接交给 pyarrow 的副本。
+
+    categorical 会把整份类别字典写进每个分区文件；改写为普通字符串，由 Parquet 在
+    文件内自行做字典编码，读回时再按 _schema.json 还原。object 列和类别混有多种
+    类型的 categorical（如同一列里既有 "0" 又有 7.0）转为 pandas string 类型，
+    否则 pyarrow 无法为该列确定一个类型。
+    """
+    plain = df.copy()
+    for col in plain.columns:
+        dtype = plain[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            if pd.api.types.infer_dtype(dtype.categories, skipna=True).startswith("mixed"):
+                plain[col] = plain[col].astype("string")
+            else:
+                plain[col] = plain[col].astype(object).where(plain[col].notna(), None)
+        elif pd.api.types.is_object_dtype(dtype):
+            plain[col] = plain[col].astype("string")
+    return plain
+
+
+def write_parquet_output(
+    df: pd.DataFrame,
+    output_dir: Path,
+    name: str,
+    partition_by_hs2: bool = False,
+    compression: str = DEFAULT_COMPRESSION,
+) -> Path:
+    """
+    按 year（及可选的 hs2）分区写出 Parquet 数据集，并写 _schema.json。
+
+    已存在的同名数据集（含 _schema.json 的目录）会先整体删除，避免残留旧分区。
+    """
+    _require_pyarrow()
+    dataset_dir = parquet_dataset_path(output_dir, name)
+    if dataset_dir.exists():
+        if not (dataset_dir / SCHEMA_FILE_NAME).exists():
+            raise FileExistsError(f"Refusing to overwrite non-dataset directory: {dataset_dir}")
+        shutil.rmtree(dataset_dir)
+
+    partition_cols: List[str] = [c for c in ("year",) if c in df.columns]
+    if partition_by_hs2 and "hs2" in df.columns:
+        partition_cols.append("hs2")
+
+    table = pa.Table.from_pandas(_arrow_ready(df), preserve_index=False)
+    if partition_cols:
+        pq.write_to_dataset(
+            table,
+            root_path=str(dataset_dir),
+            partition_cols=partition_cols,
+            compression=compression,
+        )
+    else:
+        dataset_dir.mkdir(parents=True, exist_ok=True)
+        pq.write_table(table, str(dataset_dir / "part-0.parquet"), compression=compression)
+
+    schema = {
+        "name": name,
+        "format": "parquet",
+        "compression": compression,
+        "partition_cols": partition_cols,
+        "rows": int(len(df)),
+        "columns": [{"name": str(c), "dtype": str(df[c].dtype)} for c in df.columns],
+        "code_widths": {c: w for c, w in CODE_COLUMN_WIDTHS.items() if c in df.columns},
+    }
+    (dataset_dir / SCHEMA_FILE_NAME).write_text(json.dumps(schema, indent=2), encoding="utf-8")
+    return dataset_dir
+
+
+def read_output_schema(output_dir: Path, name: str) -> Dict[str, object]:
+    """
+    读取某个 Parquet 输出的 _schema.json。
+    """
+    path = parquet_dataset_path(output_dir, name) / SCHEMA_FILE_NAME
+    if not path.exists():
+        raise FileNotFoundError(f"Schema file not found for output '{name}': {path}")
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def read_parquet_output(
+    output_dir: Path,
+    name: str,
+    columns: Optional[Sequence[str]] = None,
+    filters: Optional[List[Tuple[str, str, object]]] = None,
+) -> pd.DataFrame:
+    """
+    读取 Parquet 输出，filters 下推到分区和 row group，例如
+    ``read_parquet_output(out, "tariff_yearly", filters=[("year", "==", 2024), ("hs2", "==", 12)])``。
+
+    分区列和 categorical 列按 _schema.json 还原为写出时的 dtype。
+    """
+    _require_pyarrow()
+    schema = read_output_schema(output_dir, name)
+    dataset_dir = parquet_dataset_path(output_dir, name)
+    df = pd.read_parquet(
+        dataset_dir,
+        engine="pyarrow",
+        columns=list(columns) if columns is not None else None,
+        filters=filters,
+    )
+    dtypes = {c["name"]: c["dtype"] for c in schema["columns"]}  # type: ignore[index]
+    for col in schema["partition_cols"]:  # type: ignore[union-attr]
+        if col in df.columns:
+            df[col] = df[col].astype(str).astype(dtypes[col])
+    for col, dtype in dtypes.items():
+        if dtype == "category" and col in df.columns:
+            df[col] = df[col].astype("category")
+    ordered = [c["name"] for c in schema["columns"] if c["name"] in df.columns]  # type: ignore[index]
+    return df[ordered]
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+面板内存紧凑化（dtype schema）
+
+wash 流程中的面板默认把 hts8 / hs2 / hs4 / hs6、伙伴国、描述、行业等都存成 Python 字符串，
+税率存成 float64。多年份堆叠的 HTS8 面板是最大的内存对象。本模块统一约定：
+
+- 产品编码（hts8, hs6, hs4, hs2）存为能容纳的最小整数类型；
+- 伙伴国、描述、行业、指标名等重复文本存为 categorical；
+- 浮点列保留 float64：税率会写出并参与 HS 汇总，降为 float32 会改变输出
+  （如 9999.999999 哨兵值变成 10000.0）；
+- 其他整数列按取值范围降位。
+
+写出 CSV 时用 ``format_code_columns`` 把编码恢复为补零字符串，输出格式保持不变。
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+
+# 编码列 -> 补零宽度
+CODE_COLUMN_WIDTHS: Dict[str, int] = {
+    "hts8": 8,
+    "hs6": 6,
+    "hs4": 4,
+    "hs2": 2,
+}
+
+# 固定存为 categorical 的文本列
+CATEGORY_COLUMNS: Sequence[str] = (
+    "partner_name",
+    "partner_iso3",
+    "description",
+    "brief_description",
+    "sector",
+    "sector_big",
+    "metric",
+)
+
+# 其余文本列：唯一值占比低于该阈值时也转为 categorical
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+# 年度关税面板下游汇总用到的源列。默认读取全部列（tariff_yearly 保留各协定 / 优惠项目列）；
+# 不输出 tariff_yearly 时 datawash 只读这些列，也可以把 TARIFF_KEEP_COLUMNS 设为它（见 tariff_schema.py）
+TARIFF_CORE_COLUMNS: Sequence[str] = (
+    "hts8",
+    "brief_description",
+    "quantity_1_code",
+    "wto_binding_code",
+    "mfn_text_rate",
+    "mfn_rate_type_code",
+    "mfn_ave",
+    "mfn_ad_val_rate",
+    "mfn_specific_rate",
+    "mfn_other_rate",
+    "col2_text_rate",
+    "col2_rate_type_code",
+    "col2_ad_val_rate",
+    "col2_specific_rate",
+    "col2_other_rate",
+    "begin_effect_date",
+    "end_effective_date",
+    "additional_duty",
+)
+
+
+def memory_usage_mb(df: pd.DataFrame) -> float:
+    """
+    DataFrame 的深度内存占用（MB）。
+    """
+    return float(df.memory_usage(deep=True).sum()) / 1e6
+
+
+def _smallest_int_dtype(values: pd.Series) -> str:
+    lo, hi = values.min(), values.max()
+    for dtype in ("int8", "int16", "int32"):
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return dtype
+    return "int64"
+
+
+def compact_code_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    编码列转为最小整数类型（有缺失值时用可空整数类型）。原地修改并返回。
+    """
+    for col in CODE_COLUMN_WIDTHS:
+        if col not in df.columns or pd.api.types.is_integer_dtype(df[col].dtype):
+            continue
+        codes = pd.to_numeric(df[col], errors="coerce")
+        valid = codes.dropna()
+        dtype = _smallest_int_dtype(valid) if not valid.empty else "int8"
+        if codes.isna().any():
+            df[col] = codes.astype(dtype.capitalize())
+        else:
+            df[col] = codes.astype(dtype)
+    return df
+
+
+def downcast_numeric_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    非编码整数列按取值范围降位（浮点列保持 float64）。原地修改并返回。
+    """
+    for col in df.columns:
+        dtype = df[col].dtype
+        if col not in CODE_COLUMN_WIDTHS and dtype in (np.int64, np.int32) and len(df) > 0:
+            df[col] = df[col].astype(_smallest_int_dtype(df[col]))
+    return df
+
+
+def categorize_text_columns(
+    df: pd.DataFrame,
+    columns: Iterable[str] = CATEGORY_COLUMNS,
+    max_unique_ratio: float = CATEGORY_MAX_UNIQUE_RATIO,
+) -> pd.DataFrame:
+    """
+    指定文本列以及低基数的其他文本列转为 categorical。原地修改并返回。
+    """
+    fixed = set(columns)
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            continue
+        if not (pd.api.types.is_object_dtype(df[col].dtype) or pd.api.types.is_string_dtype(df[col].dtype)):
+            continue
+        if col in fixed or (len(df) > 0 and df[col].nunique(dropna=True) / len(df) < max_unique_ratio):
+            df[col] = df[col].astype("category")
+    return df
+
+
+def compact_panel(
+    df: pd.DataFrame,
+    name: Optional[str] = None,
+    keep_columns: Optional[Sequence[str]] = None,
+    categorize: bool = True,
+) -> pd.DataFrame:
+    """
+    按统一 schema 紧凑化一个面板：丢弃不需要的列、编码转整数、文本转 categorical、
+    整数降位。给出 name 时打印前后内存对比。
+
+    categorize=False 适用于之后还要和其他块 concat 的中间结果（不同类别集合的
+    categorical 拼接会退化为 object）。
+    """
+    before = memory_usage_mb(df) if name else 0.0
+
+    if keep_columns is not None:
+        df = df[[c for c in df.columns if c in set(keep_columns)]]
+    df = df.copy()
+
+    compact_code_columns(df)
+    downcast_numeric_columns(df)
+    if categorize:
+        categorize_text_columns(df)
+
+    if name:
+        after = memory_usage_mb(df)
+        print(f"[Memory] {name}: {before:.1f} MB -> {after:.1f} MB")
+    return df
+
+
+def concat_compact_panels(chunks: Sequence[pd.DataFrame]) -> pd.DataFrame:
+    """
+    拼接已紧凑化的块：categorical 列先合并类别集合（union_categoricals），
+    避免 pd.concat 在类别集合不同时退化为 object；其余列直接拼接。
+    """
+    if not chunks:
+        return pd.DataFrame()
+    if len(chunks) == 1:
+        return chunks[0].reset_index(drop=True)
+    columns: Dict[str, object] = {}
+    for col in chunks[0].columns:
+        parts = [chunk[col] for chunk in chunks]
+        if all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            columns[col] = union_categoricals(parts, sort_categories=True)
+        else:
+            columns[col] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(columns)
+
+
+def format_code_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    返回编码列恢复为补零字符串的副本（用于写出 CSV，保持原有输出格式）。
+    """
+    out = df.copy()
+    for col, width in CODE_COLUMN_WIDTHS.items():
+        if col in out.columns and pd.api.types.is_integer_dtype(out[col].dtype):
+            text = out[col].astype("Int64").astype(str).str.zfill(width)
+            out[col] = text.where(out[col].notna(), None)
+    return out
@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+清洗面板的本地 SQLite 分析库
+
+把 ``save_all_outputs`` 写出的全部面板（tariff_yearly、HS2/HS4/HS6 关税面板、贸易面板
+及各汇总表）写入一个 SQLite 文件，并建立索引：
+
+- (year, hs2) / (year, hs4) / (year, hs6) : 所有含 year 和该编码列的表
+- (year, hts8)         : tariff_yearly
+- (partner_iso3, year) : 贸易面板
+
+查询接口返回 DataFrame：
+
+    query_panel(db, "trade_export_panel", hs2=12, partner_iso3="CHN")
+    query_store(db, "SELECT year, SUM(import_duty) AS duty FROM trade_duty_panel GROUP BY year")
+
+编码列与 CSV 输出一样以补零文本存储（"01"、"01011000"），查询结果保留前导零；
+查询参数可传整数或字符串（1、"1"、"01" 等价）。只依赖标准库 sqlite3。
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from panel_schema import CODE_COLUMN_WIDTHS, format_code_columns
+
+
+# 候选索引：只在表中具备全部列时创建
+STORE_INDEXES: Sequence[Tuple[str, ...]] = (
+    ("year", "hs2"),
+    ("year", "hs4"),
+    ("year", "hs6"),
+    ("year", "hts8"),
+    ("partner_iso3", "year"),
+)
+
+CODE_FILTER_COLUMNS = ("hs2", "hs4", "hs6", "hts8")
+
+WRITE_CHUNK_ROWS = 50_000
+
+
+def _to_sql_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    转成 SQLite 友好的列类型：编码 -> 补零文本，categorical -> 文本，日期 -> ISO 字符串。
+    """
+    out = format_code_columns(df)
+    for col in out.columns:
+        dtype = out[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            out[col] = out[col].astype(object).where(out[col].notna(), None)
+        elif pd.api.types.is_datetime64_any_dtype(dtype):
+            out[col] = out[col].dt.strftime("%Y-%m-%d")
+    return out
+
+
+def write_sqlite_store(
+    outputs: Dict[str, pd.DataFrame],
+    db_path: Path,
+    tables: Optional[Sequence[str]] = None,
+) -> None:
+    """
+    将面板写入 SQLite（同名表整体替换）并建索引。tables 默认为 outputs 中的全部表，
+    即 ``save_all_outputs`` 写出的全部面板；outputs 中缺失的表跳过。
+    """
+    if tables is None:
+        tables = list(outputs)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(db_path)
+    try:
+        # 批量导入：关闭同步与回滚日志，导入结束后再 ANALYZE
+        con.execute("PRAGMA journal_mode=OFF")
+        con.execute("PRAGMA synchronous=OFF")
+        for name in tables:
+            if name not in outputs:
+                continue
+            df = outputs[name]
+            print(f"[SQLite] Writing {name} ({len(df)} rows) -> {db_path}")
+            _to_sql_frame(df).to_sql(
+                name,
+                con,
+                if_exists="replace",
+                index=False,
+                chunksize=WRITE_CHUNK_ROWS,
+            )
+            for cols in STORE_INDEXES:
+                if all(c in df.columns for c in cols):
+                    index_name = f"idx_{name}_{'_'.join(cols)}"
+                    con.execute(f'CREATE INDEX IF NOT EXISTS "{index_name}" ON "{name}" ({", ".join(cols)})')
+        con.execute("ANALYZE")
+        con.commit()
+    finally:
+        con.close()
+
+
+def list_store_tables(db_path: Path) -> List[str]:
+    """
+    库中已有的表名（不含 ANALYZE 生成的 sqlite_stat* 等内部表）。
+    """
+    frame = query_store(
+        db_path,
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name",
+    )
+    return frame["name"].tolist()
+
+
+def query_store(
+    db_path: Path,
+    sql: str,
+    params: Optional[Sequence[object]] = None,
+) -> pd.DataFrame:
+    """
+    以只读方式执行任意 SQL，返回 DataFrame。
+    """
+    if not db_path.exists():
+        raise FileNotFoundError(f"SQLite store not found: {db_path}")
+    con = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return pd.read_sql_query(sql, con, params=list(params) if params is not None else None)
+    finally:
+        con.close()
+
+
+def query_panel(
+    db_path: Path,
+    table: str,
+    columns: Optional[Sequence[str]] = None,
+    year: Optional[object] = None,
+    partner_iso3: Optional[object] = None,
+    **code_filters: object,
+) -> pd.DataFrame:
+    """
+    按常用维度过滤某张表，走 (year, hs2) / (year, hts8) / (partner_iso3, year) 索引。
+
+    每个过滤参数可以是单值或列表，例如：
+        query_panel(db, "trade_duty_panel", year=[2023, 2024], hs2="87", partner_iso3="CHN")
+        query_panel(db, "tariff_yearly", year=2024, hts8="12019000")
+    """
+    if table not in list_store_tables(db_path):
+        raise KeyError(f"Table '{table}' not found in SQLite store {db_path}")
+    unknown = [c for c in code_filters if c not in CODE_FILTER_COLUMNS]
+    if unknown:
+        raise KeyError(f"Unsupported filter columns: {unknown}; expected any of {CODE_FILTER_COLUMNS}")
+
+    filters: Dict[str, object] = {"year": year, "partner_iso3": partner_iso3}
+    for col, value in code_filters.items():
+        filters[col] = value
+
+    where: List[str] = []
+    params: List[object] = []
+    for col, value in filters.items():
+        if value is None:
+            continue
+        values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+        if col in CODE_FILTER_COLUMNS:
+            values = [str(int(v)).zfill(CODE_COLUMN_WIDTHS[col]) for v in values]  # type: ignore[call-overload]
+        elif col == "year":
+            values = [int(v) for v in values]  # type: ignore[call-overload]
+        where.append(f'"{col}" IN ({", ".join("?" for _ in values)})')
+        params.extend(values)
+
+    select = ", ".join(f'"{c}"' for c in columns) if columns else "*"
+    sql = f'SELECT {select} FROM "{table}"'
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return query_store(db_path, sql, params)
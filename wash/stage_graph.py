@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+清洗流程的阶段依赖图与并发执行
+
+每个阶段（Stage）是一个函数加上它依赖的上游阶段名；依赖的结果按声明顺序作为
+位置参数传入。互不依赖的阶段同时提交到工作池：
+
+    stages = [
+        Stage("tariff_yearly", partial(build_tariff_yearly_panel, config)),
+        Stage("exports_long", partial(read_dataweb_metric, export_path, ...)),
+        Stage("aggregates", build_aggregates, deps=("tariff_yearly", "exports_long"), inline=True),
+    ]
+    results, timings = run_stage_graph(stages, max_workers=3, executor="process")
+
+- executor="process"：进程池。Excel 解析主要是纯 Python，线程受 GIL 限制，
+  用进程才能真正并行；阶段函数和参数需可 pickle（模块级函数 / functools.partial）。
+- executor="thread"：线程池，适合以 I/O 为主的阶段。
+- executor="serial"：按拓扑顺序在当前进程依次执行，便于调试。
+
+inline=True 的阶段总是在主进程执行（下游的合并、保存等轻量阶段，避免来回 pickle
+大表）。``select_stages`` 可把图裁剪为若干目标阶段及其上游。结束后
+``print_stage_timings`` 打印每个阶段的起止时间和耗时。
+"""
+
+from __future__ import annotations
+
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+STAGE_EXECUTORS = ("process", "thread", "serial")
+
+
+class Stage:
+    """
+    依赖图中的一个阶段。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[..., object],
+        deps: Sequence[str] = (),
+        inline: bool = False,
+    ) -> None:
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.inline = inline
+
+
+class StageTiming:
+    """
+    单个阶段的执行记录（时间为相对整个图开始执行的秒数）。
+    """
+
+    def __init__(self, name: str, start: float, end: float, where: str) -> None:
+        self.name = name
+        self.start = start
+        self.end = end
+        self.where = where
+
+    @property
+    def seconds(self) -> float:
+        return self.end - self.start
+
+
+def _timed_call(func: Callable[..., object], args: Tuple[object, ...]) -> Tuple[object, float, float]:
+    # 用墙钟时间，进程池中的起止时间也能与主进程对齐
+    start = time.time()
+    result = func(*args)
+    return result, start, time.time()
+
+
+def _check_graph(stages: Sequence[Stage]) -> List[Stage]:
+    """
+    检查阶段名唯一、依赖存在且无环，返回拓扑序。
+    """
+    by_name: Dict[str, Stage] = {}
+    for stage in stages:
+        if stage.name in by_name:
+            raise ValueError(f"Duplicate stage name: '{stage.name}'")
+        by_name[stage.name] = stage
+    for stage in stages:
+        missing = [d for d in stage.deps if d not in by_name]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' depends on unknown stages: {missing}")
+
+    ordered: List[Stage] = []
+    done: set = set()
+    remaining = list(stages)
+    while remaining:
+        ready = [s for s in remaining if all(d in done for d in s.deps)]
+        if not ready:
+            raise ValueError(f"Dependency cycle among stages: {[s.name for s in remaining]}")
+        for stage in ready:
+            ordered.append(stage)
+            done.add(stage.name)
+        remaining = [s for s in remaining if s.name not in done]
+    return ordered
+
+
+def select_stages(stages: Sequence[Stage], targets: Sequence[str]) -> List[Stage]:
+    """
+    只保留 targets 及其全部上游阶段（保持原有顺序），其余阶段不执行。
+    """
+    by_name = {stage.name: stage for stage in stages}
+    unknown = [t for t in targets if t not in by_name]
+    if unknown:
+        raise ValueError(f"Unknown target stages: {unknown}")
+
+    needed: set = set()
+    frontier = list(targets)
+    while frontier:
+        name = frontier.pop()
+        if name in needed:
+            continue
+        needed.add(name)
+        frontier.extend(by_name[name].deps)
+    return [stage for stage in stages if stage.name in needed]
+
+
+def _make_executor(executor: str, max_workers: Optional[int]) -> Optional[Executor]:
+    if executor not in STAGE_EXECUTORS:
+        raise ValueError(f"Unknown stage executor '{executor}', expected one of {STAGE_EXECUTORS}")
+    if executor == "serial":
+        return None
+    if executor == "process":
+        return ProcessPoolExecutor(max_workers=max_workers)
+    return ThreadPoolExecutor(max_workers=max_workers)
+
+
+def run_stage_graph(
+    stages: Sequence[Stage],
+    max_workers: Optional[int] = None,
+    executor: str = "process",
+) -> Tuple[Dict[str, object], List[StageTiming]]:
+    """
+    执行依赖图，返回 (阶段名 -> 结果, 按结束顺序排列的执行记录)。
+
+    任一阶段抛出异常时取消尚未开始的阶段，并以 RuntimeError 注明失败的阶段名。
+    """
+    ordered = _check_graph(stages)
+    pool = _make_executor(executor, max_workers)
+
+    t0 = time.time()
+    results: Dict[str, object] = {}
+    timings: List[StageTiming] = []
+    pending = list(ordered)
+    running: Dict[Future, Stage] = {}
+
+    def _record(stage: Stage, result: object, start: float, end: float, where: str) -> None:
+        results[stage.name] = result
+        timings.append(StageTiming(stage.name, start - t0, end - t0, where))
+
+    try:
+        while pending or running:
+            ready = [s for s in pending if all(d in results for d in s.deps)]
+            pending = [s for s in pending if s not in ready]
+
+            # 先提交所有可并行的阶段，再在主进程执行就绪的 inline 阶段
+            for stage in ready:
+                if pool is not None and not stage.inline:
+                    args = tuple(results[d] for d in stage.deps)
+                    running[pool.submit(_timed_call, stage.func, args)] = stage
+            for stage in ready:
+                if pool is None or stage.inline:
+                    args = tuple(results[d] for d in stage.deps)
+                    try:
+                        result, start, end = _timed_call(stage.func, args)
+                    except Exception as exc:
+                        raise RuntimeError(f"Stage '{stage.name}' failed: {exc}") from exc
+                    _record(stage, result, start, end, "main")
+
+            if not running:
+                if pending and not any(all(d in results for d in s.deps) for s in pending):
+                    raise RuntimeError(f"Stages could not be scheduled: {[s.name for s in pending]}")
+                continue
+
+            finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage = running.pop(future)
+                try:
+                    result, start, end = future.result()
+                except Exception as exc:
+                    raise RuntimeError(f"Stage '{stage.name}' failed: {exc}") from exc
+                _record(stage, result, start, end, executor)
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    return results, timings
+
+
+def print_stage_timings(timings: Sequence[StageTiming]) -> None:
+    """
+    打印每个阶段的起止时间、耗时，以及总墙钟时间与各阶段耗时之和的对比。
+    """
+    if not timings:
+        return
+    wall = max(t.end for t in timings) - min(t.start for t in timings)
+    total = sum(t.seconds for t in timings)
+    width = max(len(t.name) for t in timings)
+    print("[Stages] Timing summary (seconds):")
+    for t in sorted(timings, key=lambda x: (x.start, x.name)):
+        print(f"  {t.name:<{width}}  start {t.start:7.2f}  end {t.end:7.2f}  took {t.seconds:7.2f}  [{t.where}]")
+    print(f"[Stages] Wall time {wall:.2f}s, sum of stages {total:.2f}s")
@@ -0,0 +1,383 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+关税税则的变更日志存储
+
+各年度税则几乎是同一份约 1.2 万行 HTS8 的完整拷贝。本模块把 tariff_yearly
+（每个 (year, hts8) 一行）改存为：
+
+- base    : 首个年份的完整快照；
+- added   : 之后每年新增的 HTS8 行（完整行）；
+- removed : 之后每年删除的 HTS8 编码；
+- changes : 之后每年被修改的行中、实际变化的字段：字段 -> (hts8, 新值)。
+
+``snapshot(year)`` 从 base 依次应用各年变更重建任一年的面板（可只重建某章或指定编码）；
+``diff(year_a, year_b, chapter)`` 只重建两年间被触及的编码，列出新增、删除和逐字段修改。
+
+hs2 / hs4 / hs6 由 hts8 派生，不单独存储；year 在重建时补上。
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# 可选依赖：变更日志以 Parquet 落盘
+try:
+    import pyarrow  # type: ignore  # noqa: F401
+except ImportError:  # pragma: no cover - safe fallback
+    pyarrow = None  # type: ignore
+
+
+DERIVED_CODE_COLUMNS = ("hs2", "hs4", "hs6")
+META_FILE_NAME = "_changelog.json"
+
+
+def _values_differ(a: pd.Series, b: pd.Series) -> np.ndarray:
+    """
+    逐元素比较两列（缺失与缺失视为相同）。
+    """
+    a_na, b_na = a.isna().to_numpy(), b.isna().to_numpy()
+    if isinstance(a.dtype, pd.CategoricalDtype) or isinstance(b.dtype, pd.CategoricalDtype):
+        a, b = a.astype(object), b.astype(object)
+    with np.errstate(invalid="ignore"):
+        neq = (a.to_numpy() != b.to_numpy())
+    neq = np.asarray(neq, dtype=bool)
+    return (neq & ~(a_na & b_na)) | (a_na != b_na)
+
+
+def _add_derived_codes(df: pd.DataFrame, year: int, columns: Sequence[str]) -> pd.DataFrame:
+    hts8 = df["hts8"].to_numpy(dtype=np.int64)
+    out = df.copy()
+    out["year"] = np.int16(year)
+    out["hs2"] = (hts8 // 10 ** 6).astype(np.int8)
+    out["hs4"] = (hts8 // 10 ** 4).astype(np.int16)
+    out["hs6"] = (hts8 // 10 ** 2).astype(np.int32)
+    return out[[c for c in columns if c in out.columns]]
+
+
+class TariffChangeLog:
+    """
+    base 快照 + 逐年增量的税则存储。
+    """
+
+    def __init__(
+        self,
+        years: List[int],
+        columns: List[str],
+        base: pd.DataFrame,
+        added: Dict[int, pd.DataFrame],
+        removed: Dict[int, np.ndarray],
+        changes: Dict[int, Dict[str, pd.DataFrame]],
+    ) -> None:
+        self.years = years
+        self.columns = columns
+        self.base = base
+        self.added = added
+        self.removed = removed
+        self.changes = changes
+
+    # ------------------------------------------------------------------
+    # 构建
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_panel(cls, tariff_yearly: pd.DataFrame) -> "TariffChangeLog":
+        """
+        从年度 HTS8 面板（每个 (year, hts8) 唯一）构建变更日志。
+        """
+        columns = list(tariff_yearly.columns)
+        fields = [c for c in columns if c not in ("year", "hts8", *DERIVED_CODE_COLUMNS)]
+        years = sorted(int(y) for y in tariff_yearly["year"].unique())
+        by_year = {
+            int(y): g[["hts8", *fields]].sort_values("hts8").reset_index(drop=True)
+            for y, g in tariff_yearly.groupby("year", observed=True, sort=True)
+        }
+
+        base = by_year[years[0]]
+        added: Dict[int, pd.DataFrame] = {}
+        removed: Dict[int, np.ndarray] = {}
+        changes: Dict[int, Dict[str, pd.DataFrame]] = {}
+
+        for prev_year, year in zip(years[:-1], years[1:]):
+            prev, cur = by_year[prev_year], by_year[year]
+            prev_codes = prev["hts8"].to_numpy(dtype=np.int64)
+            cur_codes = cur["hts8"].to_numpy(dtype=np.int64)
+            common, prev_pos, cur_pos = np.intersect1d(prev_codes, cur_codes, assume_unique=True, return_indices=True)
+
+            added[year] = cur.loc[~np.isin(cur_codes, common)].reset_index(drop=True)
+            removed[year] = prev_codes[~np.isin(prev_codes, common)]
+
+            year_changes: Dict[str, pd.DataFrame] = {}
+            for field in fields:
+                old = prev[field].iloc[prev_pos].reset_index(drop=True)
+                new = cur[field].iloc[cur_pos].reset_index(drop=True)
+                diff = _values_differ(old, new)
+                if diff.any():
+                    year_changes[field] = pd.DataFrame({"hts8": common[diff], "value": new[diff].to_numpy()})
+                    if isinstance(cur[field].dtype, pd.CategoricalDtype):
+                        year_changes[field]["value"] = pd.Categorical(
+                            year_changes[field]["value"], categories=cur[field].cat.categories
+                        )
+                    else:
+                        year_changes[field]["value"] = year_changes[field]["value"].astype(cur[field].dtype)
+            changes[year] = year_changes
+
+        return cls(years, columns, base, added, removed, changes)
+
+    # ------------------------------------------------------------------
+    # 重建与比较
+    # ------------------------------------------------------------------
+
+    def _check_year(self, year: int) -> None:
+        if year not in self.years:
+            raise KeyError(f"Year {year} not in tariff change log (available: {self.years})")
+
+    def snapshot(
+        self,
+        year: int,
+        chapters: Optional[Sequence[int]] = None,
+        codes: Optional[np.ndarray] = None,
+    ) -> pd.DataFrame:
+        """
+        重建某年的 HTS8 面板，列与原 tariff_yearly 相同。
+        chapters / codes 给出时只重建这些章 / 编码。
+        """
+        self._check_year(year)
+
+        def _select(frame: pd.DataFrame) -> pd.DataFrame:
+            if chapters is None and codes is None:
+                return frame
+            hts8 = frame["hts8"].to_numpy(dtype=np.int64)
+            keep = np.ones(hts8.size, dtype=bool)
+            if chapters is not None:
+                keep &= np.isin(hts8 // 10 ** 6, list(chapters))
+            if codes is not None:
+                keep &= np.isin(hts8, codes)
+            return frame.loc[keep]
+
+        cur = _select(self.base).set_index("hts8")
+        for y in self.years[1:]:
+            if y > year:
+                break
+            cur = cur.drop(index=cur.index.intersection(self.removed[y]))
+            for field, delta in self.changes[y].items():
+                delta = _select(delta)
+                if delta.empty:
+                    continue
+                pos = cur.index.get_indexer(delta["hts8"].to_numpy())
+                hit = pos >= 0
+                if hit.any():
+                    cur.iloc[pos[hit], cur.columns.get_loc(field)] = delta["value"].to_numpy()[hit]
+            new_rows = _select(self.added[y])
+            if not new_rows.empty:
+                cur = pd.concat([cur, new_rows.set_index("hts8")])
+        cur = cur.sort_index().reset_index()
+        return _add_derived_codes(cur, year, self.columns)
+
+    def diff(self, year_a: int, year_b: int, chapter: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+        """
+        year_a -> year_b 之间（可限定某一章）的净变化：
+
+        - added    : year_b 中有、year_a 中没有的行（year_b 的取值）
+        - removed  : year_a 中有、year_b 中没有的行（year_a 的取值）
+        - modified : hts8, field, value_a, value_b（两年都存在且取值不同的字段）
+
+        只重建两年之间被变更日志触及的编码，不生成完整面板。
+        """
+        self._check_year(year_a)
+        self._check_year(year_b)
+        lo, hi = sorted((year_a, year_b))
+
+        touched: List[np.ndarray] = []
+        for y in self.years:
+            if lo < y <= hi:
+                touched.append(self.removed[y])
+                touched.append(self.added[y]["hts8"].to_numpy(dtype=np.int64))
+                touched.extend(d["hts8"].to_numpy(dtype=np.int64) for d in self.changes[y].values())
+        codes = np.unique(np.concatenate(touched)) if touched else np.zeros(0, dtype=np.int64)
+        if chapter is not None:
+            codes = codes[codes // 10 ** 6 == int(chapter)]
+
+        snap_a = self.snapshot(year_a, codes=codes).set_index("hts8")
+        snap_b = self.snapshot(year_b, codes=codes).set_index("hts8")
+        common = snap_a.index.intersection(snap_b.index)
+
+        fields = [c for c in self.columns if c not in ("year", "hts8", *DERIVED_CODE_COLUMNS)]
+        modified: List[pd.DataFrame] = []
+        for field in fields:
+            a = snap_a.loc[common, field].reset_index(drop=True)
+            b = snap_b.loc[common, field].reset_index(drop=True)
+            mask = _values_differ(a, b)
+            if mask.any():
+                modified.append(
+                    pd.DataFrame(
+                        {
+                            "hts8": common.to_numpy()[mask],
+                            "field": field,
+                            "value_a": a[mask].astype(object).to_numpy(),
+                            "value_b": b[mask].astype(object).to_numpy(),
+                        }
+                    )
+                )
+        modified_df = (
+            pd.concat(modified, ignore_index=True).sort_values(["hts8", "field"], ignore_index=True)
+            if modified
+            else pd.DataFrame(columns=["hts8", "field", "value_a", "value_b"])
+        )
+
+        return {
+            "added": snap_b.loc[snap_b.index.difference(snap_a.index)].reset_index(),
+            "removed": snap_a.loc[snap_a.index.difference(snap_b.index)].reset_index(),
+            "modified": modified_df,
+        }
+
+    # ------------------------------------------------------------------
+    # 统计与落盘
+    # ------------------------------------------------------------------
+
+    def memory_usage_mb(self) -> float:
+        """
+        变更日志占用的内存（MB）。各块共享同一份 categorical 类别字典，只计一次。
+        """
+        frames = [self.base, *self.added.values(), *(df for fields in self.changes.values() for df in fields.values())]
+        seen: set = set()
+        total = sum(arr.nbytes for arr in self.removed.values())
+        for df in frames:
+            for col in df.columns:
+                series = df[col]
+                if isinstance(series.dtype, pd.CategoricalDtype):
+                    total += series.cat.codes.nbytes
+                    if id(series.cat.categories) not in seen:
+                        seen.add(id(series.cat.categories))
+                        total += series.cat.categories.memory_usage(deep=True)
+                else:
+                    total += series.memory_usage(deep=True, index=False)
+        return total / 1e6
+
+    def summary(self) -> pd.DataFrame:
+        """
+        每年的新增 / 删除 / 修改行数和变化字段数。
+        """
+        rows = [{"year": self.years[0], "added": len(self.base), "removed": 0, "modified_lines": 0, "changed_cells": 0}]
+        for y in self.years[1:]:
+            changed = [d["hts8"].to_numpy() for d in self.changes[y].values()]
+            rows.append(
+                {
+                    "year": y,
+                    "added": len(self.added[y]),
+                    "removed": int(self.removed[y].size),
+                    "modified_lines": int(np.unique(np.concatenate(changed)).size) if changed else 0,
+                    "changed_cells": int(sum(a.size for a in changed)),
+                }
+            )
+        return pd.DataFrame(rows)
+
+
+def _unify_dtypes(parts: List[pd.Series]) -> List[pd.Series]:
+    """
+    把同一字段在 base / 各年 added / 各年 changes 中的取值统一为一种 dtype
+    （Parquet 每列只能有一种类型）。
+
+    - 全是 categorical 且类别同类型：类别集合取并集；
+    - 全是数值或全是日期：保持不变，由 concat 取公共类型；
+    - 其他情况（object 列、类别混有多种类型、文本与数值混用）：统一为 pandas string。
+    """
+    dtypes = [p.dtype for p in parts]
+    if all(isinstance(d, pd.CategoricalDtype) for d in dtypes):
+        categories = pd.Index(pd.concat([pd.Series(d.categories, dtype=object) for d in dtypes]).unique())
+        if not pd.api.types.infer_dtype(categories, skipna=True).startswith("mixed"):
+            categories = categories.astype(dtypes[0].categories.dtype)
+            return [p.cat.set_categories(categories) for p in parts]
+    elif all(pd.api.types.is_numeric_dtype(d) and not pd.api.types.is_bool_dtype(d) for d in dtypes):
+        return parts
+    elif all(pd.api.types.is_datetime64_any_dtype(d) for d in dtypes):
+        return parts
+    return [p.astype("string") for p in parts]
+
+
+def _unified_frames(
+    log: TariffChangeLog,
+) -> Tuple[pd.DataFrame, Dict[int, pd.DataFrame], Dict[int, Dict[str, pd.DataFrame]]]:
+    """
+    返回各字段 dtype 已统一的 base、added、changes 副本（见 _unify_dtypes）。
+    """
+    base = log.base.copy()
+    added = {y: df.copy() for y, df in log.added.items()}
+    changes = {y: {f: d.copy() for f, d in fields.items()} for y, fields in log.changes.items()}
+    for field in base.columns:
+        if field == "hts8":
+            continue
+        slots = [(base, field)]
+        slots += [(df, field) for df in added.values()]
+        slots += [(fields[field], "value") for fields in changes.values() if field in fields]
+        for (frame, col), values in zip(slots, _unify_dtypes([frame[col] for frame, col in slots])):
+            frame[col] = values
+    return base, added, changes
+
+
+def write_changelog(log: TariffChangeLog, directory: Path) -> Path:
+    """
+    以 Parquet 写出变更日志：base、added（长表，带 year）、removed（year, hts8）、
+    每个字段一个 changes_<field>.parquet（year, hts8, value），以及 _changelog.json。
+
+    各字段在所有年份中先统一为一种 dtype 再写出（各年度源文件中同一列的类型可能不同）。
+    """
+    if pyarrow is None:
+        raise ImportError("Writing the tariff change log requires pyarrow.")
+    directory.mkdir(parents=True, exist_ok=True)
+
+    base, added_by_year, changes_by_year = _unified_frames(log)
+    base.to_parquet(directory / "base.parquet", index=False)
+    added = pd.concat(
+        [df.assign(year=y) for y, df in added_by_year.items()] or [base.iloc[:0].assign(year=0)],
+        ignore_index=True,
+    )
+    added.to_parquet(directory / "added.parquet", index=False)
+    removed = pd.DataFrame(
+        {
+            "year": np.concatenate([np.full(a.size, y, dtype=np.int16) for y, a in log.removed.items()] or [np.zeros(0, np.int16)]),
+            "hts8": np.concatenate(list(log.removed.values()) or [np.zeros(0, np.int64)]),
+        }
+    )
+    removed.to_parquet(directory / "removed.parquet", index=False)
+
+    fields = sorted({f for fields in changes_by_year.values() for f in fields})
+    for field in fields:
+        frames = [d[field].assign(year=y) for y, d in changes_by_year.items() if field in d]
+        pd.concat(frames, ignore_index=True).to_parquet(directory / f"changes_{field}.parquet", index=False)
+
+    meta = {"years": log.years, "columns": log.columns, "changed_fields": fields}
+    (directory / META_FILE_NAME).write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    return directory
+
+
+def read_changelog(directory: Path) -> TariffChangeLog:
+    """
+    读取 write_changelog 写出的变更日志。
+    """
+    if pyarrow is None:
+        raise ImportError("Reading the tariff change log requires pyarrow.")
+    meta_path = directory / META_FILE_NAME
+    if not meta_path.exists():
+        raise FileNotFoundError(f"Tariff change log not found: {meta_path}")
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    years = [int(y) for y in meta["years"]]
+
+    base = pd.read_parquet(directory / "base.parquet")
+    added_all = pd.read_parquet(directory / "added.parquet")
+    removed_all = pd.read_parquet(directory / "removed.parquet")
+    added = {y: added_all[added_all["year"] == y].drop(columns="year").reset_index(drop=True) for y in years[1:]}
+    removed = {y: removed_all.loc[removed_all["year"] == y, "hts8"].to_numpy(dtype=np.int64) for y in years[1:]}
+
+    changes: Dict[int, Dict[str, pd.DataFrame]] = {y: {} for y in years[1:]}
+    for field in meta["changed_fields"]:
+        frame = pd.read_parquet(directory / f"changes_{field}.parquet")
+        for y, g in frame.groupby("year", sort=True):
+            changes[int(y)][field] = g.drop(columns="year").reset_index(drop=True)
+    return TariffChangeLog(years, list(meta["columns"]), base, added, removed, changes)
@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+关税库各年度版本（vintage）的列 schema 注册表与按列读取
+
+USITC 关税库每个年度的 Excel 有 110–120 多列（各自由贸易协定的税率等），不同年度的
+列集合也不完全相同（2020 年以前没有 japan_* / usmca_*）。以前每个文件整表
+``pd.read_excel``（全部列都做类型推断），再对各年度取列并集、逐个 reindex 后拼接。
+
+本模块用注册表事先声明每个规范列的类型和可能的源列名（默认配置登记了 USITC
+关税库的全部 122 列），读取时：
+
+- 用 openpyxl 只读模式逐行遍历 sheet，每行只取需要的列（itemgetter 投影）；
+  只要一部分列时（names），其余列不构造 DataFrame 列、也不做类型推断；
+- 按注册表中的 dtype 显式转换；某年度缺少的已登记列补为同类型的空列，
+  因此各年度 DataFrame 的已登记列完全一致，可以直接拼接；
+- 读取全部列（names=None）时，表头中未登记的列原样保留（dtype "auto"，一律按文本
+  读入，不做类型推断，同一列在各年度的类型因此一致），新年度多出的列不会被丢掉。
+
+配置文件默认是 wash/config/tariff_schema.json，格式：
+
+    {
+      "na_values": ["", "NA", "N/A", ...],       # 文本单元格中视为缺失的取值
+      "columns": {
+        "<规范列名>": {"dtype": "code|text|int|float|date",
+                     "aliases": ["其他年份的源列名", ...], "required": false}
+      },
+      "vintages": {
+        "<年份>": {"sheet": "工作表名", "columns": {"<规范列名>": "<该年度源列名>"}}
+      }
+    }
+
+已登记列必须给出固定类型（"auto" 只用于未登记的源列）。
+未登记的年份使用第一个工作表，按 规范列名 -> aliases 的顺序在表头中查找源列。
+"""
+
+from __future__ import annotations
+
+import json
+import operator
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+import openpyxl
+
+from panel_schema import CODE_COLUMN_WIDTHS
+
+
+DEFAULT_TARIFF_SCHEMA_PATH = Path(__file__).resolve().parent / "config" / "tariff_schema.json"
+
+SCHEMA_DTYPES: Tuple[str, ...] = ("code", "text", "int", "float", "date", "auto")
+
+# 配置中未给出 na_values 时使用 pd.read_excel 的默认缺失值字符串
+DEFAULT_NA_VALUES: Tuple[str, ...] = (
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+)
+
+
+class TariffColumn:
+    """
+    一个规范列：类型、候选源列名，以及是否必须出现在每个年度的文件里。
+    """
+
+    def __init__(self, name: str, dtype: str, aliases: Sequence[str] = (), required: bool = False) -> None:
+        if dtype not in SCHEMA_DTYPES:
+            raise ValueError(f"Column '{name}': unknown dtype '{dtype}', expected one of {SCHEMA_DTYPES}")
+        if dtype == "code" and name not in CODE_COLUMN_WIDTHS:
+            raise ValueError(f"Column '{name}': dtype 'code' requires a known code width {list(CODE_COLUMN_WIDTHS)}")
+        self.name = name
+        self.dtype = dtype
+        self.aliases = tuple(aliases)
+        self.required = required
+
+    @classmethod
+    def from_config(cls, name: str, spec: Dict[str, object]) -> "TariffColumn":
+        dtype = str(spec.get("dtype", "text"))
+        if dtype == "auto":
+            raise ValueError(f"Column '{name}': registered columns need an explicit dtype, 'auto' is only for unregistered columns")
+        return cls(
+            name,
+            dtype=dtype,
+            aliases=spec.get("aliases", ()),  # type: ignore[arg-type]
+            required=bool(spec.get("required", False)),
+        )
+
+    def convert(self, values: Sequence[object], na_values: Sequence[str] = DEFAULT_NA_VALUES) -> pd.Series:
+        """
+        把一列原始单元格值按 dtype 转为 Series；文本单元格为 na_values 之一时视为缺失。
+        """
+        raw = pd.Series(values, dtype=object)
+        is_text = raw.map(type).eq(str)
+        if is_text.any():
+            raw = raw.mask(is_text & raw.isin(na_values))
+        if self.dtype == "code":
+            width = CODE_COLUMN_WIDTHS[self.name]
+            return raw.astype(str).str.replace(r"\.0$", "", regex=True).str.strip().str.zfill(width)
+        if self.dtype == "float":
+            return pd.to_numeric(raw, errors="coerce").astype("float64")
+        if self.dtype == "int":
+            return pd.to_numeric(raw, errors="coerce").astype("Int64")
+        if self.dtype == "date":
+            return pd.to_datetime(raw, errors="coerce")
+        # text / auto：一律转为文本
+        return raw.where(raw.isna(), raw.astype(str)).astype("str")
+
+    def empty(self, n_rows: int) -> pd.Series:
+        """
+        某年度缺少该列时补的同类型空列。
+        """
+        if self.dtype in ("code", "text", "auto"):
+            return pd.Series([None] * n_rows, dtype="str")
+        return self.convert([None] * n_rows)
+
+
+class TariffSchemaRegistry:
+    """
+    全部规范列和各年度的 sheet / 源列名映射。
+    """
+
+    def __init__(
+        self,
+        columns: Dict[str, TariffColumn],
+        vintages: Dict[int, Dict[str, object]],
+        na_values: Sequence[str] = DEFAULT_NA_VALUES,
+    ) -> None:
+        self.columns = columns
+        self.vintages = vintages
+        self.na_values = tuple(na_values)
+
+    def select(self, names: Optional[Sequence[str]] = None) -> List[TariffColumn]:
+        """
+        按 names（None 表示注册表中全部列）取规范列，必需列总会包含在内。
+        """
+        if names is None:
+            return list(self.columns.values())
+        unknown = [n for n in names if n not in self.columns]
+        if unknown:
+            raise KeyError(f"Columns not in the tariff schema registry: {unknown}")
+        wanted = set(names)
+        return [c for c in self.columns.values() if c.name in wanted or c.required]
+
+    def resolve(
+        self,
+        year: int,
+        header: Sequence[object],
+        columns: Sequence[TariffColumn],
+    ) -> Dict[str, Optional[int]]:
+        """
+        在表头中为每个规范列找到源列下标；可选列找不到时为 None，必需列找不到时报错。
+        """
+        labels = ["" if v is None else str(v).strip() for v in header]
+        # 重名的表头取第一个
+        position = {label: i for i, label in reversed(list(enumerate(labels))) if label}
+        overrides: Dict[str, str] = self.vintages.get(year, {}).get("columns", {})  # type: ignore[assignment]
+
+        mapping: Dict[str, Optional[int]] = {}
+        for col in columns:
+            candidates = [overrides[col.name]] if col.name in overrides else [col.name, *col.aliases]
+            found = next((position[c] for c in candidates if c in position), None)
+            if found is None and col.required:
+                raise KeyError(f"Required column '{col.name}' (tried {candidates}) not found for tariff year {year}")
+            mapping[col.name] = found
+        return mapping
+
+    def unregistered(
+        self,
+        header: Sequence[object],
+        mapping: Dict[str, Optional[int]],
+    ) -> List[Tuple[TariffColumn, int]]:
+        """
+        表头中没有映射到任何已登记列的源列（重名取第一个），按 dtype "auto"（文本）原样保留。
+        """
+        used = {i for i in mapping.values() if i is not None}
+        seen = set(self.columns)
+        extra: List[Tuple[TariffColumn, int]] = []
+        for i, value in enumerate(header):
+            label = "" if value is None else str(value).strip()
+            if label and i not in used and label not in seen:
+                seen.add(label)
+                extra.append((TariffColumn(label, "auto"), i))
+        return extra
+
+    def read_vintage(
+        self,
+        year: int,
+        file_path: Path,
+        names: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        读取一个年度的关税 Excel，只取 names 对应的源列并按注册表类型转换。
+
+        names 为 None 时读取全部列：已登记列按注册表顺序在前，未登记的源列按表头
+        顺序在后。缺少的已登记列为空列；整行为空的行被丢弃。
+        """
+        columns = self.select(names)
+        sheet = self.vintages.get(year, {}).get("sheet")
+
+        wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            if sheet is None:
+                ws = wb.worksheets[0]
+            elif sheet in wb.sheetnames:
+                ws = wb[sheet]
+            else:
+                raise KeyError(f"Sheet '{sheet}' registered for tariff year {year} not found in {file_path}: {wb.sheetnames}")
+
+            rows = ws.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                raise ValueError(f"Tariff file for year {year} is empty: {file_path}")
+            mapping = self.resolve(year, header, columns)
+            if names is None:
+                extra = self.unregistered(header, mapping)
+                columns = [*columns, *(col for col, _ in extra)]
+                mapping.update({col.name: i for col, i in extra})
+            present = [c for c in columns if mapping[c.name] is not None]
+
+            # 每行只投影出需要的单元格，并丢弃投影后全为空的行
+            indexes = [mapping[c.name] for c in present]
+            take = operator.itemgetter(*indexes) if len(indexes) > 1 else (lambda r: (r[indexes[0]],))
+            n_present = len(indexes)
+            data = [cells for cells in map(take, rows) if cells.count(None) < n_present]
+        finally:
+            wb.close()
+
+        n_rows = len(data)
+        raw = dict(zip((c.name for c in present), zip(*data))) if data else {}
+        out = {
+            c.name: c.convert(raw.get(c.name, ()), self.na_values) if mapping[c.name] is not None else c.empty(n_rows)
+            for c in columns
+        }
+        missing = [c.name for c in columns if mapping[c.name] is None]
+        if missing:
+            print(f"[Tariff] Year {year}: columns not in file, filled empty: {missing}")
+        return pd.DataFrame(out)
+
+
+def load_tariff_schema(path: Path = DEFAULT_TARIFF_SCHEMA_PATH) -> TariffSchemaRegistry:
+    """
+    读取关税 schema 注册表（同一路径只读取一次）。
+    """
+    return _load_tariff_schema_cached(Path(path).resolve())
+
+
+@lru_cache(maxsize=None)
+def _load_tariff_schema_cached(path: Path) -> TariffSchemaRegistry:
+    if not path.exists():
+        raise FileNotFoundError(f"Tariff schema registry not found: {path}")
+    spec = json.loads(path.read_text(encoding="utf-8"))
+
+    columns = {
+        name: TariffColumn.from_config(name, col_spec)
+        for name, col_spec in spec.get("columns", {}).items()
+    }
+    vintages = {int(year): vintage_spec for year, vintage_spec in spec.get("vintages", {}).items()}
+    for year, vintage_spec in vintages.items():
+        unknown = [c for c in vintage_spec.get("columns", {}) if c not in columns]
+        if unknown:
+            raise ValueError(f"Tariff schema vintage {year} maps unknown columns: {unknown}")
+    return TariffSchemaRegistry(columns, vintages, na_values=spec.get("na_values", DEFAULT_NA_VALUES))
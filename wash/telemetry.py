@@ -0,0 +1,268 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+各阶段的性能遥测：墙钟时间、CPU 时间、峰值内存、输入/输出行数
+
+用装饰器或上下文管理器包住主要函数，每次调用结束后向 JSON lines 文件追加一条记录：
+
+    @instrument("tariff.read_file")
+    def read_single_tariff_file(...): ...
+
+    with stage_span("wits.attach_tariffs", rows_in=len(panel)) as span:
+        ...
+        span.rows_out = len(result)
+
+每条记录的字段：
+
+    ts, stage, script, pid, status ("ok" / "error"), error,
+    wall_s, cpu_s           本阶段墙钟时间与本进程 CPU 时间
+    rows_in, rows_out       DataFrame / Series 参数与返回值的行数之和（没有时为 null）
+    rss_peak_mb             进程峰值常驻内存（进程级高水位，不是本阶段独占）
+    py_peak_mb              开启 tracemalloc 时本阶段 Python 堆的峰值增量
+    profile                 开启 cProfile 时本阶段的 .prof 文件
+
+由环境变量控制（进程池的子进程会继承，各进程各自追加写同一文件）：
+
+    APMCM_TELEMETRY             记录文件路径；默认 output/telemetry/telemetry.jsonl，设为 0/off 关闭
+    APMCM_TELEMETRY_TRACEMALLOC 设为 1 时用 tracemalloc 统计每阶段 Python 堆峰值（会拖慢分配密集的代码）
+    APMCM_TELEMETRY_PROFILE     目录；设置后对最外层阶段做 cProfile，每次调用写一个 .prof
+
+读取与汇总见 ``load_telemetry`` / ``summarize_telemetry``。
+
+统一按顶层模块导入（``from telemetry import instrument``，根目录脚本先把 wash/ 加入
+sys.path），不要再经 ``wash.telemetry`` 导入，否则同一进程里会有两份模块状态。
+"""
+
+from __future__ import annotations
+
+import cProfile
+import functools
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+# 可选依赖：峰值 RSS（resource 仅 POSIX；Windows 上用 psutil）
+try:
+    import resource  # type: ignore
+except ImportError:  # pragma: no cover - Windows
+    resource = None  # type: ignore
+try:
+    import psutil  # type: ignore
+except ImportError:  # pragma: no cover - safe fallback
+    psutil = None  # type: ignore
+
+
+DEFAULT_TELEMETRY_PATH = Path(__file__).resolve().parent.parent / "output" / "telemetry" / "telemetry.jsonl"
+
+TELEMETRY_ENV = "APMCM_TELEMETRY"
+TRACEMALLOC_ENV = "APMCM_TELEMETRY_TRACEMALLOC"
+PROFILE_ENV = "APMCM_TELEMETRY_PROFILE"
+
+_OFF_VALUES = ("0", "off", "false", "no")
+
+# 当前线程中正在执行的阶段（嵌套时用于合并 tracemalloc 峰值、只对最外层做 cProfile）；
+# 按线程保存，线程池中并发的阶段互不出栈
+_local = threading.local()
+_profile_counter = itertools.count(1)
+
+
+def _active_spans() -> List["StageSpan"]:
+    spans = getattr(_local, "spans", None)
+    if spans is None:
+        spans = _local.spans = []
+    return spans
+
+
+def telemetry_path() -> Optional[Path]:
+    value = os.environ.get(TELEMETRY_ENV, "")
+    if value.strip().lower() in _OFF_VALUES:
+        return None
+    return Path(value) if value.strip() else DEFAULT_TELEMETRY_PATH
+
+
+def count_rows(obj: object) -> Optional[int]:
+    """
+    DataFrame / Series 的行数；tuple / list 中的 DataFrame 行数求和；其余为 None。
+    """
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return len(obj)
+    if isinstance(obj, (tuple, list)):
+        counts = [count_rows(x) for x in obj if isinstance(x, (pd.DataFrame, pd.Series))]
+        return sum(counts) if counts else None
+    return None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    进程峰值 RSS（MB）；Linux 的 ru_maxrss 单位为 KB，macOS 为字节。
+    """
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+    return None
+
+
+class StageSpan:
+    """
+    一次阶段执行的计时与内存记录；由 stage_span / instrument 创建。
+    """
+
+    def __init__(self, stage: str, rows_in: Optional[int] = None) -> None:
+        self.stage = stage
+        self.rows_in = rows_in
+        self.rows_out: Optional[int] = None
+        self._child_py_peak = 0
+        self._profiler: Optional[cProfile.Profile] = None
+
+    def __enter__(self) -> "StageSpan":
+        if os.environ.get(TRACEMALLOC_ENV, "").strip().lower() not in ("", *_OFF_VALUES):
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+        self._tracing = tracemalloc.is_tracing()
+        if self._tracing:
+            self._py_start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+
+        active = _active_spans()
+        profile_dir = os.environ.get(PROFILE_ENV, "").strip()
+        if profile_dir and not active:
+            self._profiler = cProfile.Profile()
+        active.append(self)
+
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        if self._profiler is not None:
+            self._profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if self._profiler is not None:
+            self._profiler.disable()
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        active = _active_spans()
+        active.pop()
+
+        py_peak_mb = None
+        if self._tracing and tracemalloc.is_tracing():
+            # 子阶段 reset_peak 之后，本阶段峰值 = 子阶段结束后的峰值与各子阶段峰值取大
+            peak = max(tracemalloc.get_traced_memory()[1], self._child_py_peak)
+            if active:
+                active[-1]._child_py_peak = max(active[-1]._child_py_peak, peak)
+            py_peak_mb = round((peak - self._py_start) / (1024 * 1024), 3)
+
+        rss = peak_rss_mb()
+        record: Dict[str, object] = {
+            "ts": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "stage": self.stage,
+            "script": Path(sys.argv[0]).name if sys.argv and sys.argv[0] else None,
+            "pid": os.getpid(),
+            "status": "ok" if exc_type is None else "error",
+            "error": None if exc is None else repr(exc),
+            "wall_s": round(wall, 6),
+            "cpu_s": round(cpu, 6),
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "rss_peak_mb": None if rss is None else round(rss, 1),
+            "py_peak_mb": py_peak_mb,
+            "profile": self._dump_profile(),
+        }
+        write_record(record)
+        return False
+
+    def _dump_profile(self) -> Optional[str]:
+        if self._profiler is None:
+            return None
+        out_dir = Path(os.environ[PROFILE_ENV])
+        out_dir.mkdir(parents=True, exist_ok=True)
+        path = out_dir / f"{self.stage}-{os.getpid()}-{next(_profile_counter)}.prof"
+        self._profiler.dump_stats(path)
+        return str(path)
+
+
+def stage_span(stage: str, rows_in: Optional[int] = None) -> StageSpan:
+    """
+    上下文管理器形式；在 with 块内设置 span.rows_out 记录输出行数。
+    """
+    return StageSpan(stage, rows_in)
+
+
+def instrument(stage: Optional[str] = None) -> Callable[[Callable[..., object]], Callable[..., object]]:
+    """
+    装饰器形式：输入行数取所有 DataFrame / Series 参数之和，输出行数取返回值。
+    stage 默认为 "<模块名>.<函数名>"。
+    """
+
+    def decorate(func: Callable[..., object]) -> Callable[..., object]:
+        name = stage or f"{Path(func.__code__.co_filename).stem}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if telemetry_path() is None:
+                return func(*args, **kwargs)
+            rows = [count_rows(a) for a in (*args, *kwargs.values()) if isinstance(a, (pd.DataFrame, pd.Series))]
+            with stage_span(name, rows_in=sum(rows) if rows else None) as span:
+                result = func(*args, **kwargs)
+                span.rows_out = count_rows(result)
+            return result
+
+        return wrapper
+
+    return decorate
+
+
+def write_record(record: Dict[str, object]) -> None:
+    """
+    以单次 write 追加一行（O_APPEND），多个进程同时写时各行不会交错。
+    """
+    path = telemetry_path()
+    if path is None:
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def load_telemetry(path: Optional[Path] = None) -> pd.DataFrame:
+    path = Path(path) if path is not None else (telemetry_path() or DEFAULT_TELEMETRY_PATH)
+    if not path.exists():
+        return pd.DataFrame()
+    return pd.read_json(path, lines=True)
+
+
+def summarize_telemetry(records: pd.DataFrame) -> pd.DataFrame:
+    """
+    按阶段汇总：调用次数、墙钟时间总和/中位数/最大值、CPU 时间、峰值内存、行数。
+    """
+    if records.empty:
+        return records
+    return records.groupby("stage").agg(
+        calls=("wall_s", "size"),
+        wall_total_s=("wall_s", "sum"),
+        wall_median_s=("wall_s", "median"),
+        wall_max_s=("wall_s", "max"),
+        cpu_total_s=("cpu_s", "sum"),
+        rss_peak_mb=("rss_peak_mb", "max"),
+        py_peak_mb=("py_peak_mb", "max"),
+        rows_in=("rows_in", lambda s: s.sum(min_count=1)),
+        rows_out=("rows_out", lambda s: s.sum(min_count=1)),
+        errors=("status", lambda s: int((s == "error").sum())),
+    ).sort_values("wall_total_s", ascending=False)
+
+
+if __name__ == "__main__":
+    # python wash/telemetry.py [记录文件]：打印各阶段汇总
+    summary = summarize_telemetry(load_telemetry(Path(sys.argv[1]) if len(sys.argv) > 1 else None))
+    print(summary.to_string() if not summary.empty else "No telemetry records found.")
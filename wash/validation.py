@@ -0,0 +1,326 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+规则化数据校验
+
+校验规则写在 wash/config/validation_rules.json 中，每条规则指定面板（table）、
+类型（kind）和参数；每类规则对整张面板做一次向量化布尔运算，得到违规行掩码：
+
+- range            : column 落在 [min, max] 之外（缺省一端不检查；allow_null=false 时缺失也算违规）
+- unique           : columns 组成的键重复（重复键的所有行都记为违规）
+- interval_order   : start > end
+- interval_overlap : 同一 keys 下按 start 排序后，区间与之前任一区间重叠（重叠双方都记为违规）
+- code_format      : 编码不是 digits 位的合法编码；parents 给出时检查上级编码列是否为其前缀
+- yoy_jump         : 同一 keys 相邻年份的变化过大；max_abs_change 为绝对变化，
+                     max_ratio 为大值 / 小值之比（且大值不低于 min_base）
+
+所有违规行汇总为一张紧凑的长表（rule, table, row, year, code, value），另附每条规则的
+检查行数、违规行数和耗时。
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from concordance import CODE_LEVEL_DIGITS, codes_to_int
+
+
+DEFAULT_VALIDATION_RULES_PATH = Path(__file__).resolve().parent / "config" / "validation_rules.json"
+
+VIOLATIONS_FILE_NAME = "validation_violations.csv"
+SUMMARY_FILE_NAME = "validation_summary.csv"
+
+
+class ValidationRule:
+    """
+    一条校验规则。
+    """
+
+    def __init__(self, name: str, table: str, kind: str, params: Dict[str, object]) -> None:
+        if kind not in RULE_CHECKS:
+            raise ValueError(f"Unknown validation rule kind '{kind}' in rule '{name}'")
+        self.name = name
+        self.table = table
+        self.kind = kind
+        self.params = params
+
+    @classmethod
+    def from_config(cls, spec: Dict[str, object]) -> "ValidationRule":
+        params = {k: v for k, v in spec.items() if k not in ("name", "table", "kind")}
+        return cls(str(spec["name"]), str(spec["table"]), str(spec["kind"]), params)
+
+    def required_columns(self) -> List[str]:
+        cols: List[str] = []
+        for key in ("column", "start", "end"):
+            if key in self.params:
+                cols.append(str(self.params[key]))
+        for key in ("columns", "keys"):
+            cols.extend(str(c) for c in self.params.get(key, []))  # type: ignore[union-attr]
+        cols.extend(str(c) for c in dict(self.params.get("parents", {})))  # type: ignore[arg-type]
+        if self.kind == "yoy_jump":
+            cols.append("year")
+        return cols
+
+    def evaluate(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        返回与 df 行对齐的违规掩码。
+        """
+        return RULE_CHECKS[self.kind](df, self.params)
+
+
+def load_validation_rules(path: Path = DEFAULT_VALIDATION_RULES_PATH) -> List[ValidationRule]:
+    """
+    读取规则配置文件。
+    """
+    if not path.exists():
+        raise FileNotFoundError(f"Validation rules config not found: {path}")
+    spec = json.loads(path.read_text(encoding="utf-8"))
+    return [ValidationRule.from_config(rule) for rule in spec.get("rules", [])]
+
+
+# ---------------------------------------------------------------------------
+# 各类规则的向量化实现
+# ---------------------------------------------------------------------------
+
+def _float_values(series: pd.Series) -> np.ndarray:
+    return pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _key_codes(df: pd.DataFrame, columns: Sequence[str]) -> List[np.ndarray]:
+    """
+    键列转为整数数组（categorical 取类别序号，文本列 factorize），供 lexsort 使用。
+    """
+    keys: List[np.ndarray] = []
+    for col in columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            keys.append(series.cat.codes.to_numpy(dtype=np.int64))
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            keys.append(series.to_numpy(dtype=np.int64, na_value=-1))
+        else:
+            keys.append(pd.factorize(series)[0].astype(np.int64))
+    return keys
+
+
+def _same_group_as_previous(sorted_keys: List[np.ndarray]) -> np.ndarray:
+    """
+    排序后每行是否与上一行属于同一分组。
+    """
+    n = sorted_keys[0].size if sorted_keys else 0
+    same = np.zeros(n, dtype=bool)
+    if n > 1:
+        same[1:] = True
+        for key in sorted_keys:
+            same[1:] &= key[1:] == key[:-1]
+    return same
+
+
+def _check_range(df: pd.DataFrame, params: Dict[str, object]) -> np.ndarray:
+    values = _float_values(df[str(params["column"])])
+    mask = np.zeros(values.size, dtype=bool)
+    if params.get("min") is not None:
+        mask |= values < float(params["min"])  # type: ignore[arg-type]
+    if params.get("max") is not None:
+        mask |= values > float(params["max"])  # type: ignore[arg-type]
+    if not params.get("allow_null", True):
+        mask |= np.isnan(values)
+    return mask
+
+
+def _check_unique(df: pd.DataFrame, params: Dict[str, object]) -> np.ndarray:
+    columns = [str(c) for c in params["columns"]]  # type: ignore[union-attr]
+    return df.duplicated(subset=columns, keep=False).to_numpy()
+
+
+def _check_interval_order(df: pd.DataFrame, params: Dict[str, object]) -> np.ndarray:
+    start = df[str(params["start"])].to_numpy()
+    end = df[str(params["end"])].to_numpy()
+    return start > end
+
+
+def _check_interval_overlap(df: pd.DataFrame, params: Dict[str, object]) -> np.ndarray:
+    keys = _key_codes(df, [str(c) for c in params["keys"]])  # type: ignore[union-attr]
+    start_dt = df[str(params["start"])].to_numpy(dtype="datetime64[ns]")
+    end_dt = df[str(params["end"])].to_numpy(dtype="datetime64[ns]")
+    # 起止日期缺失的行不参与比较（NaT 转整数为最小值，不会抬高组内最大结束日期）
+    dated = ~(np.isnat(start_dt) | np.isnat(end_dt))
+    start, end = start_dt.astype(np.int64), end_dt.astype(np.int64)
+
+    # 按 keys、start 排序；组内 end 的前缀最大值大于当前 start 即为重叠
+    order = np.lexsort([start] + keys[::-1])
+    s_start, s_end = start[order], end[order]
+    same = _same_group_as_previous([k[order] for k in keys])
+
+    group_id = np.cumsum(~same)
+    run_max_end = pd.Series(s_end).groupby(group_id).cummax().to_numpy()
+    # 组内达到当前最大结束日期的行位置（组首行总是刷新最大值，不会跨组）
+    pos = np.arange(order.size)
+    run_max_pos = np.maximum.accumulate(np.where(s_end == run_max_end, pos, -1))
+
+    overlap_sorted = np.zeros(order.size, dtype=bool)
+    prev_max_end = np.empty_like(s_end)
+    prev_max_end[1:] = run_max_end[:-1]
+    overlap_sorted[same] = s_start[same] < prev_max_end[same]
+    overlap_sorted &= dated[order]
+
+    # 重叠对的另一行：之前结束最晚的那一行（不一定是紧邻的上一行）
+    partner = np.zeros(order.size, dtype=bool)
+    rows = np.flatnonzero(overlap_sorted)
+    partner[run_max_pos[rows - 1]] = True
+    mask = np.zeros(order.size, dtype=bool)
+    mask[order] = overlap_sorted | partner
+    return mask
+
+
+def _check_code_format(df: pd.DataFrame, params: Dict[str, object]) -> np.ndarray:
+    column = str(params["column"])
+    digits = int(params.get("digits", CODE_LEVEL_DIGITS.get(column, 0)))  # type: ignore[arg-type]
+    series = df[column]
+    if pd.api.types.is_integer_dtype(series.dtype):
+        codes = series.to_numpy(dtype=np.int64, na_value=-1)
+        mask = (codes < 0) | (codes >= 10 ** digits)
+    else:
+        text = series.astype("string")
+        mask = ~text.str.fullmatch(rf"\d{{{digits}}}").fillna(False).to_numpy(dtype=bool)
+        codes = codes_to_int(series)
+
+    for parent, parent_digits in dict(params.get("parents", {})).items():  # type: ignore[arg-type]
+        expected = np.where(codes >= 0, codes // (10 ** (digits - int(parent_digits))), -1)
+        mask |= codes_to_int(df[str(parent)]) != expected
+    return mask
+
+
+def _check_yoy_jump(df: pd.DataFrame, params: Dict[str, object]) -> np.ndarray:
+    keys = _key_codes(df, [str(c) for c in params["keys"]])  # type: ignore[union-attr]
+    years = df["year"].to_numpy(dtype=np.int64)
+    values = _float_values(df[str(params["column"])])
+
+    order = np.lexsort([years] + keys[::-1])
+    s_years, s_values = years[order], values[order]
+    consecutive = _same_group_as_previous([k[order] for k in keys])
+    consecutive[1:] &= s_years[1:] - s_years[:-1] == 1
+
+    prev = np.full(order.size, np.nan)
+    prev[1:] = s_values[:-1]
+    jump = np.zeros(order.size, dtype=bool)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if params.get("max_abs_change") is not None:
+            jump |= np.abs(s_values - prev) > float(params["max_abs_change"])  # type: ignore[arg-type]
+        if params.get("max_ratio") is not None:
+            hi = np.fmax(np.abs(s_values), np.abs(prev))
+            lo = np.fmin(np.abs(s_values), np.abs(prev))
+            ratio = np.where(lo > 0, hi / lo, np.inf)
+            jump |= (ratio > float(params["max_ratio"])) & (hi >= float(params.get("min_base", 0.0)))  # type: ignore[arg-type]
+    jump &= consecutive & ~np.isnan(s_values) & ~np.isnan(prev)
+
+    mask = np.zeros(order.size, dtype=bool)
+    mask[order] = jump
+    return mask
+
+
+RULE_CHECKS: Dict[str, Callable[[pd.DataFrame, Dict[str, object]], np.ndarray]] = {
+    "range": _check_range,
+    "unique": _check_unique,
+    "interval_order": _check_interval_order,
+    "interval_overlap": _check_interval_overlap,
+    "code_format": _check_code_format,
+    "yoy_jump": _check_yoy_jump,
+}
+
+
+# ---------------------------------------------------------------------------
+# 执行与汇总
+# ---------------------------------------------------------------------------
+
+def _violation_frame(rule: ValidationRule, df: pd.DataFrame, rows: np.ndarray) -> pd.DataFrame:
+    """
+    某条规则的违规行：行号、年份、最细一级编码、被检查列的取值。
+    """
+    year = df["year"].to_numpy()[rows] if "year" in df.columns else np.full(rows.size, -1)
+    code = np.full(rows.size, -1, dtype=np.int64)
+    for col in ("hts8", "hs6", "hs4", "hs2"):
+        if col in df.columns:
+            code = codes_to_int(df[col])[rows]
+            break
+    value_col = rule.params.get("column")
+    if value_col is not None and pd.api.types.is_numeric_dtype(df[str(value_col)].dtype):
+        value = _float_values(df[str(value_col)])[rows]
+    else:
+        value = np.full(rows.size, np.nan)
+    return pd.DataFrame(
+        {
+            "rule": rule.name,
+            "table": rule.table,
+            "row": rows.astype(np.int64),
+            "year": np.asarray(year, dtype=np.int64),
+            "code": code,
+            "value": value,
+        }
+    )
+
+
+def run_validation(
+    outputs: Dict[str, pd.DataFrame],
+    rules: Sequence[ValidationRule],
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    对 outputs 中的面板逐条执行规则。面板或所需列缺失的规则跳过（status=skipped）。
+
+    返回
+    -------
+    violations : rule, table, row, year, code, value（rule / table 为 categorical）
+    summary    : rule, table, kind, status, rows_checked, violations, seconds
+    """
+    frames: List[pd.DataFrame] = []
+    summary_rows: List[Dict[str, object]] = []
+
+    for rule in rules:
+        df: Optional[pd.DataFrame] = outputs.get(rule.table)
+        missing = [] if df is None else [c for c in rule.required_columns() if c not in df.columns]
+        if df is None or missing:
+            reason = f"table '{rule.table}' not available" if df is None else f"missing columns {missing}"
+            print(f"[Check] {rule.name}: skipped ({reason})")
+            summary_rows.append(
+                {"rule": rule.name, "table": rule.table, "kind": rule.kind, "status": "skipped",
+                 "rows_checked": 0, "violations": 0, "seconds": 0.0}
+            )
+            continue
+
+        start = time.perf_counter()
+        rows = np.flatnonzero(rule.evaluate(df))
+        seconds = time.perf_counter() - start
+        if rows.size:
+            frames.append(_violation_frame(rule, df, rows))
+        print(f"[Check] {rule.name}: {rows.size} / {len(df)} rows ({seconds * 1000:.1f} ms)")
+        summary_rows.append(
+            {"rule": rule.name, "table": rule.table, "kind": rule.kind, "status": "ok",
+             "rows_checked": len(df), "violations": int(rows.size), "seconds": round(seconds, 6)}
+        )
+
+    columns = ["rule", "table", "row", "year", "code", "value"]
+    violations = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+    violations["rule"] = violations["rule"].astype("category")
+    violations["table"] = violations["table"].astype("category")
+    return violations, pd.DataFrame(summary_rows)
+
+
+def write_validation_report(
+    violations: pd.DataFrame,
+    summary: pd.DataFrame,
+    output_dir: Path,
+) -> None:
+    """
+    写出违规长表和规则汇总。
+    """
+    violations_path = output_dir / VIOLATIONS_FILE_NAME
+    summary_path = output_dir / SUMMARY_FILE_NAME
+    violations.to_csv(violations_path, index=False)
+    summary.to_csv(summary_path, index=False)
+    total = float(summary["seconds"].sum()) if not summary.empty else 0.0
+    print(f"[Check] {len(violations)} violations from {len(summary)} rules ({total:.3f}s) -> {violations_path}")